@@ -0,0 +1,9 @@
+"""
+Offline benchmarks. Nothing in here is imported by the bot.
+
+    python -m benchmarks.datagen   synthetic kingdom database
+    python -m benchmarks.run_db    timings of every public database function (JSON)
+    python -m benchmarks.run_cogs  load test of the slash command cogs with fake interactions (JSON, gates)
+    python -m benchmarks.run_render chart rendering: wall / CPU time, peak RSS, output size (JSON)
+    python -m benchmarks.run_startup startup import time (-X importtime) and heavy imports (JSON, gates)
+"""
@@ -0,0 +1,231 @@
+"""
+Deterministic synthetic kingdom data.
+
+Fills a fresh database through the same db_manager functions the bot uses
+(Excel uploads, period calculation, fort imports, season archiving, linking),
+so the resulting tables, indexes and aggregates match production.
+
+    python -m benchmarks.datagen --data-dir /tmp/kvk_bench --players 3000 --seasons 20 --periods 12
+
+DATA_PATH is set from --data-dir before the database package is imported.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+PRESETS = {
+    'tiny': {'players': 200, 'seasons': 2, 'periods': 2},
+    'small': {'players': 500, 'seasons': 4, 'periods': 4},
+    'medium': {'players': 1500, 'seasons': 10, 'periods': 6},
+    'large': {'players': 3000, 'seasons': 20, 'periods': 12},
+}
+
+_SYLLABLES = ['ka', 'ro', 'mi', 'zen', 'tor', 'lu', 'vex', 'sha', 'dra', 'kin', 'el', 'nox', 'ri', 'ga', 'mor', 'fy']
+_REQUIREMENT_BRACKETS = [
+    (0, 29_999_999, 300_000, 50_000),
+    (30_000_000, 49_999_999, 1_000_000, 150_000),
+    (50_000_000, 79_999_999, 2_500_000, 300_000),
+    (80_000_000, 119_999_999, 5_000_000, 500_000),
+    (120_000_000, 2_000_000_000, 9_000_000, 800_000),
+]
+
+
+def _xlsx(columns: dict) -> bytes:
+    """Builds an in-memory Excel upload, like an attachment read by the bot."""
+    import pandas as pd
+    buf = io.BytesIO()
+    pd.DataFrame(columns).to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+def _player_name(rng: random.Random, i: int) -> str:
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize() + str(i % 97)
+
+
+def _snapshot_upload(players, state):
+    return _xlsx({
+        'Governor ID': [p['id'] for p in players],
+        'Governor Name': [p['name'] for p in players],
+        'Power': [state[p['id']]['power'] for p in players],
+        'Kill Points': [state[p['id']]['kp'] for p in players],
+        'Dead': [state[p['id']]['deaths'] for p in players],
+        'T1 Kills': [state[p['id']]['t1'] for p in players],
+        'T2 Kills': [state[p['id']]['t2'] for p in players],
+        'T3 Kills': [state[p['id']]['t3'] for p in players],
+        'T4 Kills': [state[p['id']]['t4'] for p in players],
+        'T5 Kills': [state[p['id']]['t5'] for p in players],
+    })
+
+
+def generate(players: int = 3000, seasons: int = 20, periods: int = 12, fort_periods: int = None,
+             link_ratio: float = 0.3, admin_logs: int = None, seed: int = 1662, verbose: bool = True) -> dict:
+    """
+    Generates the dataset into the database configured by DATA_PATH and returns a manifest
+    (season keys, period keys, sample player / discord IDs) for benchmarks to build arguments from.
+    """
+    from database import database_manager as db_manager
+    from core import calculation
+
+    rng = random.Random(seed)
+    fort_periods = min(periods, 4) if fort_periods is None else fort_periods
+    admin_logs = players * 5 if admin_logs is None else admin_logs
+    started = time.perf_counter()
+
+    def log(msg):
+        if verbose:
+            print(f"[{time.perf_counter() - started:7.1f}s] {msg}", file=sys.stderr)
+
+    db_manager.create_tables()
+
+    roster = [{'id': 50_000_000 + i * 7, 'name': _player_name(rng, i)} for i in range(players)]
+    state = {
+        p['id']: {
+            'power': int(rng.lognormvariate(17.6, 0.6)),
+            'kp': rng.randint(0, 50_000_000), 'deaths': rng.randint(0, 2_000_000),
+            't1': rng.randint(0, 100_000), 't2': rng.randint(0, 100_000), 't3': rng.randint(0, 500_000),
+            't4': rng.randint(0, 3_000_000), 't5': rng.randint(0, 1_000_000),
+        }
+        for p in roster
+    }
+
+    requirements_upload = _xlsx({
+        'Min Power': [b[0] for b in _REQUIREMENT_BRACKETS],
+        'Max Power': [b[1] for b in _REQUIREMENT_BRACKETS],
+        'Required Kills': [b[2] for b in _REQUIREMENT_BRACKETS],
+        'Required Deaths': [b[3] for b in _REQUIREMENT_BRACKETS],
+    })
+
+    season_keys = []
+    season_start = date(2022, 1, 3)
+    for s in range(seasons):
+        name = f"Synthetic KvK {s + 1:02d}"
+        start = season_start + timedelta(days=70 * s)
+        end = start + timedelta(days=60)
+        ok, msg = db_manager.create_kvk_season(name, start.isoformat(), end.isoformat(), make_active=True, copy_global_reqs=False)
+        if not ok:
+            raise RuntimeError(f"create_kvk_season failed: {msg}")
+        key = db_manager.get_current_kvk_name()
+        db_manager.import_requirements(requirements_upload, key)
+
+        # ~90% of the kingdom takes part in a season; a few names change between seasons
+        participants = [p for p in roster if rng.random() < 0.9]
+        for p in rng.sample(participants, max(1, len(participants) // 50)):
+            p['name'] = _player_name(rng, rng.randint(0, 10_000))
+        db_manager.import_kingdom_players(_xlsx({
+            'Governor ID': [p['id'] for p in participants],
+            'Governor Name': [p['name'] for p in participants],
+            'Power': [state[p['id']]['power'] for p in participants],
+        }), key)
+
+        for period in range(1, periods + 1):
+            period_key = f"period_{period}"
+            db_manager.import_snapshot(_snapshot_upload(participants, state), key, period_key, 'start')
+            for p in participants:
+                st = state[p['id']]
+                activity = rng.random() ** 2
+                t4, t5 = int(activity * rng.randint(0, 400_000)), int(activity * rng.randint(0, 150_000))
+                st['t4'] += t4
+                st['t5'] += t5
+                st['t3'] += int(activity * rng.randint(0, 50_000))
+                st['kp'] += t4 * 10 + t5 * 20
+                st['deaths'] += int(activity * rng.randint(0, 120_000))
+                st['power'] = max(1_000_000, st['power'] + rng.randint(-2_000_000, 3_000_000))
+            db_manager.import_snapshot(_snapshot_upload(participants, state), key, period_key, 'end')
+            ok, msg = calculation.calculate_period_results(key, period_key)
+            if not ok:
+                raise RuntimeError(f"calculate_period_results failed: {msg}")
+            db_manager.set_last_updated(key, period_key)
+
+        for week in range(1, fort_periods + 1):
+            stats_list = []
+            for p in participants:
+                joined, launched = rng.randint(0, 40), rng.randint(0, 15)
+                stats_list.append({
+                    'player_id': p['id'], 'player_name': p['name'],
+                    'forts_joined': joined, 'forts_launched': launched,
+                    'total_forts': joined + launched, 'penalties': rng.choice([0, 0, 0, 5, 10]),
+                    'kvk_name': key
+                })
+            db_manager.import_fort_stats(stats_list, f"Week {week}")
+
+        if s < seasons - 1:
+            archive_key = f"{key} ({start.isoformat()} - {end.isoformat()})"
+            db_manager.archive_kvk_data(key, archive_key)
+            db_manager.set_current_kvk_name("Not set")
+            key = archive_key
+        season_keys.append(key)
+        log(f"season {s + 1}/{seasons}: {len(participants)} players, {periods} periods, {fort_periods} fort periods")
+
+    # Discord links: a share of players linked as mains, some of those owners also have alts / farms
+    discord_ids = []
+    linked = rng.sample(roster, int(len(roster) * link_ratio))
+    for i, p in enumerate(linked):
+        discord_id = 900_000_000_000_000_000 + i
+        if i % 4 == 0 and discord_ids:
+            db_manager.link_account(discord_ids[-1], p['id'], rng.choice(['alt', 'farm']))
+        else:
+            discord_ids.append(discord_id)
+            db_manager.link_account(discord_id, p['id'], 'main')
+    for p in rng.sample(roster, max(1, len(roster) // 40)):
+        db_manager.set_player_type(p['id'], 'farm')
+
+    base_time = time.mktime((2024, 1, 1, 0, 0, 0, 0, 0, 0))
+    entries = [
+        (rng.randint(1, 5), f"admin{rng.randint(1, 5)}", rng.choice(['Upload Snapshot', 'Link Account', 'Command Used']),
+         f"detail {i}", time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(base_time + i * 600)))
+        for i in range(admin_logs)
+    ]
+    for i in range(0, len(entries), 5000):
+        db_manager.log_admin_actions(entries[i:i + 5000])
+    log(f"{len(linked)} linked accounts, {admin_logs} admin log entries")
+
+    return {
+        'config': {'players': players, 'seasons': seasons, 'periods': periods, 'fort_periods': fort_periods,
+                   'link_ratio': link_ratio, 'admin_logs': admin_logs, 'seed': seed},
+        'seasons': season_keys,
+        'current_season': season_keys[-1],
+        'periods': [f"period_{p}" for p in range(1, periods + 1)],
+        'fort_periods': [f"week_{w}" for w in range(1, fort_periods + 1)],
+        'player_ids': [p['id'] for p in rng.sample(roster, min(50, len(roster)))],
+        'linked_player_ids': [p['id'] for p in linked[:50]],
+        'discord_ids': discord_ids[:50],
+        'name_queries': [p['name'][:4] for p in rng.sample(roster, min(20, len(roster)))],
+        'generated_seconds': round(time.perf_counter() - started, 1)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic kingdom database for benchmarks.")
+    parser.add_argument('--data-dir', required=True, help="Directory for kvk_data.db (must not contain real data)")
+    parser.add_argument('--preset', choices=sorted(PRESETS), help="Size preset (overridden by explicit sizes)")
+    parser.add_argument('--players', type=int)
+    parser.add_argument('--seasons', type=int)
+    parser.add_argument('--periods', type=int)
+    parser.add_argument('--fort-periods', type=int)
+    parser.add_argument('--link-ratio', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=1662)
+    args = parser.parse_args(argv)
+
+    size = dict(PRESETS[args.preset or 'large'])
+    for field in ('players', 'seasons', 'periods'):
+        if getattr(args, field) is not None:
+            size[field] = getattr(args, field)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    if os.path.exists(os.path.join(args.data_dir, 'kvk_data.db')):
+        parser.error(f"{args.data_dir} already contains kvk_data.db; use an empty directory")
+    os.environ['DATA_PATH'] = os.path.abspath(args.data_dir)
+
+    manifest = generate(fort_periods=args.fort_periods, link_ratio=args.link_ratio, seed=args.seed, **size)
+    with open(os.path.join(args.data_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(json.dumps(manifest['config']))
+
+
+if __name__ == '__main__':
+    main()
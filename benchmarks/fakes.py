@@ -0,0 +1,282 @@
+"""
+Network-free stand-ins for the discord.py objects the cogs touch: Interaction (with
+response / followup), User, Role, Guild, Channel, Attachment and a minimal bot.
+
+Only the attributes and coroutines the cogs actually use are implemented. Every call that
+would hit the Discord API sleeps for `api_latency` seconds instead and is recorded, so
+handlers can be driven directly (e.g. `await cog.my_stats.callback(cog, interaction)`).
+"""
+import asyncio
+import itertools
+import time
+from types import SimpleNamespace
+
+# Discord invalidates an interaction that is not acknowledged within 3 seconds
+ACK_DEADLINE = 3.0
+
+_ids = itertools.count(1_100_000_000_000_000_000)
+
+
+def _asset(url: str):
+    return SimpleNamespace(url=url)
+
+
+class FakeRole:
+    def __init__(self, role_id: int, name: str = "role"):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str = None, roles=()):
+        self.id = user_id
+        self.name = name or f"user{user_id % 100000}"
+        self.display_name = self.name
+        self.global_name = self.name
+        self.bot = False
+        self.roles = list(roles)
+        self.mention = f"<@{user_id}>"
+        self.avatar = None
+        self.display_avatar = _asset(f"https://cdn.discordapp.com/embed/avatars/{user_id % 5}.png")
+
+    def __str__(self):
+        return self.name
+
+
+class FakeMessage:
+    def __init__(self, channel, content=None, embeds=(), files=(), attachments=()):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.embeds = list(embeds)
+        self.files = list(files)
+        self.attachments = list(attachments)
+        self.created_at = None
+
+    async def edit(self, **kwargs):
+        if 'content' in kwargs:
+            self.content = kwargs['content']
+        return self
+
+    async def delete(self):
+        pass
+
+
+def _record(sent: list, channel, content=None, embed=None, embeds=None, file=None, files=None, **kwargs):
+    """Stores what would have been sent; attached files are read (like an upload) and closed."""
+    files = list(files or ([file] if file else []))
+    sizes = []
+    for f in files:
+        try:
+            sizes.append(len(f.fp.read()))
+        finally:
+            f.close()
+    message = FakeMessage(channel, content, embeds or ([embed] if embed else []), sizes)
+    sent.append(message)
+    return message
+
+
+class FakeChannel:
+    """Text channel that records sent messages. `api_latency` seconds per send."""
+    def __init__(self, channel_id: int = None, name: str = "general", api_latency: float = 0.0, guild=None):
+        self.id = channel_id or next(_ids)
+        self.name = name
+        self.guild = guild
+        self.api_latency = api_latency
+        self.mention = f"<#{self.id}>"
+        self.sent = []
+        self.history_messages = []
+
+    async def send(self, content=None, **kwargs):
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        return _record(self.sent, self, content, **kwargs)
+
+    def permissions_for(self, member):
+        return SimpleNamespace(read_message_history=True, send_messages=True, attach_files=True, embed_links=True)
+
+    async def history(self, limit=None, after=None, before=None, oldest_first=None):
+        for message in self.history_messages[:limit]:
+            yield message
+
+
+class FakeAttachment:
+    """Uploaded file; read() returns the given bytes."""
+    def __init__(self, filename: str, data: bytes, api_latency: float = 0.0):
+        self.id = next(_ids)
+        self.filename = filename
+        self.size = len(data)
+        self.url = f"https://cdn.discordapp.com/attachments/0/{self.id}/{filename}"
+        self.content_type = None
+        self.api_latency = api_latency
+        self._data = data
+
+    async def read(self, *, use_cached: bool = False) -> bytes:
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        return self._data
+
+    async def save(self, fp, *, seek_begin: bool = True, use_cached: bool = False) -> int:
+        data = await self.read()
+        if isinstance(fp, (str, bytes)):
+            with open(fp, 'wb') as f:
+                return f.write(data)
+        written = fp.write(data)
+        if seek_begin:
+            fp.seek(0)
+        return written
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int = None, name: str = "Kingdom", roles=(), me=None):
+        self.id = guild_id or next(_ids)
+        self.name = name
+        self.roles = list(roles)
+        self.me = me or FakeUser(next(_ids), "bot")
+        self.members = []
+
+    def get_member(self, user_id: int):
+        return next((m for m in self.members if m.id == user_id), None)
+
+    def get_role(self, role_id: int):
+        return next((r for r in self.roles if r.id == role_id), None)
+
+
+class FakeResponse:
+    """interaction.response: the first acknowledgement (defer / send_message / send_modal / edit_message)."""
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+        self.kind = None
+        self.deferred_ephemeral = None
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _ack(self, kind: str):
+        if self._done:
+            raise RuntimeError("This interaction has already been responded to before")
+        self._done = True
+        self.kind = kind
+        await self._interaction._api_call()
+        # Acknowledgement time is what the user sees as "thinking..." vs "interaction failed"
+        self._interaction.ack_seconds = time.perf_counter() - self._interaction.created
+
+    async def defer(self, *, ephemeral: bool = False, thinking: bool = False):
+        self.deferred_ephemeral = ephemeral
+        await self._ack('defer')
+
+    async def send_message(self, content=None, *, ephemeral: bool = False, view=None, **kwargs):
+        await self._ack('message')
+        _record(self._interaction.sent, self._interaction.channel, content, **kwargs)
+
+    async def send_modal(self, modal):
+        await self._ack('modal')
+        self._interaction.modal = modal
+
+    async def edit_message(self, *, content=None, view=None, **kwargs):
+        await self._ack('edit')
+        _record(self._interaction.sent, self._interaction.channel, content, **kwargs)
+
+
+class FakeFollowup:
+    """interaction.followup (webhook sends after the first acknowledgement)."""
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, *, ephemeral: bool = False, view=None, wait: bool = False, **kwargs):
+        if not self._interaction.response.is_done():
+            raise RuntimeError("Interaction must be acknowledged before using followup")
+        await self._interaction._api_call()
+        return _record(self._interaction.sent, self._interaction.channel, content, **kwargs)
+
+
+class FakeInteraction:
+    """
+    Application command interaction. `sent` collects every message the handler produced;
+    `ack_seconds` is the time from creation to the first response (None if never acknowledged).
+    """
+    def __init__(self, user: FakeUser, guild: FakeGuild = None, channel: FakeChannel = None,
+                 command_name: str = None, namespace: dict = None, api_latency: float = 0.0):
+        self.id = next(_ids)
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.channel = channel
+        self.channel_id = channel.id if channel else None
+        self.command = SimpleNamespace(name=command_name, qualified_name=command_name) if command_name else None
+        self.data = {'name': command_name} if command_name else {}
+        self.namespace = SimpleNamespace(**(namespace or {}))
+        self.api_latency = api_latency
+        self.created = time.perf_counter()
+        self.ack_seconds = None
+        self.command_failed = False
+        self.modal = None
+        self.sent = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def _api_call(self):
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+
+    @property
+    def expired(self) -> bool:
+        """True if Discord would have shown "This interaction failed"."""
+        return self.ack_seconds is None or self.ack_seconds > ACK_DEADLINE
+
+    async def edit_original_response(self, *, content=None, **kwargs):
+        await self._api_call()
+        return _record(self.sent, self.channel, content, **kwargs)
+
+    async def original_response(self):
+        return self.sent[0] if self.sent else None
+
+
+class FakeBot:
+    """
+    The bits of MyBot the cogs use: user, guilds, channel lookup and the shared services
+    (outbound, logger, audit, notifications) attached by the caller. Never connects.
+    """
+    def __init__(self, guild: FakeGuild = None, channels=()):
+        self.user = FakeUser(next(_ids), "KvK Bot")
+        self.guilds = [guild] if guild else []
+        self.latency = 0.05
+        self._channels = {c.id: c for c in channels}
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def add_channel(self, channel: FakeChannel):
+        self._channels[channel.id] = channel
+
+    def get_channel(self, channel_id: int):
+        return self._channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id: int):
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            raise LookupError(f"Unknown channel {channel_id}")
+        return channel
+
+    def get_guild(self, guild_id: int):
+        return next((g for g in self.guilds if g.id == guild_id), None)
+
+    async def wait_until_ready(self):
+        # Background loops (backups, retention) stay parked; they are not part of a load test
+        await self._ready.wait()
+
+    async def wait_for(self, event: str, *, check=None, timeout: float = None):
+        raise asyncio.TimeoutError()
+
+    def is_ready(self) -> bool:
+        return True
+
+    def is_closed(self) -> bool:
+        return self._closed
@@ -0,0 +1,360 @@
+"""
+Offline load test for the Stats, Forts and Admin cogs.
+
+Simulates a burst of members running slash commands (e.g. 200 people hitting /my_stats
+right after an announcement) against a synthetic database, with fake Discord objects and no
+network. Reports per-command latency percentiles (with the defer/db/render/send phase split
+from core.tracing), time to first acknowledgement, interactions that would have expired, and
+event loop lag. Can be used as a regression gate:
+
+    python -m benchmarks.run_cogs --users 200 --mix my_stats --output cogs.json
+    python -m benchmarks.run_cogs --users 200 --baseline cogs.json --tolerance 1.3
+    python -m benchmarks.run_cogs --mix my_stats=6,kingdom_stats=2,dkp_leaderboard=1 --max-p95 my_stats=1500 --max-loop-lag 250
+
+Exits with status 1 when a gate fails.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.datagen import PRESETS
+from benchmarks.run_db import DEFAULT_WORK_DIR, PROJECT_ROOT, ensure_dataset, _git_revision
+from benchmarks.fakes import FakeAttachment, FakeBot, FakeChannel, FakeGuild, FakeInteraction, FakeRole, FakeUser
+
+ADMIN_ROLE_ID = 4242
+
+# command -> (cog attribute, admin only). Commands are invoked through their app_commands callback;
+# the "(autocomplete)" and fort_file entries call the cog helpers the same way discord.py would.
+COMMANDS = {
+    'my_stats': ('stats', False),
+    'my_stats (autocomplete)': ('stats', False),
+    'kingdom_stats': ('stats', False),
+    'kingdom_history': ('stats', False),
+    'unlink_account': ('stats', False),
+    'my_forts': ('forts', False),
+    'fort_leaderboard': ('forts', False),
+    'fort_file': ('forts', True),
+    'dkp_leaderboard': ('admin', False),
+    'status': ('admin', True),
+    'view_requirements': ('admin', True),
+    'check_compliance': ('admin', True),
+    'export_leaderboard': ('admin', True),
+    'export_logs': ('admin', True),
+    'list_linked_accounts': ('admin', True),
+}
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    ordered = sorted(values)
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))], 2)
+    return {'p50': pick(0.5), 'p95': pick(0.95), 'p99': pick(0.99), 'max': round(ordered[-1], 2)}
+
+
+def parse_mix(text: str) -> dict:
+    """"my_stats=6,kingdom_stats=2" -> {'my_stats': 6.0, 'kingdom_stats': 2.0} (weight defaults to 1)."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in COMMANDS:
+            raise ValueError(f"Unknown command '{name}'. Known: {', '.join(COMMANDS)}")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+def _fort_upload(players: list, rng: random.Random) -> bytes:
+    import pandas as pd
+    buf = io.BytesIO()
+    pd.DataFrame({
+        'Governor ID': [p['player_id'] for p in players],
+        'Governor Name': [p['player_name'] for p in players],
+        'Joined': [rng.randint(0, 1) for _ in players],
+        'Launched': [rng.randint(0, 1) for _ in players],
+    }).to_csv(buf, index=False)
+    return buf.getvalue()
+
+
+class LoopLagProbe:
+    """Sleeps `interval` in a loop and records how late each wake-up is (ms)."""
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, (time.perf_counter() - start - self.interval) * 1000))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+
+class LoadTest:
+    def __init__(self, args, manifest: dict):
+        self.args = args
+        self.manifest = manifest
+        self.rng = random.Random(args.seed)
+        self.results = []
+
+    async def setup(self):
+        from database import database_manager as db_manager
+        from core.audit import AuditLogWriter
+        from core.dispatcher import OutboundDispatcher
+        from core.logger import BotLogger, StubLogChannel
+        from core.tracing import record_phase
+        from modules.admin.cog import Admin
+        from modules.forts.cog import Forts
+        from modules.stats.cog import Stats
+
+        latency = self.args.api_latency
+        self.admin_role = FakeRole(ADMIN_ROLE_ID, "Admin")
+        self.guild = FakeGuild(name="Kingdom 1662", roles=[self.admin_role])
+        self.channel = FakeChannel(name="bot-commands", api_latency=latency, guild=self.guild)
+        self.bot = FakeBot(self.guild, [self.channel])
+
+        # Same wiring as MyBot.__init__ / setup_hook, with the log channel stubbed out
+        db_manager.create_tables()
+        db_manager.add_query_listener(lambda function, elapsed_ms: record_phase("db", elapsed_ms))
+        self.log_channel = StubLogChannel(latency)
+        self.bot.outbound = OutboundDispatcher(self.bot)
+        self.bot.logger = BotLogger(self.bot, channel=self.log_channel)
+        self.bot.audit = AuditLogWriter()
+        self.bot.audit.start()
+        self.bot.outbound.start()
+
+        self.cogs = {'stats': Stats(self.bot), 'forts': Forts(self.bot), 'admin': Admin(self.bot)}
+        self.season = db_manager.get_current_kvk_name()
+        self.seasons = self.manifest['seasons']
+
+        linked = db_manager.get_all_linked_accounts_full()
+        self.member_ids = sorted({a['discord_id'] for a in linked})
+        self.fort_players = db_manager.get_all_kingdom_players(self.season)[:500]
+
+    async def teardown(self):
+        self.cogs['admin'].cog_unload()
+        await self.bot.logger.close()
+        await self.bot.audit.close()
+        await self.bot.outbound.close()
+
+    def _user(self, admin: bool) -> FakeUser:
+        if admin:
+            return FakeUser(1, "admin", roles=[self.admin_role])
+        if self.member_ids and self.rng.random() >= self.args.unlinked_ratio:
+            return FakeUser(self.rng.choice(self.member_ids))
+        return FakeUser(self.rng.randint(10**17, 10**18))
+
+    def _invocation(self, command: str, interaction: FakeInteraction):
+        """Coroutine that runs `command` the way the command tree would."""
+        stats, forts, admin = self.cogs['stats'], self.cogs['forts'], self.cogs['admin']
+        season_arg = self.rng.choice(self.seasons) if self.rng.random() < self.args.archived_ratio else None
+        if command == 'my_stats':
+            return stats.my_stats.callback(stats, interaction, season=season_arg)
+        if command == 'my_stats (autocomplete)':
+            return stats.my_stats_season_autocomplete(interaction, self.rng.choice(['', 'syn', '2022', 'kvk']))
+        if command == 'kingdom_stats':
+            return stats.kingdom_stats.callback(stats, interaction, season=season_arg)
+        if command == 'kingdom_history':
+            return stats.kingdom_history.callback(stats, interaction, seasons=5)
+        if command == 'unlink_account':
+            return stats.unlink_account.callback(stats, interaction)
+        if command == 'my_forts':
+            return forts.my_forts.callback(forts, interaction)
+        if command == 'fort_leaderboard':
+            return forts.fort_leaderboard.callback(forts, interaction)
+        if command == 'fort_file':
+            attachment = FakeAttachment("forts.csv", _fort_upload(self.fort_players, self.rng), self.args.api_latency)
+            return forts.process_fort_file(attachment, self.season)
+        if command == 'dkp_leaderboard':
+            return admin.dkp_leaderboard.callback(admin, interaction, season=season_arg)
+        if command == 'export_logs':
+            return admin.export_logs.callback(admin, interaction, compress=True)
+        return getattr(admin, command).callback(admin, interaction)
+
+    async def _run_one(self, command: str, semaphore: asyncio.Semaphore, delay: float):
+        from core.tracing import start_trace, finish_trace
+
+        await asyncio.sleep(delay)
+        admin = COMMANDS[command][1]
+        # Created on arrival: time spent waiting for a slot counts against the 3 s ack deadline
+        interaction = FakeInteraction(self._user(admin), self.guild, self.channel, command,
+                                      namespace={'season': None, 'period': None}, api_latency=self.args.api_latency)
+        async with semaphore:
+            token = start_trace(command)
+            error = None
+            try:
+                await self._invocation(command, interaction)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                finish_trace(token, error=error is not None)
+        self.results.append({
+            'command': command,
+            'total_ms': (time.perf_counter() - interaction.created) * 1000,
+            'ack_ms': interaction.ack_seconds * 1000 if interaction.ack_seconds is not None else None,
+            'expired': interaction.expired and not command.endswith('(autocomplete)') and command != 'fort_file',
+            'error': error,
+            'messages': len(interaction.sent)
+        })
+
+    async def run(self) -> dict:
+        from core.tracing import clear_traces, get_latency_report
+
+        await self.setup()
+        mix = self.args.mix
+        names, weights = list(mix), list(mix.values())
+        plan = [self.rng.choices(names, weights)[0] for _ in range(self.args.users)]
+        delays = [self.rng.uniform(0, self.args.ramp) if self.args.ramp else 0.0 for _ in plan]
+        semaphore = asyncio.Semaphore(self.args.concurrency or len(plan) or 1)
+
+        # Warm-up (imports, first DB page reads, matplotlib font cache) is not measured
+        await asyncio.gather(*(self._run_one(name, semaphore, 0.0) for name in names))
+        self.results.clear()
+        clear_traces()
+
+        probe = LoopLagProbe()
+        probe.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(self._run_one(name, semaphore, delay) for name, delay in zip(plan, delays)))
+        wall = time.perf_counter() - started
+        probe.stop()
+
+        phases = {r['command']: r['phases'] for r in get_latency_report()}
+        commands = {}
+        for name in names:
+            items = [r for r in self.results if r['command'] == name]
+            errors = [r['error'] for r in items if r['error']]
+            commands[name] = {
+                'count': len(items),
+                'errors': len(errors),
+                'first_error': errors[0] if errors else None,
+                'expired': sum(1 for r in items if r['expired']),
+                'latency_ms': _percentiles([r['total_ms'] for r in items]),
+                'ack_ms': _percentiles([r['ack_ms'] for r in items if r['ack_ms'] is not None]),
+                'handler_phases_ms': {p: {'p50': round(v[0], 2), 'p95': round(v[1], 2)} for p, v in phases.get(name, {}).items()},
+            }
+        await self.teardown()
+        return {
+            'wall_seconds': round(wall, 3),
+            'throughput_per_s': round(len(plan) / wall, 2) if wall else None,
+            'loop_lag_ms': _percentiles(probe.samples),
+            'log_channel_messages': len(self.log_channel.messages),
+            'commands': commands
+        }
+
+
+def check_gates(report: dict, args) -> list:
+    """Returns a list of gate failures (empty when everything passed)."""
+    failures = []
+    for name, limit in args.max_p95.items():
+        p95 = report['commands'].get(name, {}).get('latency_ms', {}).get('p95')
+        if p95 is not None and p95 > limit:
+            failures.append(f"{name}: p95 {p95:.0f} ms > {limit:.0f} ms")
+    if args.max_loop_lag is not None and report['loop_lag_ms']['p95'] > args.max_loop_lag:
+        failures.append(f"event loop lag p95 {report['loop_lag_ms']['p95']:.0f} ms > {args.max_loop_lag:.0f} ms")
+    for name, stats in report['commands'].items():
+        if stats['errors']:
+            failures.append(f"{name}: {stats['errors']} errors ({stats['first_error']})")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for name, stats in report['commands'].items():
+            before = baseline.get('commands', {}).get(name)
+            if not before:
+                continue
+            limit = before['latency_ms']['p95'] * args.tolerance
+            if stats['latency_ms']['p95'] > limit:
+                failures.append(f"{name}: p95 {stats['latency_ms']['p95']:.0f} ms > {args.tolerance:g}x baseline ({before['latency_ms']['p95']:.0f} ms)")
+    return failures
+
+
+def _parse_limits(values) -> dict:
+    limits = {}
+    for value in values or []:
+        name, _, ms = value.rpartition('=')
+        limits[name] = float(ms)
+    return limits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test of the slash command cogs.")
+    parser.add_argument('--preset', choices=list(PRESETS), default='small', help="Synthetic dataset size")
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR)
+    parser.add_argument('--users', type=int, default=200, help="Number of command invocations")
+    parser.add_argument('--mix', default='my_stats', help="Weighted commands, e.g. my_stats=6,kingdom_stats=2")
+    parser.add_argument('--concurrency', type=int, default=0, help="Max handlers in flight (0 = unlimited, like discord.py)")
+    parser.add_argument('--ramp', type=float, default=0.0, help="Spread arrivals over this many seconds")
+    parser.add_argument('--api-latency', type=float, default=0.05, help="Simulated Discord API round trip (s)")
+    parser.add_argument('--unlinked-ratio', type=float, default=0.05, help="Share of members without linked accounts")
+    parser.add_argument('--archived-ratio', type=float, default=0.1, help="Share of invocations asking for an archived season")
+    parser.add_argument('--seed', type=int, default=1662)
+    parser.add_argument('--output', help="Write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', help="Earlier report; fail if a command's p95 grew beyond --tolerance")
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    parser.add_argument('--max-p95', action='append', metavar='COMMAND=MS', help="Fail if COMMAND's p95 exceeds MS")
+    parser.add_argument('--max-loop-lag', type=float, metavar='MS', help="Fail if event loop lag p95 exceeds MS")
+    args = parser.parse_args(argv)
+    try:
+        args.mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    args.max_p95 = _parse_limits(args.max_p95)
+
+    dataset = ensure_dataset(args.work_dir, args.preset, args.seed)
+    scratch = os.path.join(args.work_dir, f"{args.preset}-cogs")
+    shutil.rmtree(scratch, ignore_errors=True)
+    os.makedirs(scratch)
+    shutil.copyfile(os.path.join(dataset, 'kvk_data.db'), os.path.join(scratch, 'kvk_data.db'))
+    with open(os.path.join(dataset, 'manifest.json')) as f:
+        manifest = json.load(f)
+
+    # Must happen before the database package is imported
+    os.environ['DATA_PATH'] = scratch
+    os.environ['ADMIN_ROLE_IDS'] = str(ADMIN_ROLE_ID)
+    os.environ.setdefault('LOOP_WATCHDOG', '0')
+    sys.path.insert(0, PROJECT_ROOT)
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('discord_bot').setLevel(logging.ERROR)
+
+    report = asyncio.run(LoadTest(args, manifest).run())
+    report = {
+        'commit': _git_revision(),
+        'timestamp': datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'dataset': manifest['config'],
+        'config': {'users': args.users, 'mix': args.mix, 'concurrency': args.concurrency, 'ramp': args.ramp,
+                   'api_latency': args.api_latency, 'unlinked_ratio': args.unlinked_ratio,
+                   'archived_ratio': args.archived_ratio, 'seed': args.seed},
+        **report
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failures = check_gates(report, args)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    shutil.rmtree(scratch, ignore_errors=True)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
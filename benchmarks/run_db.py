@@ -0,0 +1,372 @@
+"""
+Times every public function exported by the database package against synthetic
+databases of several sizes and writes the results as JSON, so runs from different
+commits can be compared.
+
+    python -m benchmarks.run_db --sizes tiny small medium --output bench_db.json
+
+Generated datasets are cached per size and seed in --work-dir. Each size runs in its own
+subprocess because database.DATABASE_PATH is fixed when the package is imported. Read-only
+functions run against the dataset as-is; functions that modify data get a fresh copy of the
+dataset before every run (the copy is not timed).
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.datagen import PRESETS
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_WORK_DIR = os.path.join(PROJECT_ROOT, 'data', 'benchmarks')
+
+READ = 'read'
+WRITE = 'write'
+# Written by the parent into the worker's DATA_PATH; the worker refuses to wipe any other directory
+SCRATCH_MARKER = '.benchmark_scratch'
+
+
+def _xlsx_from_rows(rows: list) -> bytes:
+    import pandas as pd
+    buf = io.BytesIO()
+    pd.DataFrame(rows).to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+def _snapshot_upload(db, m):
+    rows = db.get_snapshot_data(m['current_season'], m['periods'][-1], 'end').values()
+    return _xlsx_from_rows([{
+        'Governor ID': r['player_id'], 'Governor Name': r['player_name'], 'Power': r['power'],
+        'Kill Points': r['kill_points'], 'Dead': r['deaths'], 'T1 Kills': r['t1_kills'], 'T2 Kills': r['t2_kills'],
+        'T3 Kills': r['t3_kills'], 'T4 Kills': r['t4_kills'], 'T5 Kills': r['t5_kills']
+    } for r in rows])
+
+
+def _requirements_upload(db, m):
+    return _xlsx_from_rows([{
+        'Min Power': r['min_power'], 'Max Power': r['max_power'],
+        'Required Kills': r['required_kills'], 'Required Deaths': r['required_deaths']
+    } for r in db.get_all_requirements(m['current_season'])])
+
+
+def _kingdom_players_upload(db, m):
+    return _xlsx_from_rows([{
+        'Governor ID': p['player_id'], 'Governor Name': p['player_name'], 'Power': p['power']
+    } for p in db.get_all_kingdom_players(m['current_season'])])
+
+
+def _fort_stats(db, m):
+    return [{
+        'player_id': p['player_id'], 'player_name': p['player_name'],
+        'forts_joined': 10, 'forts_launched': 3, 'total_forts': 13, 'penalties': 0,
+        'kvk_name': m['current_season']
+    } for p in db.get_all_kingdom_players(m['current_season'])]
+
+
+def _period_results(db, m):
+    season, period = m['current_season'], m['periods'][-1]
+    return [dict(r, kvk_name=season, period_key=period) for r in db.get_snapshot_data(season, period, 'end').values()]
+
+
+def _linked_pair(db, m):
+    discord_id = m['discord_ids'][0]
+    return discord_id, db.get_linked_accounts(discord_id)[0]['player_id']
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _consume(iterable):
+    for _ in iterable:
+        pass
+
+
+def _cases(m: dict) -> dict:
+    """
+    name -> (kind, build) where build(db) returns the callable to time (built untimed, per run).
+    A (None, reason) entry documents why a function is not benchmarked.
+    """
+    season, period, pid = m['current_season'], m['periods'][-1], m['player_ids'][0]
+    pids = m['player_ids']
+    fort_period = m['fort_periods'][0] if m['fort_periods'] else 'total'
+
+    def call(name, *args, **kwargs):
+        return lambda db: (lambda: getattr(db, name)(*args, **kwargs))
+
+    def cold(name, *args):
+        # Season lookups are cached in-process; time the database path
+        def build(db):
+            db.clear_season_cache()
+            return lambda: getattr(db, name)(*args)
+        return build
+
+    return {
+        # base
+        'get_connection': (None, "connection factory; cost is included in every other function"),
+        'open_upload': (None, "helper for upload parsing; covered by the import_* functions"),
+        'get_query_stats': (None, "instrumentation"),
+        'reset_query_stats': (None, "instrumentation"),
+        'add_query_listener': (None, "instrumentation"),
+        'backup_database': (WRITE, call('backup_database')),
+        'restore_database': (WRITE, lambda db: (lambda data: lambda: db.restore_database(data))(_read_bytes(db.DATABASE_PATH))),
+        'create_tables': (WRITE, call('create_tables')),
+        # kvk
+        'import_snapshot': (WRITE, lambda db: (lambda data: lambda: db.import_snapshot(data, season, 'period_bench', 'end'))(_snapshot_upload(db, m))),
+        'import_requirements': (WRITE, lambda db: (lambda data: lambda: db.import_requirements(data, season))(_requirements_upload(db, m))),
+        'get_snapshot_data': (READ, call('get_snapshot_data', season, period, 'end')),
+        'get_snapshot_columns': (READ, call('get_snapshot_columns', season, period, 'end')),
+        'save_period_results': (WRITE, lambda db: (lambda rows: lambda: db.save_period_results(rows))(_period_results(db, m))),
+        'get_requirements': (READ, call('get_requirements', season, 60_000_000)),
+        'get_all_requirements': (READ, call('get_all_requirements', season)),
+        'save_requirements_batch': (WRITE, lambda db: (lambda reqs: lambda: db.save_requirements_batch(season, reqs))(db.get_all_requirements(season))),
+        'set_kvk_dates': (WRITE, call('set_kvk_dates', season, '2030-01-01', '2030-03-01')),
+        'archive_kvk_data': (WRITE, call('archive_kvk_data', season, f"{season} (bench)")),
+        'get_all_seasons': (READ, cold('get_all_seasons')),
+        'get_played_seasons': (READ, cold('get_played_seasons')),
+        'delete_kvk_season': (WRITE, call('delete_kvk_season', m['seasons'][0])),
+        'rename_kvk_season': (WRITE, call('rename_kvk_season', m['seasons'][0], 'Renamed (bench)')),
+        'seed_seasons': (WRITE, call('seed_seasons', [{'value': 'bench', 'label': 'Bench'}])),
+        'create_kvk_season': (WRITE, call('create_kvk_season', 'Bench KvK', '2030-01-01', '2030-03-01', make_active=True, copy_global_reqs=True)),
+        'get_current_kvk_name': (READ, cold('get_current_kvk_name')),
+        'set_current_kvk_name': (WRITE, call('set_current_kvk_name', m['seasons'][0])),
+        'get_player_stats_by_period': (READ, call('get_player_stats_by_period', pid, season, 'all')),
+        'get_kingdom_stats_by_period': (READ, call('get_kingdom_stats_by_period', season, 'all')),
+        'get_all_periods': (READ, call('get_all_periods', season)),
+        'get_all_kvk_stats': (READ, call('get_all_kvk_stats', season)),
+        'get_player_start_snapshot': (READ, call('get_player_start_snapshot', pid, season)),
+        'get_total_stats_for_players': (READ, call('get_total_stats_for_players', pids, season)),
+        'get_kingdom_start_snapshot': (READ, call('get_kingdom_start_snapshot', season)),
+        'get_kingdom_aggregate': (READ, call('get_kingdom_aggregate', season, period, 'start')),
+        'get_seasons_with_results': (READ, call('get_seasons_with_results')),
+        'get_snapshot_player_data': (READ, call('get_snapshot_player_data', season, period, 'end', pid)),
+        'get_player_rank': (READ, call('get_player_rank', pid, season)),
+        'get_player_stats': (READ, call('get_player_stats', pid, season, period)),
+        'get_player_stats_history': (READ, call('get_player_stats_history', pid, season)),
+        'get_total_player_stats': (READ, call('get_total_player_stats', pid, season)),
+        'get_kingdom_stats': (READ, call('get_kingdom_stats', season)),
+        'delete_snapshot': (WRITE, call('delete_snapshot', season, period, 'end')),
+        'clear_season_cache': (READ, call('clear_season_cache')),
+        'get_cache_stats': (READ, call('get_cache_stats')),
+        'invalidate_active_season': (READ, call('invalidate_active_season')),
+        'get_active_season_stats': (READ, call('get_active_season_stats')),
+        'get_player_cross_kvk_stats': (READ, call('get_player_cross_kvk_stats', pid, m['seasons'])),
+        'get_kingdom_cross_kvk_stats': (READ, call('get_kingdom_cross_kvk_stats', m['seasons'])),
+        # forts
+        'import_fort_stats': (WRITE, lambda db: (lambda stats: lambda: db.import_fort_stats(stats, "Week Bench"))(_fort_stats(db, m))),
+        'get_fort_periods': (READ, call('get_fort_periods', season)),
+        'get_player_fort_stats_history': (READ, call('get_player_fort_stats_history', pid, season)),
+        'get_fort_leaderboard': (READ, call('get_fort_leaderboard', season, 'total')),
+        'get_fort_stats_for_players': (READ, call('get_fort_stats_for_players', pids, season)),
+        'get_player_fort_stats': (READ, call('get_player_fort_stats', pid, season)),
+        'get_fort_seasons': (READ, call('get_fort_seasons')),
+        'get_fort_stats': (READ, call('get_fort_stats', pid, season)),
+        'clear_all_fort_data': (WRITE, call('clear_all_fort_data')),
+        'delete_fort_period': (WRITE, call('delete_fort_period', season, fort_period)),
+        'rebuild_fort_aggregates': (WRITE, call('rebuild_fort_aggregates')),
+        'get_latest_fort_activity': (READ, call('get_latest_fort_activity')),
+        'get_fort_last_updated': (READ, call('get_fort_last_updated', season)),
+        # players
+        'import_kingdom_players': (WRITE, lambda db: (lambda data: lambda: db.import_kingdom_players(data, season))(_kingdom_players_upload(db, m))),
+        'get_kingdom_player': (READ, call('get_kingdom_player', pid, season)),
+        'get_player': (READ, call('get_player', pid)),
+        'search_players': (READ, lambda db: (lambda: [db.search_players(q) for q in m['name_queries']])),
+        'get_all_kingdom_players': (READ, call('get_all_kingdom_players', season)),
+        'delete_player': (WRITE, call('delete_player', pid)),
+        'link_account': (WRITE, call('link_account', 1, pid, 'main')),
+        'get_linked_accounts': (READ, call('get_linked_accounts', m['discord_ids'][0])),
+        'get_all_linked_accounts_full': (READ, call('get_all_linked_accounts_full')),
+        'unlink_account': (WRITE, lambda db: (lambda pair: lambda: db.unlink_account(*pair))(_linked_pair(db, m))),
+        'add_new_player': (WRITE, call('add_new_player', 1, 'Bench Player', 50_000_000, season)),
+        'get_all_players_global': (READ, call('get_all_players_global')),
+        'get_players_page': (READ, call('get_players_page')),
+        'count_players_global': (READ, call('count_players_global')),
+        'set_player_type': (WRITE, call('set_player_type', pid, 'farm')),
+        'get_player_type': (READ, call('get_player_type', pid)),
+        'get_all_player_types': (READ, call('get_all_player_types')),
+        # admin
+        'log_admin_action': (WRITE, call('log_admin_action', 1, 'bench', 'Benchmark', 'details')),
+        'log_admin_actions': (WRITE, call('log_admin_actions', [(1, 'bench', 'Benchmark', f"detail {i}", '2030-01-01 00:00:00') for i in range(1000)])),
+        'set_reward_role': (WRITE, call('set_reward_role', 1)),
+        'get_reward_role': (READ, call('get_reward_role')),
+        'get_global_setting': (READ, call('get_global_setting', 'requirements')),
+        'set_global_setting': (WRITE, call('set_global_setting', 'bench', 'value')),
+        'get_global_requirements': (READ, call('get_global_requirements')),
+        'set_global_requirements': (WRITE, call('set_global_requirements', json.dumps([{'min_power': 0, 'max_power': 10**9, 'required_kills': 1, 'required_deaths': 1}]))),
+        'get_global_requirements_as_list': (READ, call('get_global_requirements_as_list')),
+        'set_global_requirements_from_file': (WRITE, lambda db: (lambda data: lambda: db.set_global_requirements_from_file(data))(_requirements_upload(db, m))),
+        'reset_all_data': (WRITE, call('reset_all_data')),
+        'set_last_updated': (WRITE, call('set_last_updated', season, period)),
+        'get_last_updated': (READ, call('get_last_updated', season, period)),
+        'get_dkp_formula': (READ, call('get_dkp_formula')),
+        'set_dkp_formula': (WRITE, call('set_dkp_formula', 10, 30, 80)),
+        'get_all_admin_logs': (READ, call('get_all_admin_logs')),
+        'iter_admin_logs': (READ, lambda db: (lambda: _consume(db.iter_admin_logs()))),
+        'count_admin_logs': (READ, call('count_admin_logs')),
+        'write_admin_logs_csv': (READ, lambda db: (lambda: db.write_admin_logs_csv(io.BytesIO(), compress=True))),
+        'archive_admin_logs': (WRITE, call('archive_admin_logs', '2024-03-01 00:00:00')),
+    }
+
+
+def _public_functions(db) -> list:
+    import inspect
+    return sorted(name for name, obj in vars(db).items() if not name.startswith('_') and inspect.isfunction(obj))
+
+
+def _restore(pristine_db: str, db):
+    """Puts a fresh copy of the dataset in place (and drops files earlier write runs created)."""
+    for name in os.listdir(db.DATA_DIR):
+        path = os.path.join(db.DATA_DIR, name)
+        if os.path.isfile(path) and name != SCRATCH_MARKER:
+            os.remove(path)
+    shutil.copyfile(pristine_db, db.DATABASE_PATH)
+    # Cached datasets may predate the current schema; migrate the copy as the bot does at startup
+    db.create_tables()
+    db.clear_season_cache()
+    db.invalidate_active_season()
+
+
+def _summary(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0], 3),
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 3),
+        'max_ms': round(ordered[-1], 3)
+    }
+
+
+def run_worker(pristine_dir: str, read_runs: int, write_runs: int, only: list = None) -> dict:
+    """Benchmarks all functions in this process; DATA_PATH must point at an empty scratch directory."""
+    import logging
+    logging.disable(logging.CRITICAL)
+    import database as db
+
+    if not os.path.exists(os.path.join(db.DATA_DIR, SCRATCH_MARKER)):
+        raise SystemExit(f"{db.DATA_DIR} is not a benchmark scratch directory")
+    with open(os.path.join(pristine_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    pristine_db = os.path.join(pristine_dir, 'kvk_data.db')
+    cases = _cases(manifest)
+    public = _public_functions(db)
+
+    results, skipped = {}, {}
+    missing = [name for name in public if name not in cases]
+    _restore(pristine_db, db)
+    for name in public:
+        if name not in cases or (only and name not in only):
+            continue
+        kind, build = cases[name]
+        if kind is None:
+            skipped[name] = build
+            continue
+        samples = []
+        runs = read_runs if kind == READ else write_runs
+        for i in range(runs + (1 if kind == READ else 0)):
+            if kind == WRITE:
+                _restore(pristine_db, db)
+            fn = build(db)
+            start = time.perf_counter()
+            fn()
+            elapsed = (time.perf_counter() - start) * 1000
+            if kind == READ and i == 0:
+                continue  # warm-up (page cache, imports)
+            samples.append(elapsed)
+        results[name] = dict(_summary(samples), kind=kind)
+        if kind == WRITE:
+            _restore(pristine_db, db)
+
+    return {'functions': results, 'skipped': skipped, 'missing_cases': missing,
+            'db_size_bytes': os.path.getsize(pristine_db)}
+
+
+def ensure_dataset(work_dir: str, size: str, seed: int) -> str:
+    """Generates the dataset for a preset unless it is already cached. Returns its directory."""
+    directory = os.path.join(work_dir, f"{size}-seed{seed}")
+    if os.path.exists(os.path.join(directory, 'manifest.json')):
+        return directory
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)  # partial run
+    print(f"Generating {size} dataset in {directory} ...", file=sys.stderr)
+    subprocess.run([sys.executable, '-m', 'benchmarks.datagen', '--data-dir', directory,
+                    '--preset', size, '--seed', str(seed)], cwd=PROJECT_ROOT, check=True,
+                   stdout=subprocess.DEVNULL)
+    return directory
+
+
+def _git_revision() -> str:
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=PROJECT_ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{rev}-dirty" if dirty else rev
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the public database functions on synthetic data.")
+    parser.add_argument('--sizes', nargs='+', choices=list(PRESETS), default=['tiny', 'small', 'medium'])
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR, help="Cache for generated datasets and scratch copies")
+    parser.add_argument('--output', help="JSON output path (default: stdout)")
+    parser.add_argument('--read-runs', type=int, default=10)
+    parser.add_argument('--write-runs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1662)
+    parser.add_argument('--only', nargs='+', help="Only benchmark these functions")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        json.dump(run_worker(args.worker, args.read_runs, args.write_runs, args.only), sys.stdout)
+        return
+
+    report = {
+        'commit': _git_revision(),
+        'timestamp': datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'read_runs': args.read_runs,
+        'write_runs': args.write_runs,
+        'sizes': {}
+    }
+    for size in args.sizes:
+        dataset = ensure_dataset(args.work_dir, size, args.seed)
+        scratch = os.path.join(args.work_dir, f"{size}-scratch")
+        shutil.rmtree(scratch, ignore_errors=True)
+        os.makedirs(scratch)
+        open(os.path.join(scratch, SCRATCH_MARKER), 'w').close()
+        cmd = [sys.executable, '-m', 'benchmarks.run_db', '--worker', dataset,
+               '--read-runs', str(args.read_runs), '--write-runs', str(args.write_runs)]
+        if args.only:
+            cmd += ['--only', *args.only]
+        print(f"Benchmarking {size} ...", file=sys.stderr)
+        out = subprocess.run(cmd, cwd=PROJECT_ROOT, env=dict(os.environ, DATA_PATH=scratch),
+                             capture_output=True, text=True, check=True).stdout
+        with open(os.path.join(dataset, 'manifest.json')) as f:
+            config = json.load(f)['config']
+        report['sizes'][size] = dict(json.loads(out), config=config)
+        shutil.rmtree(scratch, ignore_errors=True)
+        if report['sizes'][size]['missing_cases']:
+            print(f"No benchmark case for: {', '.join(report['sizes'][size]['missing_cases'])}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
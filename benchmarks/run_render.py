@@ -0,0 +1,226 @@
+"""
+Rendering benchmark for core.graphics.
+
+Times each chart function on representative inputs and records wall time, CPU time,
+peak RSS and output size. Every function runs in three ways:
+
+    inprocess  direct call on the calling thread (what the cogs do today)
+    thread     through a single dedicated render thread (pyplot is not thread-safe)
+    process    through a warm ProcessPoolExecutor (--workers), plus batch throughput
+
+Each (function, mode) pair runs in a fresh subprocess so peak RSS is per pair and the
+first (cold) call, which pays for font loading and caches, is reported separately.
+
+    python -m benchmarks.run_render --runs 10 --output render.json
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.run_db import PROJECT_ROOT, _git_revision
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MODES = ('inprocess', 'thread', 'process')
+
+
+def _season_history(n: int) -> list:
+    kp, deaths = 80_000_000, 3_000_000
+    history = []
+    for i in range(n):
+        kp += 25_000_000 + i * 1_500_000
+        deaths += 900_000 + i * 40_000
+        history.append({'period_key': f"Season {i + 1:02d}", 'kill_points': kp, 'deaths': deaths, 'power': 95_000_000})
+    return history
+
+
+def _kingdom_history(n: int) -> list:
+    return [
+        {'label': f"Season {i + 1:02d}", 'kill_points': 4_000_000_000 + i * 350_000_000,
+         'deaths': 150_000_000 + i * 9_000_000, 'power': 9_500_000_000 + i * 120_000_000}
+        for i in range(n)
+    ]
+
+
+def _fort_history(n: int) -> list:
+    return [
+        {'period_label': f"Week {i + 1}", 'total_forts': 20 + (i * 7) % 25,
+         'forts_joined': 15 + (i * 5) % 20, 'forts_launched': 5 + (i * 3) % 6}
+        for i in range(n)
+    ]
+
+
+# function -> {case: args}; sizes follow what /my_stats, /my_forts and /kingdom_history render
+CASES = {
+    'create_player_stats_card': {
+        'typical': (12_400_000, 15_000_000, 1_350_000, 1_200_000, "Zenkaro12"),
+        'long_name': (3_100_000, 9_000_000, 410_000, 800_000, "ᴷᴰ1662 Dragonslayer of the North"),
+    },
+    'create_player_dynamics_chart': {
+        '3_seasons': (_season_history(3), "Zenkaro12"),
+        '20_seasons': (_season_history(20), "Zenkaro12"),
+    },
+    'create_fort_dynamics_chart': {
+        '4_periods': (_fort_history(4), "Zenkaro12"),
+        '12_periods': (_fort_history(12), "Zenkaro12"),
+    },
+    'create_kingdom_history_chart': {
+        '5_seasons': (_kingdom_history(5), "Kingdom History"),
+        '10_seasons': (_kingdom_history(10), "Kingdom History"),
+    },
+    'create_progress_gif': {
+        'half': (7_500_000, 15_000_000),
+    },
+}
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+def _render(function: str, case: str) -> dict:
+    """Renders one case in the current process. Top-level so the process pool can pickle it."""
+    from core import graphics
+    func = getattr(graphics, function)
+    args = CASES[function][case]
+    cpu = time.process_time()
+    start = time.perf_counter()
+    buf = func(*args)
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    if buf is None:
+        raise RuntimeError(f"{function}({case}) returned None")
+    return {'wall_ms': wall * 1000, 'cpu_ms': cpu * 1000, 'bytes': len(buf.getvalue()), 'peak_rss_mb': _peak_rss_mb()}
+
+
+def _summary(values: list) -> dict:
+    ordered = sorted(values)
+    return {
+        'min': round(ordered[0], 2),
+        'median': round(statistics.median(ordered), 2),
+        'p95': round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 2)
+    }
+
+
+def run_worker(function: str, mode: str, runs: int, workers: int) -> dict:
+    """Benchmarks every case of one function in one mode (run in a fresh process)."""
+    import logging
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    sys.path.insert(0, PROJECT_ROOT)
+
+    if mode == 'inprocess':
+        executor = None
+        submit = lambda case: _render(function, case)
+    elif mode == 'thread':
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="render")
+        submit = lambda case: executor.submit(_render, function, case).result()
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        submit = lambda case: executor.submit(_render, function, case).result()
+
+    results = {}
+    try:
+        for case in CASES[function]:
+            start = time.perf_counter()
+            first = submit(case)
+            first_call_ms = (time.perf_counter() - start) * 1000
+            if mode == 'process':
+                # Warm the remaining workers so later samples are steady state
+                list(executor.map(_render, [function] * (workers - 1), [case] * (workers - 1)))
+
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                inner = submit(case)
+                inner['caller_ms'] = (time.perf_counter() - start) * 1000
+                samples.append(inner)
+
+            entry = {
+                'first_call_ms': round(first_call_ms, 2),
+                # Render-side cost of that cold call (imports, font cache) without dispatch overhead
+                'first_call': {'wall_ms': round(first['wall_ms'], 2), 'cpu_ms': round(first['cpu_ms'], 2), 'bytes': first['bytes']},
+                # caller_ms includes dispatch / pickling for the pooled modes
+                'caller_ms': _summary([s['caller_ms'] for s in samples]),
+                'wall_ms': _summary([s['wall_ms'] for s in samples]),
+                'cpu_ms': _summary([s['cpu_ms'] for s in samples]),
+                'bytes': samples[-1]['bytes'],
+                'peak_rss_mb': max((s['peak_rss_mb'] or 0) for s in samples) or None,
+            }
+            if mode != 'process':
+                entry['peak_rss_mb'] = _peak_rss_mb()
+            else:
+                batch = workers * 4
+                start = time.perf_counter()
+                list(executor.map(_render, [function] * batch, [case] * batch))
+                entry['batch_renders_per_s'] = round(batch / (time.perf_counter() - start), 2)
+                entry['workers'] = workers
+            results[case] = entry
+    finally:
+        if executor:
+            executor.shutdown()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the chart functions in core.graphics.")
+    parser.add_argument('--functions', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--runs', type=int, default=10, help="Timed renders per case (after the cold call)")
+    parser.add_argument('--workers', type=int, default=2, help="Process pool size for the 'process' mode")
+    parser.add_argument('--output', help="JSON output path (default: stdout)")
+    parser.add_argument('--worker', nargs=2, metavar=('FUNCTION', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        json.dump(run_worker(args.worker[0], args.worker[1], args.runs, args.workers), sys.stdout)
+        return
+
+    import matplotlib
+    import PIL
+    report = {
+        'commit': _git_revision(),
+        'timestamp': datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'python': platform.python_version(),
+        'matplotlib': matplotlib.__version__,
+        'pillow': PIL.__version__,
+        'cpu_count': os.cpu_count(),
+        'runs': args.runs,
+        'functions': {}
+    }
+    for function in args.functions:
+        report['functions'][function] = {}
+        for mode in args.modes:
+            print(f"Rendering {function} ({mode}) ...", file=sys.stderr)
+            out = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.run_render', '--worker', function, mode,
+                 '--runs', str(args.runs), '--workers', str(args.workers)],
+                cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+            ).stdout
+            for case, entry in json.loads(out).items():
+                report['functions'][function].setdefault(case, {})[mode] = entry
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
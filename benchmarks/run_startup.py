@@ -0,0 +1,118 @@
+"""
+Startup import benchmark.
+
+Runs `python -X importtime` on what the bot imports before it can connect (main.py plus
+the extensions it loads) in fresh interpreters, and reports total import time, the most
+expensive top-level packages and whether any heavy dependency (pandas, numpy, matplotlib,
+PIL) was imported at startup instead of on first use.
+
+    python -m benchmarks.run_startup --runs 5 --output startup.json
+    python -m benchmarks.run_startup --fail-on-heavy --max-import-ms 800
+
+Exits with status 1 when a gate fails.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.run_db import PROJECT_ROOT, _git_revision
+
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'PIL', 'openpyxl')
+STARTUP_CODE = "import main, modules.admin, modules.stats, modules.forts"
+
+
+def parse_importtime(stderr: str) -> list:
+    """`-X importtime` output -> [(module, self_us, cumulative_us, depth)] in import order."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # header
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def measure_once() -> dict:
+    with tempfile.TemporaryDirectory() as data_dir:
+        # main.py builds the bot at import (and creates the schema), so give it a scratch DB
+        env = dict(os.environ, DATA_PATH=data_dir, PYTHONDONTWRITEBYTECODE='1')
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+                              cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+        wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup import failed:\n{proc.stderr[-2000:]}")
+
+    entries = parse_importtime(proc.stderr)
+    packages = {}
+    for name, self_us, _, _ in entries:
+        root = name.split('.')[0]
+        packages[root] = packages.get(root, 0) + self_us
+    return {
+        'wall_ms': wall_ms,
+        'import_ms': sum(cum for _, _, cum, depth in entries if depth == 0) / 1000,
+        'modules': len(entries),
+        'packages_ms': {k: v / 1000 for k, v in packages.items()},
+        'heavy': sorted({name.split('.')[0] for name, *_ in entries} & set(HEAVY_MODULES)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the bot's startup import time.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="Number of packages listed by self time")
+    parser.add_argument('--output', help="JSON output path (default: stdout)")
+    parser.add_argument('--fail-on-heavy', action='store_true', help=f"Fail if any of {', '.join(HEAVY_MODULES)} is imported at startup")
+    parser.add_argument('--max-import-ms', type=float, help="Fail if the median import time exceeds this")
+    args = parser.parse_args(argv)
+
+    runs = [measure_once() for _ in range(args.runs)]
+    packages = {}
+    for run in runs:
+        for name, ms in run['packages_ms'].items():
+            packages.setdefault(name, []).append(ms)
+    top = sorted(((name, statistics.median(v)) for name, v in packages.items()), key=lambda x: x[1], reverse=True)
+
+    report = {
+        'commit': _git_revision(),
+        'timestamp': datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'python': platform.python_version(),
+        'code': STARTUP_CODE,
+        'runs': args.runs,
+        'import_ms': {'median': round(statistics.median(r['import_ms'] for r in runs), 1),
+                      'min': round(min(r['import_ms'] for r in runs), 1)},
+        'process_wall_ms': {'median': round(statistics.median(r['wall_ms'] for r in runs), 1),
+                            'min': round(min(r['wall_ms'] for r in runs), 1)},
+        'modules_imported': runs[-1]['modules'],
+        'heavy_modules_at_startup': runs[-1]['heavy'],
+        'top_packages_ms': {name: round(ms, 1) for name, ms in top[:args.top]},
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failures = []
+    if args.fail_on_heavy and report['heavy_modules_at_startup']:
+        failures.append(f"heavy modules imported at startup: {', '.join(report['heavy_modules_at_startup'])}")
+    if args.max_import_ms is not None and report['import_ms']['median'] > args.max_import_ms:
+        failures.append(f"median import time {report['import_ms']['median']:.0f} ms > {args.max_import_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from database import database_manager as db_manager
+
+logger = logging.getLogger('discord_bot.core.audit')
+
+# Flush cadence and memory bound for the audit queue
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 1.0))
+AUDIT_QUEUE_MAX = int(os.getenv('AUDIT_QUEUE_MAX', 10000))
+AUDIT_BATCH_SIZE = 500
+
+
+class AuditLogWriter:
+    """
+    Buffers admin_logs writes in memory and flushes them in batches from a background task.
+    log() waits when the queue is full (backpressure); close() drains whatever is left.
+    """
+    def __init__(self, flush_interval: float = AUDIT_FLUSH_INTERVAL, max_queue: int = AUDIT_QUEUE_MAX):
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self._retry = []
+        self._task = None
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+
+    def start(self):
+        """Starts the background flusher (call from a running event loop, e.g. setup_hook)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="audit-log-writer")
+
+    async def log(self, admin_id: int, admin_name: str, action: str, details: str):
+        """Queues an admin log entry. Waits for the flusher if the queue is full."""
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        entry = (admin_id, admin_name, action, details, timestamp)
+        if self.queue.full():
+            self._wakeup.set()
+        await self.queue.put(entry)
+        if self.queue.qsize() >= AUDIT_BATCH_SIZE:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Writes everything queued so far. Failed batches are kept and retried on the next flush."""
+        async with self._flush_lock:
+            while self._retry or not self.queue.empty():
+                batch, self._retry = self._retry, []
+                while len(batch) < AUDIT_BATCH_SIZE and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                try:
+                    await asyncio.to_thread(db_manager.log_admin_actions, batch)
+                except Exception as e:
+                    logger.error(f"Failed to write {len(batch)} audit log entries: {e}")
+                    # Keep the batch for the next cycle, but never hold more than the queue bound
+                    self._retry = batch[-self.queue.maxsize:]
+                    return
+
+    async def close(self):
+        """Stops the flusher and writes any remaining entries."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._retry:
+            logger.error(f"Dropping {len(self._retry)} audit log entries that could not be written on shutdown.")
@@ -3,6 +3,9 @@ from database import database_manager as db_manager
 
 logger = logging.getLogger('core.calculation')
 
+# Columns computed as end - start; power is taken from the end snapshot
+GAIN_COLUMNS = ('kill_points', 'deaths', 't1_kills', 't2_kills', 't3_kills', 't4_kills', 't5_kills')
+
 def calculate_period_results(kvk_name: str, period_key: str):
     """
     Calculates the results for a specific period by comparing Start and End snapshots.
@@ -13,94 +16,39 @@ def calculate_period_results(kvk_name: str, period_key: str):
 
     logger.info(f"Starting calculation for {kvk_name!r} - {period_key!r}")
     
-    # 1. Fetch Start and End snapshots
+    # 1. Fetch Start and End snapshots (columnar: one numpy array per stat)
     logger.debug(f"Querying START snapshot: kvk_name={kvk_name!r}, period_key={period_key!r}")
-    start_data = db_manager.get_snapshot_data(kvk_name, period_key, 'start')
+    start_data = db_manager.get_snapshot_columns(kvk_name, period_key, 'start')
     logger.debug(f"START snapshot records found: {len(start_data)}")
 
     logger.debug(f"Querying END snapshot: kvk_name={kvk_name!r}, period_key={period_key!r}")
-    end_data = db_manager.get_snapshot_data(kvk_name, period_key, 'end')
+    end_data = db_manager.get_snapshot_columns(kvk_name, period_key, 'end')
     logger.debug(f"END snapshot records found: {len(end_data)}")
     
-    if not start_data:
+    if not len(start_data):
         logger.warning(
             f"No START snapshot found for kvk_name={kvk_name!r}, period_key={period_key!r}. "
             f"Ensure the snapshot was uploaded with the same period name."
         )
         return False, f"Start snapshot missing for period '{period_key}'."
     
-    if not end_data:
+    if not len(end_data):
         logger.warning(
             f"No END snapshot found for kvk_name={kvk_name!r}, period_key={period_key!r}. "
             f"Ensure the snapshot was uploaded with the same period name."
         )
         return False, f"End snapshot missing for period '{period_key}'."
         
-    results = []
-    
-    # 2. Iterate through players present in the END snapshot
-    # (Players who joined mid-period will have Start stats = 0 effectively, or we can choose to ignore them.
-    # Usually, we assume 0 start if missing, or we can skip. Let's assume 0 start for now to include everyone.)
-    
-    for player_id, end_row in end_data.items():
-        start_row = start_data.get(player_id)
-        
-        # Basic stats
-        end_power = end_row['power']
-        end_kp = end_row['kill_points']
-        end_deaths = end_row['deaths']
-        
-        if start_row:
-            start_power = start_row['power']
-            start_kp = start_row['kill_points']
-            start_deaths = start_row['deaths']
-            
-            # Tiers
-            diff_t1 = end_row['t1_kills'] - start_row['t1_kills']
-            diff_t2 = end_row['t2_kills'] - start_row['t2_kills']
-            diff_t3 = end_row['t3_kills'] - start_row['t3_kills']
-            diff_t4 = end_row['t4_kills'] - start_row['t4_kills']
-            diff_t5 = end_row['t5_kills'] - start_row['t5_kills']
-        else:
-            # Player wasn't there at start. Treat start as 0? 
-            # Or maybe they migrated in. 
-            # For safety, let's treat start as 0 but log it? 
-            # Actually, if they weren't in start, their "gain" is just their current total?
-            # No, that would be huge. 
-            # If missing start, we probably shouldn't calculate "gain" blindly or we get their lifetime stats.
-            # SAFE APPROACH: Skip players missing start snapshot to avoid massive false positives.
-            # OR: Assume they had 0 progress if we can't verify.
-            # Let's SKIP for now and log.
-            # logger.debug(f"Player {player_id} missing from start snapshot. Skipping.")
-            continue
-
-        # Calculate differences
-        diff_power = end_power - start_power # Power can be negative
-        diff_kp = end_kp - start_kp
-        diff_deaths = end_deaths - start_deaths
-        
-        # Sanity check: KP shouldn't be negative unless bug or reset.
-        if diff_kp < 0:
-            diff_kp = 0
-        if diff_deaths < 0:
-            diff_deaths = 0
-            
-        # Create result object
-        result = {
-            'player_id': player_id,
-            'player_name': end_row['player_name'], # Use name from end snapshot
-            'power': end_power, # We usually track current power for requirements, not diff power
-            'kill_points': diff_kp,
-            'deaths': diff_deaths,
-            't1_kills': max(0, diff_t1),
-            't2_kills': max(0, diff_t2),
-            't3_kills': max(0, diff_t3),
-            't4_kills': max(0, diff_t4),
-            't5_kills': max(0, diff_t5),
-            'kvk_name': kvk_name,
-            'period_key': period_key
-        }
-        results.append(result)
+    # 2. Gains for players present in both snapshots.
+    # Players missing from the START snapshot are skipped: without a verified start their
+    # "gain" would be their lifetime stats (massive false positives).
+    # Power stays the END value (requirements use current power, not the difference);
+    # KP, deaths and tier kills can't legitimately go down, so negative gains (resets) count as 0.
+    gains = end_data.diff(start_data, columns=GAIN_COLUMNS, floor=0)
+    skipped = len(end_data) - len(gains)
+    if skipped:
+        logger.debug(f"{skipped} players missing from the start snapshot were skipped.")
+    results = gains.to_records(kvk_name=kvk_name, period_key=period_key)
         
     # 3. Save results
     if db_manager.save_period_results(results):
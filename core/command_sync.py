@@ -0,0 +1,45 @@
+import hashlib
+import json
+import logging
+import os
+from database import database_manager as db_manager
+
+logger = logging.getLogger('discord_bot.core.command_sync')
+
+# global_settings key holding the hash of the last globally synced command tree
+COMMAND_TREE_HASH_KEY = 'command_tree_hash'
+# Set to 1 to sync on every boot regardless of the stored hash
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC', '0') == '1'
+
+
+def command_tree_hash(tree, application_id: int) -> str:
+    """
+    SHA-256 of the global command payload tree.sync() would upload, bound to the application ID
+    (a database restored into another bot must not skip its first sync).
+    """
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()),
+                     key=lambda c: (c.get('type', 1), c['name']))
+    blob = json.dumps({'application_id': application_id, 'commands': payload},
+                      sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def remember_synced_tree(tree, application_id: int):
+    """Stores the hash of the tree that was just synced globally."""
+    db_manager.set_global_setting(COMMAND_TREE_HASH_KEY, command_tree_hash(tree, application_id))
+
+
+async def sync_if_changed(bot) -> bool:
+    """
+    Syncs the global command tree only if it differs from the last synced one.
+    Returns True if a sync was made. Errors propagate (the stored hash is left untouched).
+    """
+    tree_hash = command_tree_hash(bot.tree, bot.application_id)
+    if not FORCE_COMMAND_SYNC and db_manager.get_global_setting(COMMAND_TREE_HASH_KEY) == tree_hash:
+        logger.info(f"Slash commands unchanged ({tree_hash[:12]}), skipping global sync.")
+        return False
+
+    synced = await bot.tree.sync()
+    db_manager.set_global_setting(COMMAND_TREE_HASH_KEY, tree_hash)
+    logger.info(f"Synced {len(synced)} slash commands globally ({tree_hash[:12]}).")
+    return True
@@ -0,0 +1,217 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import random
+import time
+import discord
+
+logger = logging.getLogger('discord_bot.core.dispatcher')
+
+# Priority classes (lower is sent first)
+PRIORITY_HIGH = 0    # errors / alerts
+PRIORITY_NORMAL = 1  # announcements
+PRIORITY_LOW = 2     # log digests
+
+# Per-channel pacing: Discord allows roughly 5 messages per 5 seconds per channel
+OUTBOUND_RATE = float(os.getenv('OUTBOUND_RATE', 1.0))
+OUTBOUND_BURST = int(os.getenv('OUTBOUND_BURST', 5))
+OUTBOUND_MAX_RETRIES = 3
+# Messages waiting per channel; when full, the least urgent one is dropped
+OUTBOUND_QUEUE_SIZE = int(os.getenv('OUTBOUND_QUEUE_SIZE', 100))
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`."""
+    def __init__(self, rate: float = OUTBOUND_RATE, capacity: int = OUTBOUND_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Takes a token if one is available and returns 0, otherwise returns seconds until one is."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _ChannelLane:
+    """One channel's pending messages (a heap of (priority, seq, attempt, kwargs, future)), pacing and worker."""
+    def __init__(self, target, bucket: TokenBucket):
+        self.target = target
+        self.bucket = bucket
+        self.heap = []
+        self.not_before = 0.0  # monotonic time before which nothing is sent (retry backoff)
+        self.wake = asyncio.Event()
+        self.task = None
+
+
+class OutboundDispatcher:
+    """
+    Shared entry point for messages the bot sends on its own (announcements, log channel).
+    Resolves and caches channels and keeps one bounded priority queue and worker per channel,
+    so a throttled or rate-limited channel only delays its own messages. Each channel is paced
+    with a token bucket; transient failures go back on the queue with jittered backoff, so a
+    more urgent message queued meanwhile is sent first.
+    """
+    def __init__(self, bot, rate: float = OUTBOUND_RATE, burst: int = OUTBOUND_BURST, max_queued: int = OUTBOUND_QUEUE_SIZE):
+        self.bot = bot
+        self.rate = rate
+        self.burst = burst
+        self.max_queued = max_queued
+        self._channels = {}
+        self._lanes = {}
+        self._seq = itertools.count()
+        self._unfinished = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        # Running totals, read by the metrics endpoint
+        self.stats = {'sent': 0, 'retried': 0, 'dropped': 0, 'channel_cache_hits': 0, 'channel_cache_misses': 0}
+
+    def start(self):
+        """(Re)starts the workers of channels with queued messages (call from a running event loop, e.g. setup_hook)."""
+        for lane in self._lanes.values():
+            if lane.heap:
+                self._ensure_worker(lane)
+
+    def qsize(self) -> int:
+        """Messages waiting across all channels."""
+        return sum(len(lane.heap) for lane in self._lanes.values())
+
+    async def get_channel(self, channel_id: int):
+        """Returns a channel object, hitting the API only the first time an ID is seen."""
+        channel = self._channels.get(channel_id)
+        if channel is not None:
+            self.stats['channel_cache_hits'] += 1
+        else:
+            self.stats['channel_cache_misses'] += 1
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                try:
+                    channel = await self.bot.fetch_channel(channel_id)
+                except Exception as e:
+                    logger.error(f"Could not fetch channel {channel_id}: {e}")
+                    return None
+            self._channels[channel_id] = channel
+        return channel
+
+    async def send(self, target, *, priority: int = PRIORITY_NORMAL, wait: bool = False, **kwargs):
+        """
+        Queues channel.send(**kwargs). target: channel ID or a channel-like object.
+        With wait=True, returns the sent message (or None if it was dropped or ultimately failed).
+        """
+        key = target if isinstance(target, int) else id(target)
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _ChannelLane(target, TokenBucket(self.rate, self.burst))
+        future = asyncio.get_running_loop().create_future() if wait else None
+        item = (priority, next(self._seq), 0, kwargs, future)
+
+        self._unfinished += 1
+        self._drained.clear()
+        if len(lane.heap) >= self.max_queued:
+            # Backpressure: keep the more urgent message, drop the one that would be sent last
+            least_urgent = max(lane.heap)
+            if item < least_urgent:
+                lane.heap.remove(least_urgent)
+                heapq.heapify(lane.heap)
+                heapq.heappush(lane.heap, item)
+                item = least_urgent
+            self._finish(item, None, f"queue for {target} is full")
+        else:
+            heapq.heappush(lane.heap, item)
+        lane.wake.set()
+        self._ensure_worker(lane)
+        if future:
+            return await future
+
+    def _ensure_worker(self, lane: _ChannelLane):
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.create_task(self._run(lane), name=f"outbound-{lane.target}")
+
+    def _finish(self, item, message, error: str = None):
+        priority, _, _, _, future = item
+        if error:
+            logger.error(f"Dropping outbound message (priority {priority}): {error}")
+            self.stats['dropped'] += 1
+        else:
+            self.stats['sent'] += 1
+        if future and not future.done():
+            future.set_result(message)
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._drained.set()
+
+    async def _run(self, lane: _ChannelLane):
+        while True:
+            if not lane.heap:
+                lane.wake.clear()
+                await lane.wake.wait()
+                continue
+            # Wait for backoff and a token, then send whatever is most urgent by then
+            delay = lane.not_before - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            delay = lane.bucket.take()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            item = heapq.heappop(lane.heap)
+            priority, seq, attempt, kwargs, future = item
+            try:
+                message = await self._deliver(lane.target, kwargs)
+            except Exception as e:
+                backoff = self._retry_backoff(e, attempt)
+                if backoff is None:
+                    self._finish(item, None, f"{lane.target}: {e}")
+                    continue
+                self.stats['retried'] += 1
+                lane.not_before = time.monotonic() + backoff + random.uniform(0, backoff / 2)
+                heapq.heappush(lane.heap, (priority, seq, attempt + 1, kwargs, future))
+                continue
+            self._finish(item, message)
+
+    @staticmethod
+    def _retry_backoff(error: Exception, attempt: int):
+        """Seconds to wait before retrying, or None if the failure is permanent or retries are used up."""
+        if attempt >= OUTBOUND_MAX_RETRIES:
+            return None
+        if isinstance(error, discord.HTTPException):
+            # Only rate limits and server errors are worth retrying
+            if error.status != 429 and error.status < 500:
+                return None
+            return getattr(error, 'retry_after', None) or 0.5 * 2 ** attempt
+        if isinstance(error, (OSError, asyncio.TimeoutError)):
+            return 0.5 * 2 ** attempt
+        return None
+
+    async def _deliver(self, target, kwargs):
+        channel = await self.get_channel(target) if isinstance(target, int) else target
+        if channel is None:
+            raise LookupError("channel not found")
+        return await channel.send(**kwargs)
+
+    async def close(self, timeout: float = 10.0):
+        """Waits (up to `timeout`) for queued messages to go out, then stops the workers."""
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Outbound queue not drained on shutdown ({self.qsize()} messages left).")
+        tasks = [lane.task for lane in self._lanes.values() if lane.task is not None]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for lane in self._lanes.values():
+            lane.task = None
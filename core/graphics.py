@@ -1,11 +1,15 @@
-import matplotlib.pyplot as plt
 import io
-from PIL import Image
-import numpy as np
 import logging
+from core.tracing import traced
+from core.metrics import observe_render
 
 logger = logging.getLogger('core.graphics')
 
+def _instrumented(func):
+    """Times a chart function for command traces and the /metrics endpoint."""
+    return traced("render")(observe_render(func))
+
+@_instrumented
 def create_progress_gif(current, total, filename="progress.gif", title="Progress", color="#00ff00"):
     """
     Generates an animated gauge chart GIF.
@@ -13,7 +17,11 @@ def create_progress_gif(current, total, filename="progress.gif", title="Progress
     total: Target value (e.g., Required Kills)
     filename: Output filename (not used if returning bytes, but good for debug)
     """
+    # matplotlib, numpy and PIL are imported on first render to keep bot startup light
     try:
+        import matplotlib.pyplot as plt
+        import numpy as np
+        from PIL import Image
         frames = []
         
         # Calculate percentage
@@ -101,12 +109,15 @@ def create_progress_gif(current, total, filename="progress.gif", title="Progress
         return None
 
 
+@_instrumented
 def create_player_stats_card(current_kills, req_kills, current_deaths, req_deaths, player_name):
     """
     Generates a static image with two concentric gauge charts: Kills (Outer) and Deaths (Inner).
     Matches the design: Semi-circle, dark theme (transparent bg), specific colors.
     """
     try:
+        import matplotlib.pyplot as plt
+        import numpy as np
         # Setup figure
         # Increase figure size for better quality text
         fig, ax = plt.subplots(figsize=(8, 6), subplot_kw={'projection': 'polar'})
@@ -229,12 +240,14 @@ def create_player_stats_card(current_kills, req_kills, current_deaths, req_death
         return None
 
 
+@_instrumented
 def create_fort_dynamics_chart(history_data, player_name):
     """
     Generates a line chart showing fort participation over time.
     history_data: list of dicts {period_label, total_forts, forts_joined, forts_launched}
     """
     try:
+        import matplotlib.pyplot as plt
         if not history_data:
             return None
             
@@ -279,12 +292,14 @@ def create_fort_dynamics_chart(history_data, player_name):
         return None
 
 
+@_instrumented
 def create_player_dynamics_chart(history_data, player_name):
     """
     Generates a line chart showing player KP/Deaths over time.
     history_data: list of dicts {period_key, kill_points, deaths, power}
     """
     try:
+        import matplotlib.pyplot as plt
         if not history_data or len(history_data) < 2:
             return None
             
@@ -328,3 +343,65 @@ def create_player_dynamics_chart(history_data, player_name):
     except Exception as e:
         logger.error(f"Error generating player dynamics chart: {e}")
         return None
+
+
+@_instrumented
+def create_kingdom_history_chart(history_data, title="Kingdom History"):
+    """
+    Generates a bar chart of kingdom KP/Deaths per season with total power as a line.
+    history_data: list of dicts {label, kill_points, deaths, power}, oldest season first
+    """
+    try:
+        import matplotlib.pyplot as plt
+        if not history_data or len(history_data) < 2:
+            return None
+
+        # Extract data
+        labels = [h['label'] for h in history_data]
+        kp = [h['kill_points'] for h in history_data]
+        deaths = [h['deaths'] for h in history_data]
+        power = [h['power'] for h in history_data]
+        positions = range(len(labels))
+        width = 0.4
+
+        # Setup figure
+        plt.style.use('dark_background')
+        fig, ax = plt.subplots(figsize=(10, 6))
+
+        # Grouped bars, power on a second axis
+        ax.bar([p - width / 2 for p in positions], kp, width, color='#ffa500', label='Kill Points')
+        ax.bar([p + width / 2 for p in positions], deaths, width, color='#d462d1', label='Deaths')
+        power_ax = ax.twinx()
+        power_ax.plot(list(positions), power, marker='o', linewidth=3, color='#1e90ff', label='Power')
+
+        # Customization
+        ax.set_title(title, fontsize=16, pad=20)
+        ax.set_ylabel("Kill Points / Deaths", fontsize=12)
+        power_ax.set_ylabel("Power", fontsize=12)
+        ax.set_xlabel("Season", fontsize=12)
+        ax.set_xticks(list(positions))
+        ax.set_xticklabels(labels)
+        ax.grid(True, axis='y', linestyle=':', alpha=0.3)
+
+        handles, names = ax.get_legend_handles_labels()
+        power_handles, power_names = power_ax.get_legend_handles_labels()
+        ax.legend(handles + power_handles, names + power_names, loc='upper left')
+
+        # Format Y axes with comma separators
+        ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: format(int(x), ',')))
+        power_ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: format(int(x), ',')))
+
+        # Rotate labels if many
+        if len(labels) > 5:
+            plt.setp(ax.get_xticklabels(), rotation=45)
+
+        # Save to buffer
+        buf = io.BytesIO()
+        plt.savefig(buf, format='png', bbox_inches='tight', dpi=100)
+        buf.seek(0)
+        plt.close(fig)
+        return buf
+
+    except Exception as e:
+        logger.error(f"Error generating kingdom history chart: {e}")
+        return None
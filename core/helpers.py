@@ -1,7 +1,9 @@
 """
 Core helpers module - common utility functions used across the bot.
 """
+import os
 import re
+import tempfile
 from datetime import datetime
 from functools import lru_cache
 from typing import Optional, Tuple, List
@@ -56,6 +58,23 @@ def generate_unique_key(name: str, existing_keys: List[str] = None) -> str:
     return key
 
 
+# Uploads up to this size are kept in memory; larger ones are spooled to a temp file
+UPLOAD_SPOOL_THRESHOLD = int(os.getenv('UPLOAD_SPOOL_THRESHOLD', 8 * 1024 * 1024))
+
+
+async def read_attachment(attachment):
+    """
+    Reads a Discord attachment for the database import functions.
+    Returns bytes for small files, or a SpooledTemporaryFile (rewound) above UPLOAD_SPOOL_THRESHOLD.
+    """
+    if attachment.size <= UPLOAD_SPOOL_THRESHOLD:
+        return await attachment.read()
+
+    spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD)
+    await attachment.save(spool, seek_begin=True)
+    return spool
+
+
 def truncate_string(s: str, max_length: int = 100, suffix: str = "...") -> str:
     """Truncates a string to max_length, adding suffix if truncated."""
     if not s or len(s) <= max_length:
@@ -125,3 +144,22 @@ def get_season_autocomplete_choices(seasons: list, current: str, include_archive
         choices.append(app_commands.Choice(name=display, value=value))
     
     return choices[:25]  # Discord limit
+
+
+# Player autocomplete helper
+def get_player_autocomplete_choices(players: list, value_type=str) -> List[app_commands.Choice]:
+    """
+    Creates autocomplete choices from search_players() results.
+    value_type: str or int, matching the command parameter type.
+    """
+    choices = []
+    for p in players[:25]:
+        name = p['latest_name']
+        if p.get('matched_name') and p['matched_name'] != name:
+            name = f"{name} (was {p['matched_name']})"
+        power = p.get('latest_power')
+        display = f"{name} · {p['player_id']}"
+        if power:
+            display += f" · ⚡{power / 1_000_000:.1f}M"
+        choices.append(app_commands.Choice(name=truncate_string(display, 100), value=value_type(p['player_id'])))
+    return choices
@@ -1,21 +1,60 @@
+import asyncio
 import discord
 import logging
 import os
 from datetime import datetime
+from core.dispatcher import PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
 
 logger = logging.getLogger('discord_bot.core.logger')
 
+# Digest mode: commands and admin actions are grouped into one embed per interval / batch
+LOG_DIGEST_ENABLED = os.getenv('LOG_DIGEST', '1') != '0'
+LOG_DIGEST_INTERVAL = float(os.getenv('LOG_DIGEST_INTERVAL', 30))
+LOG_DIGEST_MAX_EVENTS = int(os.getenv('LOG_DIGEST_MAX_EVENTS', 20))
+# Discord rejects embeds whose description is longer than this
+EMBED_DESCRIPTION_LIMIT = 4096
+
+
+class StubLogChannel:
+    """
+    Stand-in for the log channel that records messages instead of sending them.
+    Pass it as BotLogger(bot, channel=StubLogChannel()) to measure logging throughput offline.
+    latency: simulated seconds per send (e.g. 0.3 to mimic a rate-limited channel).
+    """
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.messages = []
+
+    async def send(self, content=None, *, embed=None, embeds=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.messages.append({'content': content, 'embeds': embeds or ([embed] if embed else [])})
+
+    @property
+    def embed_count(self):
+        return sum(len(m['embeds']) for m in self.messages)
+
+
 class BotLogger:
-    def __init__(self, bot):
+    def __init__(self, bot, channel=None, digest: bool = LOG_DIGEST_ENABLED):
         self.bot = bot
+        self.channel = channel
+        self.digest = digest
         self.log_channel_id = int(os.getenv('LOG_CHANNEL_ID', 0))
-        if self.log_channel_id == 0:
+        if self.log_channel_id == 0 and channel is None:
             logger.warning("LOG_CHANNEL_ID not set in environment variables. Channel logging disabled.")
 
-    async def _send_log_embed(self, embed):
-        """Internal helper to send log embed to channel."""
+        self._buffer = []
+        self._digest_task = None
+
+    async def _get_channel(self):
+        if self.channel is not None:
+            return self.channel
         if self.log_channel_id == 0:
-            return
+            return None
+        outbound = getattr(self.bot, 'outbound', None)
+        if outbound is not None:
+            return await outbound.get_channel(self.log_channel_id)
 
         channel = self.bot.get_channel(self.log_channel_id)
         if not channel:
@@ -24,46 +63,114 @@ class BotLogger:
                 channel = await self.bot.fetch_channel(self.log_channel_id)
             except Exception as e:
                 logger.error(f"Could not fetch log channel {self.log_channel_id}: {e}")
-                return
+                return None
+        return channel
 
+    async def _send_log_embed(self, embed, priority: int = PRIORITY_LOW):
+        """Internal helper to send log embed to channel (through the bot's outbound dispatcher if it has one)."""
+        outbound = getattr(self.bot, 'outbound', None)
+        if outbound is not None:
+            target = self.channel if self.channel is not None else self.log_channel_id
+            if target:
+                await outbound.send(target, embed=embed, priority=priority)
+            return
+
+        channel = await self._get_channel()
         if channel:
             try:
                 await channel.send(embed=embed)
             except Exception as e:
                 logger.error(f"Failed to send log to channel: {e}")
 
+    async def _log_event(self, line: str, embed_factory):
+        """Buffers a one-line summary in digest mode, otherwise sends the full embed right away."""
+        if not self.digest:
+            await self._send_log_embed(embed_factory())
+            return
+        if self.channel is None and self.log_channel_id == 0:
+            return
+
+        self._buffer.append(f"`{datetime.now().strftime('%H:%M:%S')}` {line}"[:300])
+        if len(self._buffer) >= LOG_DIGEST_MAX_EVENTS:
+            await self.flush()
+        elif self._digest_task is None or self._digest_task.done():
+            self._digest_task = asyncio.create_task(self._digest_timer())
+
+    async def _digest_timer(self):
+        await asyncio.sleep(LOG_DIGEST_INTERVAL)
+        await self.flush()
+
+    @staticmethod
+    def _digest_chunks(events: list) -> list:
+        """Splits events into chunks of at most LOG_DIGEST_MAX_EVENTS lines and EMBED_DESCRIPTION_LIMIT chars (newlines included)."""
+        chunks, chunk, length = [], [], 0
+        for line in events:
+            added = len(line) + (1 if chunk else 0)
+            if chunk and (len(chunk) >= LOG_DIGEST_MAX_EVENTS or length + added > EMBED_DESCRIPTION_LIMIT):
+                chunks.append(chunk)
+                chunk, length, added = [], 0, len(line)
+            chunk.append(line)
+            length += added
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    async def flush(self):
+        """Sends buffered events as digest embeds (see _digest_chunks for the per-embed limits)."""
+        events, self._buffer = self._buffer, []
+        for chunk in self._digest_chunks(events):
+            embed = discord.Embed(
+                title=f"📋 Activity Digest ({len(chunk)} events)",
+                description="\n".join(chunk),
+                color=discord.Color.blurple(),
+                timestamp=discord.utils.utcnow()
+            )
+            await self._send_log_embed(embed)
+
+    async def close(self):
+        """Cancels the digest timer and sends whatever is still buffered."""
+        if self._digest_task and not self._digest_task.done() and self._digest_task is not asyncio.current_task():
+            self._digest_task.cancel()
+        await self.flush()
+
     async def log_command(self, interaction: discord.Interaction, command_name: str):
         """Logs a standard user command execution."""
-        embed = discord.Embed(
-            title="👤 Command Used", 
-            color=discord.Color.blue(), 
-            timestamp=discord.utils.utcnow()
-        )
-        embed.set_author(name=f"{interaction.user.name} ({interaction.user.id})", icon_url=interaction.user.display_avatar.url)
-        embed.add_field(name="Command", value=f"/{command_name}", inline=True)
-        embed.add_field(name="Channel", value=f"{interaction.channel.mention if interaction.channel else 'DM'}", inline=True)
-        
-        # Add guild info if available
-        if interaction.guild:
-            embed.set_footer(text=f"Guild: {interaction.guild.name} ({interaction.guild.id})")
-            
-        await self._send_log_embed(embed)
+        def build():
+            embed = discord.Embed(
+                title="👤 Command Used",
+                color=discord.Color.blue(),
+                timestamp=discord.utils.utcnow()
+            )
+            embed.set_author(name=f"{interaction.user.name} ({interaction.user.id})", icon_url=interaction.user.display_avatar.url)
+            embed.add_field(name="Command", value=f"/{command_name}", inline=True)
+            embed.add_field(name="Channel", value=f"{interaction.channel.mention if interaction.channel else 'DM'}", inline=True)
+
+            # Add guild info if available
+            if interaction.guild:
+                embed.set_footer(text=f"Guild: {interaction.guild.name} ({interaction.guild.id})")
+            return embed
+
+        where = interaction.channel.mention if interaction.channel else 'DM'
+        await self._log_event(f"👤 **{interaction.user.name}** used `/{command_name}` in {where}", build)
 
     async def log_admin_action(self, interaction: discord.Interaction, action: str, details: str):
         """Logs an administrative action (also logs to DB via separate call usually)."""
-        embed = discord.Embed(
-            title="🛡️ Admin Action", 
-            color=discord.Color.gold(), 
-            timestamp=discord.utils.utcnow()
-        )
-        embed.set_author(name=f"{interaction.user.name} ({interaction.user.id})", icon_url=interaction.user.display_avatar.url)
-        embed.add_field(name="Action", value=action, inline=False)
-        embed.add_field(name="Details", value=details, inline=False)
-        
-        await self._send_log_embed(embed)
+        def build():
+            embed = discord.Embed(
+                title="🛡️ Admin Action",
+                color=discord.Color.gold(),
+                timestamp=discord.utils.utcnow()
+            )
+            embed.set_author(name=f"{interaction.user.name} ({interaction.user.id})", icon_url=interaction.user.display_avatar.url)
+            embed.add_field(name="Action", value=action, inline=False)
+            embed.add_field(name="Details", value=details, inline=False)
+            return embed
+
+        summary = " ".join(str(details).split())
+        await self._log_event(f"🛡️ **{interaction.user.name}** · {action}: {summary}", build)
 
     async def log_error(self, interaction: discord.Interaction, error: Exception, command_name: str = "Unknown"):
-        """Logs an error occurring during command execution."""
+        """Logs an error occurring during command execution. Always sent immediately, never digested."""
         embed = discord.Embed(
             title="❌ Command Error", 
             color=discord.Color.red(), 
@@ -73,7 +180,7 @@ class BotLogger:
         embed.add_field(name="Command", value=f"/{command_name}", inline=True)
         embed.add_field(name="Error", value=f"```{str(error)[:1000]}```", inline=False)
         
-        await self._send_log_embed(embed)
+        await self._send_log_embed(embed, priority=PRIORITY_HIGH)
 
     async def log_custom(self, title: str, description: str, color: discord.Color = discord.Color.light_gray(), user: discord.User = None):
         """Logs a custom message."""
@@ -86,4 +193,4 @@ class BotLogger:
         if user:
             embed.set_author(name=f"{user.name} ({user.id})", icon_url=user.display_avatar.url)
             
-        await self._send_log_embed(embed)
+        await self._send_log_embed(embed, priority=PRIORITY_NORMAL)
@@ -0,0 +1,281 @@
+import asyncio
+import functools
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger('discord_bot.core.metrics')
+
+# Embedded HTTP server for /metrics, /healthz and /readyz (disabled unless METRICS_PORT is set)
+METRICS_HOST = os.getenv('METRICS_HOST', '0.0.0.0')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+# Readiness fails when the event loop is lagging more than this many seconds
+READY_MAX_LOOP_LAG = float(os.getenv('READY_MAX_LOOP_LAG', 2.0))
+
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+COMMAND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RENDER_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labels=(), fn=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.fn = fn  # optional callback returning {label_values_tuple: value} (or a bare value), read at scrape time
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _samples(self):
+        if self.fn is not None:
+            result = self.fn()
+            return result.items() if isinstance(result, dict) else [((), result)]
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, value in self._samples():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=DB_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = _format_labels(self.labels, label_values, ("le", _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                logger.error(f"Failed to collect metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "kvkbot_db_query_seconds", "Database statement latency by calling database function.", ["function"], DB_BUCKETS))
+COMMAND_SECONDS = REGISTRY.register(Histogram(
+    "kvkbot_command_seconds", "Slash command latency (interaction received to handler done).", ["command"], COMMAND_BUCKETS))
+COMMAND_PHASE_SECONDS = REGISTRY.register(Histogram(
+    "kvkbot_command_phase_seconds", "Time spent per command phase (defer, db, render, send, other).", ["command", "phase"], COMMAND_BUCKETS))
+COMMANDS_TOTAL = REGISTRY.register(Counter(
+    "kvkbot_commands_total", "Slash command invocations.", ["command", "status"]))
+RENDER_SECONDS = REGISTRY.register(Histogram(
+    "kvkbot_render_seconds", "Chart / image rendering time.", ["chart"], RENDER_BUCKETS))
+RENDERS_IN_PROGRESS = REGISTRY.register(Gauge(
+    "kvkbot_renders_in_progress", "Charts currently being rendered."))
+RENDERS_IN_PROGRESS.set(0)
+LOOP_LAG_SECONDS = REGISTRY.register(Histogram(
+    "kvkbot_event_loop_lag_seconds", "Extra delay of a 1s sleep on the event loop.", (), LOOP_LAG_BUCKETS))
+
+
+def observe_render(func):
+    """Decorator that records render time and in-progress count for a chart function (only with METRICS_PORT set)."""
+    if not METRICS_PORT:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        RENDERS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            RENDER_SECONDS.observe(time.perf_counter() - start, func.__name__)
+            RENDERS_IN_PROGRESS.dec()
+    return wrapper
+
+
+def _on_query(function: str, elapsed_ms: float):
+    DB_QUERY_SECONDS.observe(elapsed_ms / 1000, function)
+
+
+def _on_trace(record: dict):
+    command = record['command']
+    COMMAND_SECONDS.observe(record['total_ms'] / 1000, command)
+    COMMANDS_TOTAL.inc(command, "error" if record['error'] else "ok")
+    for phase, ms in record['phases'].items():
+        COMMAND_PHASE_SECONDS.observe(ms / 1000, command, phase)
+
+
+def install(bot):
+    """Hooks the DB layer, command tracer and the bot's queues into the registry."""
+    from database import database_manager as db_manager
+    from core.tracing import add_trace_listener
+
+    db_manager.add_query_listener(_on_query)
+    add_trace_listener(_on_trace)
+
+    def outbound_stat(key):
+        return lambda: bot.outbound.stats[key] if hasattr(bot, 'outbound') else 0
+
+    REGISTRY.register(Gauge("kvkbot_outbound_queue_depth", "Messages waiting in the outbound send queues.",
+                            fn=lambda: bot.outbound.qsize() if hasattr(bot, 'outbound') else 0))
+    REGISTRY.register(Counter("kvkbot_outbound_messages_total", "Outbound messages by result.", ["result"],
+                              fn=lambda: {(k,): bot.outbound.stats[k] for k in ('sent', 'retried', 'dropped')} if hasattr(bot, 'outbound') else {}))
+    REGISTRY.register(Counter("kvkbot_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"],
+                              fn=lambda: {
+                                  ("season", "hit"): db_manager.get_cache_stats()['hits'],
+                                  ("season", "miss"): db_manager.get_cache_stats()['misses'],
+                                  ("active_season", "hit"): db_manager.get_active_season_stats()['hits'],
+                                  ("active_season", "miss"): db_manager.get_active_season_stats()['builds'],
+                                  ("channel", "hit"): outbound_stat('channel_cache_hits')(),
+                                  ("channel", "miss"): outbound_stat('channel_cache_misses')(),
+                              }))
+    REGISTRY.register(Gauge("kvkbot_audit_queue_depth", "Admin log entries waiting to be written.",
+                            fn=lambda: bot.audit.queue.qsize() if hasattr(bot, 'audit') else 0))
+    REGISTRY.register(Gauge("kvkbot_log_digest_buffered", "Log-channel events waiting for the next digest.",
+                            fn=lambda: len(bot.logger._buffer) if hasattr(bot, 'logger') else 0))
+    REGISTRY.register(Gauge("kvkbot_gateway_latency_seconds", "Discord gateway heartbeat latency.",
+                            fn=lambda: bot.latency if bot.latency == bot.latency and bot.latency != math.inf else 0))
+    REGISTRY.register(Gauge("kvkbot_guilds", "Guilds the bot is in.", fn=lambda: len(bot.guilds)))
+
+
+class MetricsServer:
+    """Serves /metrics (Prometheus text format), /healthz and /readyz on METRICS_HOST:METRICS_PORT."""
+    def __init__(self, bot, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.loop_lag = 0.0
+        self._runner = None
+        self._lag_task = None
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle_metrics)
+        app.router.add_get('/healthz', self.handle_health)
+        app.router.add_get('/readyz', self.handle_ready)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._lag_task = asyncio.create_task(self._measure_loop_lag(), name="metrics-loop-lag")
+        logger.info(f"Metrics server listening on {self.host}:{self.port}")
+
+    async def _measure_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(1)
+            self.loop_lag = max(0.0, loop.time() - start - 1)
+            LOOP_LAG_SECONDS.observe(self.loop_lag)
+
+    async def handle_metrics(self, request):
+        from aiohttp import web
+        body = REGISTRY.render().encode('utf-8')
+        return web.Response(body=body, headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def handle_health(self, request):
+        from aiohttp import web
+        # Answering at all means the event loop is alive
+        return web.Response(text="ok")
+
+    async def handle_ready(self, request):
+        from aiohttp import web
+        problems = []
+        if self.bot.is_closed():
+            problems.append("client closed")
+        elif not self.bot.is_ready():
+            problems.append("gateway not ready")
+        if self.loop_lag > READY_MAX_LOOP_LAG:
+            problems.append(f"event loop lag {self.loop_lag:.2f}s")
+        if problems:
+            return web.Response(status=503, text="; ".join(problems))
+        return web.Response(text="ready")
+
+    async def close(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -1,6 +1,7 @@
 import discord
 import os
 import logging
+from core.dispatcher import PRIORITY_NORMAL
 
 logger = logging.getLogger('discord_bot.notifications')
 
@@ -15,6 +16,19 @@ class NotificationManager:
             logger.warning("NOTIFICATIONS_CHANNEL_ID not set. Skipping announcement.")
             return
 
+        content = None # Role ping removed by user request
+        embed = discord.Embed(title=title, description=description, color=color)
+        if fields:
+            for name, value in fields.items():
+                embed.add_field(name=name, value=value, inline=False)
+
+        # Queue through the shared dispatcher (cached channel, paced, retried) when available
+        outbound = getattr(self.bot, 'outbound', None)
+        if outbound is not None:
+            await outbound.send(self.channel_id, content=content, embed=embed, priority=PRIORITY_NORMAL)
+            logger.info(f"Announcement queued: {title}")
+            return
+
         channel = self.bot.get_channel(self.channel_id)
         if not channel:
             try:
@@ -23,12 +37,6 @@ class NotificationManager:
                 logger.error(f"Could not find notification channel {self.channel_id}: {e}")
                 return
 
-        content = None # Role ping removed by user request
-        embed = discord.Embed(title=title, description=description, color=color)
-        if fields:
-            for name, value in fields.items():
-                embed.add_field(name=name, value=value, inline=False)
-        
         try:
             await channel.send(content=content, embed=embed)
             logger.info(f"Announcement sent: {title}")
@@ -0,0 +1,130 @@
+import cProfile
+import logging
+import os
+import pstats
+import time
+from datetime import datetime
+from database.base import DATA_DIR
+
+logger = logging.getLogger('discord_bot.core.profiler')
+
+PROFILE_DIR = os.path.join(DATA_DIR, 'profiles')
+# Oldest reports are deleted beyond this many files
+PROFILE_MAX_REPORTS = int(os.getenv('PROFILE_MAX_REPORTS', 50))
+
+
+class CommandProfiler:
+    """
+    Opt-in cProfile for slash commands. arm() a command for the next `count` invocations
+    and/or a time window; the command tree calls begin()/end() around each invocation.
+    Only one invocation is profiled at a time (cProfile is per thread and other coroutines
+    running on the loop meanwhile show up in the profile too).
+    """
+    def __init__(self, directory: str = PROFILE_DIR):
+        self.directory = directory
+        self.targets = {}  # command -> {'remaining': int or None, 'until': epoch or None}
+        self._active = None
+
+    def arm(self, command: str, count: int = None, minutes: float = None):
+        """Profiles the next `count` runs of `command`, or all runs for `minutes`, whichever ends first."""
+        self.targets[command] = {
+            'remaining': count,
+            'until': time.time() + minutes * 60 if minutes else None
+        }
+
+    def disarm(self, command: str = None):
+        """Stops profiling one command (or all of them)."""
+        if command is None:
+            self.targets.clear()
+        else:
+            self.targets.pop(command, None)
+
+    def _is_armed(self, command: str) -> bool:
+        target = self.targets.get(command)
+        if target is None:
+            return False
+        expired = target['until'] is not None and time.time() > target['until']
+        if expired or target['remaining'] == 0:
+            del self.targets[command]
+            return False
+        return True
+
+    def status(self) -> dict:
+        """Armed commands: {command: {'remaining', 'until'}} (expired entries are dropped)."""
+        for command in list(self.targets):
+            self._is_armed(command)
+        return {k: dict(v) for k, v in self.targets.items()}
+
+    def begin(self, command: str):
+        """Starts profiling this invocation if the command is armed. Returns a session for end(), or None."""
+        if self._active is not None or not self._is_armed(command):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler (or tracer) already owns the thread
+            logger.warning(f"Could not start profiler for /{command}: {e}")
+            return None
+        target = self.targets[command]
+        if target['remaining'] is not None:
+            target['remaining'] -= 1
+        self._active = (command, profile, time.perf_counter())
+        return self._active
+
+    def end(self, session):
+        """Stops the profile and saves it as <command>_<timestamp>.pstats under PROFILE_DIR."""
+        command, profile, start = session
+        profile.disable()
+        self._active = None
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            filename = f"{command}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{elapsed_ms:.0f}ms.pstats"
+            path = os.path.join(self.directory, filename)
+            profile.dump_stats(path)
+            logger.info(f"Saved profile of /{command} ({elapsed_ms:.0f} ms) to {path}")
+            self._prune()
+            return path
+        except Exception as e:
+            logger.error(f"Failed to save profile for /{command}: {e}")
+            return None
+
+    def _prune(self):
+        reports = self.list_reports()
+        for path in reports[PROFILE_MAX_REPORTS:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def list_reports(self, command: str = None) -> list:
+        """Saved report paths, newest first (optionally only for one command)."""
+        if not os.path.isdir(self.directory):
+            return []
+        paths = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.endswith('.pstats') and (command is None or name.startswith(f"{command}_"))
+        ]
+        return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def summarize_profile(path: str, limit: int = 15, sort: str = 'tottime') -> list:
+    """
+    Ranked hot functions of a saved profile.
+    Returns [{'function', 'calls', 'tottime', 'cumtime'}] sorted by `sort` ('tottime' or 'cumtime'), seconds.
+    """
+    stats = pstats.Stats(path)
+    rows = []
+    for (filename, lineno, name), (cc, nc, tt, ct, callers) in stats.stats.items():
+        if filename == '~':
+            label = name  # built-in
+        else:
+            label = f"{os.path.basename(filename)}:{lineno}({name})"
+        rows.append({'function': label, 'calls': nc, 'tottime': tt, 'cumtime': ct})
+    rows.sort(key=lambda r: r[sort], reverse=True)
+    return rows[:limit]
+
+
+# Shared instance used by the command tree and the admin commands
+command_profiler = CommandProfiler()
@@ -0,0 +1,206 @@
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import deque
+import discord
+from discord import app_commands
+
+logger = logging.getLogger('discord_bot.core.tracing')
+
+# Number of recent command invocations kept for the latency report
+TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', 2000))
+
+_current_trace = contextvars.ContextVar('command_trace', default=None)
+_traces = deque(maxlen=TRACE_BUFFER_SIZE)
+_traces_lock = threading.Lock()
+_trace_listeners = []
+
+
+class CommandTrace:
+    """
+    Phase timings of one command invocation. Spans record self-time (time spent in
+    nested spans is subtracted), so phases add up to at most the total.
+    """
+    def __init__(self, command: str):
+        self.command = command
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.stack = []  # child-time accumulators of the open spans
+
+    def add(self, phase: str, elapsed_ms: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + elapsed_ms
+        if self.stack:
+            self.stack[-1][0] += elapsed_ms
+
+
+class span:
+    """
+    Times a phase of the current command, e.g. `with span("db"):` or `async with span("send"):`.
+    Does nothing outside a traced command.
+    """
+    __slots__ = ('phase', 'trace', 'start', 'children')
+
+    def __init__(self, phase: str):
+        self.phase = phase
+        self.trace = None
+
+    def __enter__(self):
+        self.trace = _current_trace.get()
+        if self.trace is not None:
+            self.children = [0.0]
+            self.trace.stack.append(self.children)
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        trace = self.trace
+        if trace is not None:
+            elapsed_ms = (time.perf_counter() - self.start) * 1000
+            if trace.stack and trace.stack[-1] is self.children:
+                trace.stack.pop()
+            else:
+                trace.stack[:] = [c for c in trace.stack if c is not self.children]
+            trace.phases[self.phase] = trace.phases.get(self.phase, 0.0) + elapsed_ms - self.children[0]
+            if trace.stack:
+                trace.stack[-1][0] += elapsed_ms
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+def traced(phase: str):
+    """Decorator form of span() for sync and async functions."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                async with span(phase):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_phase(phase: str, elapsed_ms: float):
+    """Adds an externally measured duration (e.g. a DB query) to the current command, if any."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(phase, elapsed_ms)
+
+
+def start_trace(command: str):
+    """Starts tracing a command in the current context. Returns a token for finish_trace()."""
+    return _current_trace.set(CommandTrace(command))
+
+
+def finish_trace(token, error: bool = False):
+    """Closes the current trace and stores it in the ring buffer."""
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    if trace is None:
+        return
+    total_ms = (time.perf_counter() - trace.start) * 1000
+    phases = dict(trace.phases)
+    phases['other'] = max(0.0, total_ms - sum(phases.values()))
+    record = {
+        'command': trace.command,
+        'time': time.time(),
+        'total_ms': total_ms,
+        'phases': phases,
+        'error': error
+    }
+    with _traces_lock:
+        _traces.append(record)
+    for listener in _trace_listeners:
+        try:
+            listener(record)
+        except Exception as e:
+            logger.error(f"Trace listener failed: {e}")
+
+
+def add_trace_listener(listener):
+    """Registers listener(record), called with every finished command trace (same dict as the ring buffer holds)."""
+    if listener not in _trace_listeners:
+        _trace_listeners.append(listener)
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def get_latency_report(command: str = None) -> list:
+    """
+    Aggregates the recent traces per command.
+    Returns [{'command', 'count', 'errors', 'total': (p50, p95, p99), 'phases': {phase: (p50, p95, p99)}}],
+    slowest p95 first. Phases missing from an invocation count as 0 ms for it.
+    """
+    with _traces_lock:
+        traces = [t for t in _traces if command is None or t['command'] == command]
+
+    grouped = {}
+    for t in traces:
+        grouped.setdefault(t['command'], []).append(t)
+
+    report = []
+    for name, items in grouped.items():
+        phase_names = sorted({p for t in items for p in t['phases']})
+        totals = sorted(t['total_ms'] for t in items)
+        phases = {}
+        for phase in phase_names:
+            values = sorted(t['phases'].get(phase, 0.0) for t in items)
+            phases[phase] = (_percentile(values, 0.5), _percentile(values, 0.95), _percentile(values, 0.99))
+        report.append({
+            'command': name,
+            'count': len(items),
+            'errors': sum(1 for t in items if t['error']),
+            'total': (_percentile(totals, 0.5), _percentile(totals, 0.95), _percentile(totals, 0.99)),
+            'phases': phases
+        })
+    report.sort(key=lambda r: r['total'][1], reverse=True)
+    return report
+
+
+def clear_traces():
+    with _traces_lock:
+        _traces.clear()
+
+
+class TracingCommandTree(app_commands.CommandTree):
+    """
+    Command tree that wraps every slash command (and autocomplete) invocation in a trace,
+    and in a cProfile session when the command is armed in core.profiler.
+    """
+    async def _call(self, interaction):
+        from core.profiler import command_profiler
+
+        name = (interaction.data or {}).get('name', 'unknown')
+        profile = None
+        if interaction.type is discord.InteractionType.autocomplete:
+            name = f"{name} (autocomplete)"
+        else:
+            profile = command_profiler.begin(name)
+        token = start_trace(name)
+        failed = True
+        try:
+            await super()._call(interaction)
+            failed = interaction.command_failed
+        finally:
+            finish_trace(token, error=failed)
+            if profile:
+                command_profiler.end(profile)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+from database.base import DATA_DIR
+
+logger = logging.getLogger('discord_bot.core.watchdog')
+
+# Heartbeat period of the loop probe and how late it may run before the loop counts as blocked
+LOOP_WATCHDOG_ENABLED = os.getenv('LOOP_WATCHDOG', '1') != '0'
+LOOP_WATCHDOG_INTERVAL = float(os.getenv('LOOP_WATCHDOG_INTERVAL', 0.1))
+LOOP_LAG_THRESHOLD = float(os.getenv('LOOP_LAG_THRESHOLD', 0.5))
+# Rotating diagnostics log (blocking incidents with stacks)
+DIAGNOSTICS_LOG_PATH = os.path.join(DATA_DIR, 'diagnostics.log')
+DIAGNOSTICS_LOG_MAX_BYTES = int(os.getenv('DIAGNOSTICS_LOG_MAX_BYTES', 1024 * 1024))
+DIAGNOSTICS_LOG_BACKUPS = 3
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Code we want blocking time attributed to
+_WATCHED_PATHS = (os.path.join(PROJECT_ROOT, 'database') + os.sep, os.path.join(PROJECT_ROOT, 'core', 'graphics.py'))
+
+
+def _diagnostics_logger():
+    diag = logging.getLogger('discord_bot.diagnostics')
+    if not diag.handlers:
+        os.makedirs(os.path.dirname(DIAGNOSTICS_LOG_PATH), exist_ok=True)
+        handler = RotatingFileHandler(DIAGNOSTICS_LOG_PATH, maxBytes=DIAGNOSTICS_LOG_MAX_BYTES,
+                                      backupCount=DIAGNOSTICS_LOG_BACKUPS, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        diag.addHandler(handler)
+        diag.setLevel(logging.INFO)
+        diag.propagate = False
+    return diag
+
+
+def _culprit(stack) -> str:
+    """Outermost database/* or core/graphics frame of a stack (the call that was made from bot code), else the innermost frame."""
+    for frame in stack:
+        if os.path.abspath(frame.filename).startswith(_WATCHED_PATHS):
+            return f"{os.path.relpath(frame.filename, PROJECT_ROOT)} in {frame.name}"
+    frame = stack[-1]
+    return f"{frame.filename} in {frame.name}"
+
+
+class LoopWatchdog:
+    """
+    Detects event loop stalls. An asyncio task beats every `interval`; a sampler thread
+    notices when the beat is overdue by more than `threshold`, samples the loop thread's
+    stack until it recovers and writes the incident to the diagnostics log.
+    """
+    def __init__(self, interval: float = LOOP_WATCHDOG_INTERVAL, threshold: float = LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.sample_interval = interval / 2
+        self.max_lag = 0.0
+        self.incidents = 0
+        self._last_beat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._incident = None
+
+    def start(self):
+        """Starts the heartbeat task and the sampler thread (call from the running loop, e.g. setup_hook)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-watchdog")
+        self._thread = threading.Thread(target=self._sample_loop, name="loop-watchdog-sampler", daemon=True)
+        self._thread.start()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - expected)
+            self._last_beat = now
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.sample_interval):
+            last_beat = self._last_beat
+            if time.monotonic() - last_beat < self.interval + self.threshold:
+                if self._incident is not None:
+                    self._finish_incident(last_beat)
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            if self._incident is None:
+                self._incident = {'start': last_beat, 'stack': stack, 'culprits': Counter()}
+            self._incident['culprits'][_culprit(stack)] += 1
+
+    def _finish_incident(self, recovered_at: float):
+        incident, self._incident = self._incident, None
+        blocked = recovered_at - incident['start'] - self.interval
+        self.incidents += 1
+
+        lines = [f"Event loop blocked for {blocked:.2f}s (threshold {self.threshold:.2f}s)"]
+        for culprit, samples in incident['culprits'].most_common(5):
+            lines.append(f"  ~{samples * self.sample_interval:.2f}s ({samples} samples) {culprit}")
+        lines.append("Loop thread stack at first sample:")
+        lines.extend(line.rstrip() for line in traceback.format_list(incident['stack']))
+        _diagnostics_logger().warning("\n".join(lines))
+
+        top = incident['culprits'].most_common(1)[0][0]
+        logger.warning(f"Event loop blocked for {blocked:.2f}s, mostly in {top} (details in {DIAGNOSTICS_LOG_PATH})")
+
+    def stop(self):
+        """Stops the heartbeat task and the sampler thread."""
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
@@ -1,8 +1,14 @@
 from .base import (
     get_connection,
+    open_upload,
     backup_database,
     restore_database,
     create_tables,
+    get_query_stats,
+    reset_query_stats,
+    add_query_listener,
+    SLOW_QUERY_MS,
+    SCHEMA_VERSION,
     DATABASE_PATH,
     DATA_DIR
 )
@@ -10,6 +16,7 @@ from .kvk import (
     import_snapshot,
     import_requirements,
     get_snapshot_data,
+    get_snapshot_columns,
     save_period_results,
     get_requirements,
     get_all_requirements,
@@ -31,6 +38,8 @@ from .kvk import (
     get_player_start_snapshot,
     get_total_stats_for_players,
     get_kingdom_start_snapshot,
+    get_kingdom_aggregate,
+    get_seasons_with_results,
     get_snapshot_player_data,
     get_player_rank,
     get_player_stats,
@@ -40,23 +49,34 @@ from .kvk import (
     get_played_seasons,
     delete_snapshot,
     clear_season_cache,
-    get_player_cross_kvk_stats
+    get_cache_stats,
+    get_player_cross_kvk_stats,
+    get_kingdom_cross_kvk_stats
+)
+from .active_season import (
+    invalidate_active_season,
+    get_active_season_stats
 )
 from .forts import (
     import_fort_stats,
     get_fort_periods,
     get_player_fort_stats_history,
     get_fort_leaderboard,
+    get_fort_stats_for_players,
+    get_player_fort_stats,
     get_fort_seasons,
     get_fort_stats,
     clear_all_fort_data,
     delete_fort_period,
+    rebuild_fort_aggregates,
     get_latest_fort_activity,
     get_fort_last_updated
 )
 from .players import (
     import_kingdom_players,
     get_kingdom_player,
+    get_player,
+    search_players,
     get_all_kingdom_players,
     delete_player,
     link_account,
@@ -65,14 +85,19 @@ from .players import (
     unlink_account,
     add_new_player,
     get_all_players_global,
+    get_players_page,
+    count_players_global,
     set_player_type,
     get_player_type,
     get_all_player_types
 )
 from .admin import (
     log_admin_action,
+    log_admin_actions,
     set_reward_role,
     get_reward_role,
+    get_global_setting,
+    set_global_setting,
     get_global_requirements,
     set_global_requirements,
     get_global_requirements_as_list,
@@ -82,5 +107,9 @@ from .admin import (
     get_last_updated,
     get_dkp_formula,
     set_dkp_formula,
-    get_all_admin_logs
+    get_all_admin_logs,
+    iter_admin_logs,
+    count_admin_logs,
+    write_admin_logs_csv,
+    archive_admin_logs
 )
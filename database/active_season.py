@@ -0,0 +1,256 @@
+import os
+import time
+import logging
+import threading
+from contextlib import closing
+from .base import get_connection
+from .snapshots import SNAPSHOT_COLUMNS
+
+logger = logging.getLogger('db_manager.active_season')
+
+# In-memory mirror of the active season (off by default; SQLite stays the source of truth)
+ACTIVE_SEASON_CACHE = os.getenv('ACTIVE_SEASON_CACHE', '0') == '1'
+
+TOTAL_COLUMNS = ('kill_points', 'deaths', 't1_kills', 't2_kills', 't3_kills', 't4_kills', 't5_kills')
+
+_lock = threading.Lock()
+_generation = 0
+_model = None
+_stats = {'hits': 0, 'builds': 0, 'last_build_ms': 0.0}
+
+
+class ActiveSeasonModel:
+    """
+    Immutable struct-of-arrays view of one season: per-player totals from kvk_stats, the
+    roster (kingdom_players), each player's first start snapshot and the requirement brackets.
+    Row i of every array belongs to player_ids[i]; `index` maps player_id -> i.
+    The methods return the same shapes as the SQL readers they stand in for.
+    """
+    def __init__(self, kvk_name: str, generation: int):
+        self.kvk_name = kvk_name
+        self.generation = generation
+
+    @classmethod
+    def load(cls, kvk_name: str, generation: int):
+        import numpy as np
+        with closing(get_connection()) as conn:
+            cursor = conn.cursor()
+            # One read transaction so all tables come from the same state
+            cursor.execute("BEGIN")
+            # Totals per player, grouped like the SQL readers (so player_name resolves the same way)
+            cursor.execute(f'''
+                SELECT player_id, player_name, {", ".join(f"SUM({c})" for c in TOTAL_COLUMNS)}
+                FROM kvk_stats WHERE kvk_name = ?
+                GROUP BY player_id
+            ''', (kvk_name,))
+            totals = cursor.fetchall()
+            # Current power is the player's latest row
+            cursor.execute('''
+                SELECT player_id, power FROM kvk_stats
+                WHERE rowid IN (SELECT MAX(rowid) FROM kvk_stats WHERE kvk_name = ? GROUP BY player_id)
+            ''', (kvk_name,))
+            latest_power = dict(cursor.fetchall())
+            cursor.execute("SELECT player_id, player_name, power FROM kingdom_players WHERE kvk_name = ?", (kvk_name,))
+            roster = cursor.fetchall()
+            cursor.execute(f'''
+                SELECT player_id, player_name, {", ".join(SNAPSHOT_COLUMNS)}, period_key FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY player_id ORDER BY period_key) AS n
+                    FROM kvk_snapshots WHERE kvk_name = ? AND snapshot_type = 'start'
+                ) WHERE n = 1
+            ''', (kvk_name,))
+            starts = cursor.fetchall()
+            cursor.execute("SELECT MIN(period_key) FROM kvk_snapshots WHERE kvk_name = ?", (kvk_name,))
+            first_period = cursor.fetchone()[0]
+            cursor.execute("SELECT * FROM kvk_requirements WHERE kvk_name = ?", (kvk_name,))
+            columns = [d[0] for d in cursor.description]
+            requirements = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            conn.rollback()
+
+        model = cls(kvk_name, generation)
+        ids = sorted({r[0] for r in totals} | {r[0] for r in roster} | {r[0] for r in starts})
+        n = len(ids)
+        model.player_ids = np.array(ids, dtype=np.int64)
+        model.index = {pid: i for i, pid in enumerate(ids)}
+
+        def column(rows, pos):
+            out = np.zeros(n, dtype=np.int64)
+            if rows:
+                out[[model.index[r[0]] for r in rows]] = [r[pos] or 0 for r in rows]
+            return out
+
+        def flags(rows):
+            out = np.zeros(n, dtype=bool)
+            out[[model.index[r[0]] for r in rows]] = True
+            return out
+
+        def names(rows, pos=1):
+            out = [None] * n
+            for r in rows:
+                out[model.index[r[0]]] = r[pos]
+            return out
+
+        model.has_totals = flags(totals)
+        model.name = names(totals)
+        model.total_power = column([(r[0], latest_power.get(r[0])) for r in totals], 1)
+        model.totals = {c: column(totals, 2 + i) for i, c in enumerate(TOTAL_COLUMNS)}
+
+        model.in_roster = flags(roster)
+        model.roster_name = names(roster)
+        model.roster_power = column(roster, 2)
+
+        model.has_start = flags(starts)
+        model.start_name = names(starts)
+        model.start = {c: column(starts, 2 + i) for i, c in enumerate(SNAPSHOT_COLUMNS)}
+        model.start_period = names(starts, 2 + len(SNAPSHOT_COLUMNS))
+
+        # RANK() by total KP: 1 + number of players with strictly more
+        kp = model.totals['kill_points']
+        ranked = np.sort(kp[model.has_totals])
+        model.rank = np.where(model.has_totals, len(ranked) - np.searchsorted(ranked, kp, side='right') + 1, 0)
+        holders = np.flatnonzero(model.has_totals)
+        model.leaderboard = holders[np.argsort(-kp[holders], kind='stable')]
+
+        if len(holders):
+            model.kingdom = {
+                'player_count': len(holders),
+                'kingdom_power': int(model.total_power[holders].sum()),
+                'kingdom_kill_points': int(kp[holders].sum()),
+                'kingdom_deaths': int(model.totals['deaths'][holders].sum()),
+                'kingdom_t4_kills': int(model.totals['t4_kills'][holders].sum()),
+                'kingdom_t5_kills': int(model.totals['t5_kills'][holders].sum()),
+            }
+        else:
+            model.kingdom = {'player_count': 0, 'kingdom_power': None, 'kingdom_kill_points': None, 'kingdom_deaths': None,
+                             'kingdom_t4_kills': None, 'kingdom_t5_kills': None}
+
+        model.kingdom_start = None
+        if first_period:
+            first = model.has_start & np.array([p == first_period for p in model.start_period], dtype=bool)
+            if first.any():
+                model.kingdom_start = {
+                    'kingdom_power': int(model.start['power'][first].sum()),
+                    'kingdom_kill_points': int(model.start['kill_points'][first].sum()),
+                    'kingdom_deaths': int(model.start['deaths'][first].sum()),
+                }
+            else:
+                model.kingdom_start = {'kingdom_power': None, 'kingdom_kill_points': None, 'kingdom_deaths': None}
+
+        model.requirements = requirements
+        model.req_min = np.array([r['min_power'] if r['min_power'] is not None else np.iinfo(np.int64).max for r in requirements], dtype=np.int64)
+        model.req_max = np.array([r['max_power'] if r['max_power'] is not None else np.iinfo(np.int64).min for r in requirements], dtype=np.int64)
+        return model
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def _totals_row(self, i: int, with_id: bool = False, tiers=TOTAL_COLUMNS) -> dict:
+        row = {'player_id': int(self.player_ids[i])} if with_id else {}
+        row['player_name'] = self.name[i]
+        row['total_power'] = int(self.total_power[i])
+        for c in tiers:
+            row[f"total_{c}"] = int(self.totals[c][i])
+        return row
+
+    def player_totals(self, player_id: int):
+        """get_player_stats_by_period(..., "all")"""
+        i = self.index.get(player_id)
+        return self._totals_row(i) if i is not None and self.has_totals[i] else None
+
+    def totals_for_players(self, player_ids: list) -> dict:
+        """get_total_stats_for_players"""
+        out = {}
+        for pid in player_ids:
+            i = self.index.get(pid)
+            if i is not None and self.has_totals[i]:
+                out[pid] = self._totals_row(i, with_id=True)
+        return out
+
+    def all_totals(self) -> list:
+        """get_all_kvk_stats (KP descending)"""
+        tiers = ('kill_points', 'deaths', 't4_kills', 't5_kills')
+        return [self._totals_row(i, with_id=True, tiers=tiers) for i in self.leaderboard]
+
+    def player_rank(self, player_id: int):
+        i = self.index.get(player_id)
+        return int(self.rank[i]) if i is not None and self.has_totals[i] else None
+
+    def kingdom_totals(self) -> dict:
+        """get_kingdom_stats_by_period(..., "all")"""
+        return dict(self.kingdom)
+
+    def kingdom_start_snapshot(self):
+        return dict(self.kingdom_start) if self.kingdom_start is not None else None
+
+    def kingdom_player(self, player_id: int):
+        i = self.index.get(player_id)
+        if i is None or not self.in_roster[i]:
+            return None
+        return {'player_id': player_id, 'player_name': self.roster_name[i], 'power': int(self.roster_power[i]), 'kvk_name': self.kvk_name}
+
+    def start_snapshot(self, player_id: int):
+        """get_player_start_snapshot"""
+        i = self.index.get(player_id)
+        if i is None or not self.has_start[i]:
+            return None
+        row = {'player_id': player_id, 'player_name': self.start_name[i]}
+        for c in SNAPSHOT_COLUMNS:
+            row[c] = int(self.start[c][i])
+        row.update(kvk_name=self.kvk_name, period_key=self.start_period[i], snapshot_type='start')
+        return row
+
+    def requirements_for(self, power: int):
+        """get_requirements: first bracket with min_power <= power <= max_power."""
+        if power is None or not self.requirements:
+            return None
+        hits = ((self.req_min <= power) & (power <= self.req_max)).nonzero()[0]
+        return dict(self.requirements[hits[0]]) if len(hits) else None
+
+
+def get_active_season_model(kvk_name: str):
+    """
+    Returns the in-memory model if ACTIVE_SEASON_CACHE is on and `kvk_name` is the active season,
+    else None (callers then query SQLite). Rebuilt on the first read after a write.
+    """
+    global _model
+    if not ACTIVE_SEASON_CACHE or not kvk_name:
+        return None
+    from .kvk import get_current_kvk_name
+    if kvk_name != get_current_kvk_name():
+        return None
+
+    model = _model
+    if model is None or model.kvk_name != kvk_name or model.generation != _generation:
+        with _lock:
+            model = _model
+            if model is None or model.kvk_name != kvk_name or model.generation != _generation:
+                generation = _generation
+                start = time.perf_counter()
+                try:
+                    model = ActiveSeasonModel.load(kvk_name, generation)
+                except Exception as e:
+                    logger.error(f"Error building active season model: {e}")
+                    return None
+                _stats['builds'] += 1
+                _stats['last_build_ms'] = (time.perf_counter() - start) * 1000
+                # Swapped in whole; readers holding the previous model keep a consistent view
+                _model = model
+                return model
+    _stats['hits'] += 1
+    return model
+
+def invalidate_active_season():
+    """Marks the in-memory model stale. Call after writing kvk_stats, kvk_snapshots, kingdom_players or kvk_requirements."""
+    global _generation
+    with _lock:
+        _generation += 1
+
+def get_active_season_stats() -> dict:
+    """Whether the mirror is on, which season it holds, its size and hit / build counts."""
+    model = _model
+    return {
+        'enabled': ACTIVE_SEASON_CACHE,
+        'kvk_name': model.kvk_name if model else None,
+        'players': len(model) if model else 0,
+        'fresh': bool(model) and model.generation == _generation,
+        **_stats
+    }
@@ -1,7 +1,16 @@
 import sqlite3
 import logging
+import os
+import csv
+import gzip
+import io
 from contextlib import closing
-from .base import get_connection
+from .base import get_connection, open_upload, DATA_DIR
+from .active_season import invalidate_active_season
+
+# Side database that receives admin_logs rows older than the retention window
+ADMIN_LOG_ARCHIVE_PATH = os.path.join(DATA_DIR, 'admin_logs_archive.db')
+ADMIN_LOG_COLUMNS = ['id', 'admin_id', 'admin_name', 'action', 'details', 'timestamp']
 
 logger = logging.getLogger('db_manager.admin')
 
@@ -18,6 +27,20 @@ def log_admin_action(admin_id: int, admin_name: str, action: str, details: str):
     except Exception as e:
         logger.error(f"Error logging admin action: {e}")
 
+def log_admin_actions(entries: list):
+    """
+    Writes a batch of admin log entries in one transaction.
+    entries: list of (admin_id, admin_name, action, details, timestamp) tuples; timestamp in UTC "YYYY-MM-DD HH:MM:SS".
+    Raises on failure so the caller can retry the batch.
+    """
+    if not entries: return
+    with closing(get_connection()) as conn:
+        conn.executemany('''
+            INSERT INTO admin_logs (admin_id, admin_name, action, details, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        ''', entries)
+        conn.commit()
+
 def get_all_admin_logs():
     """Retrieves all admin logs."""
     try:
@@ -30,6 +53,153 @@ def get_all_admin_logs():
         logger.error(f"Error getting admin logs: {e}")
         return []
 
+def _admin_log_filter(start: str = None, end: str = None, admin_id: int = None):
+    """Builds the WHERE clause for admin log queries. start/end: 'YYYY-MM-DD[ HH:MM:SS]' (UTC), end exclusive."""
+    clauses, params = [], []
+    if start:
+        clauses.append("timestamp >= ?")
+        params.append(start)
+    if end:
+        clauses.append("timestamp < ?")
+        params.append(end)
+    if admin_id is not None:
+        clauses.append("admin_id = ?")
+        params.append(admin_id)
+    return clauses, params
+
+def _admin_log_connection(archived: bool):
+    if archived:
+        if not os.path.exists(ADMIN_LOG_ARCHIVE_PATH):
+            return None
+        return sqlite3.connect(ADMIN_LOG_ARCHIVE_PATH)
+    return get_connection()
+
+def iter_admin_logs(start: str = None, end: str = None, admin_id: int = None, batch_size: int = 1000, archived: bool = False):
+    """
+    Yields admin log rows (dicts) oldest first, filtered by time range [start, end) and admin.
+    Reads in keyset-paginated batches on (timestamp, id), so memory stays flat and no read
+    transaction is held open between batches.
+    archived=True reads the retention archive instead of the live table.
+    """
+    clauses, params = _admin_log_filter(start, end, admin_id)
+    last = None
+    while True:
+        page_clauses, page_params = list(clauses), list(params)
+        if last is not None:
+            page_clauses.append("(timestamp, id) > (?, ?)")
+            page_params.extend(last)
+        where = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+        try:
+            conn = _admin_log_connection(archived)
+            if conn is None:
+                return
+            with closing(conn):
+                conn.row_factory = sqlite3.Row
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT id, admin_id, admin_name, action, details, timestamp
+                    FROM admin_logs {where}
+                    ORDER BY timestamp, id
+                    LIMIT ?
+                ''', page_params + [batch_size])
+                rows = [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error reading admin logs: {e}")
+            return
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last = (rows[-1]['timestamp'], rows[-1]['id'])
+
+def count_admin_logs(start: str = None, end: str = None, admin_id: int = None, archived: bool = False) -> int:
+    """Counts admin log rows in the time range [start, end), optionally for one admin."""
+    clauses, params = _admin_log_filter(start, end, admin_id)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    try:
+        conn = _admin_log_connection(archived)
+        if conn is None:
+            return 0
+        with closing(conn):
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM admin_logs {where}", params)
+            return cursor.fetchone()[0]
+    except Exception as e:
+        logger.error(f"Error counting admin logs: {e}")
+        return 0
+
+def write_admin_logs_csv(dest, start: str = None, end: str = None, admin_id: int = None, compress: bool = False, archived: bool = False) -> int:
+    """
+    Streams admin logs as CSV into the binary file object `dest` (gzip-compressed if compress=True).
+    Returns the number of rows written. `dest` is left open and positioned at the end.
+    """
+    raw = gzip.GzipFile(fileobj=dest, mode='wb') if compress else dest
+    text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(['ID', 'Admin ID', 'Admin Name', 'Action', 'Details', 'Timestamp'])
+    count = 0
+    for log in iter_admin_logs(start, end, admin_id, archived=archived):
+        writer.writerow([log[c] for c in ADMIN_LOG_COLUMNS])
+        count += 1
+    text.flush()
+    text.detach()
+    if compress:
+        raw.close()
+    return count
+
+def archive_admin_logs(before: str, batch_size: int = 5000) -> int:
+    """
+    Moves admin_logs rows with timestamp < `before` into the side archive database
+    (ADMIN_LOG_ARCHIVE_PATH). Works in batches so the live table is only locked briefly.
+    Returns the number of rows archived.
+    """
+    moved = 0
+    try:
+        with closing(get_connection()) as conn:
+            cursor = conn.cursor()
+            cursor.execute("ATTACH DATABASE ? AS archive", (ADMIN_LOG_ARCHIVE_PATH,))
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS archive.admin_logs (
+                    id INTEGER PRIMARY KEY,
+                    admin_id INTEGER,
+                    admin_name TEXT,
+                    action TEXT,
+                    details TEXT,
+                    timestamp DATETIME
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS archive.idx_admin_logs_time ON admin_logs(timestamp, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS archive.idx_admin_logs_admin ON admin_logs(admin_id, timestamp)')
+            conn.commit()
+
+            while True:
+                cursor.execute('''
+                    SELECT id FROM main.admin_logs
+                    WHERE timestamp < ?
+                    ORDER BY timestamp, id
+                    LIMIT ?
+                ''', (before, batch_size))
+                ids = [row[0] for row in cursor.fetchall()]
+                if not ids:
+                    break
+                placeholders = ",".join("?" * len(ids))
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO archive.admin_logs (id, admin_id, admin_name, action, details, timestamp)
+                    SELECT id, admin_id, admin_name, action, details, timestamp
+                    FROM main.admin_logs WHERE id IN ({placeholders})
+                ''', ids)
+                cursor.execute(f"DELETE FROM main.admin_logs WHERE id IN ({placeholders})", ids)
+                conn.commit()
+                moved += len(ids)
+                if len(ids) < batch_size:
+                    break
+            cursor.execute("DETACH DATABASE archive")
+        if moved:
+            logger.info(f"Archived {moved} admin log entries older than {before}.")
+        return moved
+    except Exception as e:
+        logger.error(f"Error archiving admin logs: {e}")
+        return moved
+
 def set_reward_role(role_id: int):
     """Sets the reward role ID in the database."""
     try:
@@ -54,6 +224,30 @@ def get_reward_role():
         logger.error(f"Error getting reward role: {e}")
         return None
 
+def get_global_setting(setting_key: str):
+    """Returns a value from global_settings or None."""
+    try:
+        with closing(get_connection()) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT setting_value FROM global_settings WHERE setting_key = ?", (setting_key,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+    except Exception as e:
+        logger.error(f"Error getting global setting {setting_key}: {e}")
+        return None
+
+def set_global_setting(setting_key: str, setting_value: str):
+    """Saves a value in global_settings."""
+    try:
+        with closing(get_connection()) as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT OR REPLACE INTO global_settings (setting_key, setting_value) VALUES (?, ?)", (setting_key, setting_value))
+            conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Error setting global setting {setting_key}: {e}")
+        return False
+
 def get_global_requirements():
     """Returns the global requirements setting as a JSON string or None."""
     try:
@@ -104,9 +298,10 @@ def get_global_requirements_as_list():
         return []
 
 
-def set_global_requirements_from_file(file_path: str):
+def set_global_requirements_from_file(source):
     """
     Loads global requirements from an Excel file and saves them.
+    source: file path, raw bytes or binary file-like object.
     Format: min_power, max_power, required_kills, required_deaths
     
     Returns:
@@ -116,7 +311,7 @@ def set_global_requirements_from_file(file_path: str):
         import pandas as pd
         import json
         
-        df = pd.read_excel(file_path)
+        df = pd.read_excel(open_upload(source))
         df.columns = [c.strip().lower() for c in df.columns]
         
         # Map column names
@@ -170,11 +365,13 @@ def reset_all_data():
                 'kvk_stats', 'kvk_snapshots', 'kvk_requirements', 
                 'linked_accounts', 'kvk_settings', 'admin_logs', 
                 'kingdom_players', 'kvk_seasons', 'fort_stats', 
-                'fort_periods', 'global_settings'
+                'fort_totals', 'fort_periods', 'global_settings', 'players',
+                'player_best_snapshots', 'player_name_history', 'kingdom_period_aggregates'
             ]
             for table in tables:
                 cursor.execute(f"DELETE FROM {table}")
             conn.commit()
+            invalidate_active_season()
         return True
     except Exception as e:
         logger.error(f"Error resetting all data: {e}")
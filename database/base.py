@@ -1,6 +1,12 @@
 import sqlite3
 import os
+import io
+import re
+import sys
+import time
 import logging
+import threading
+import weakref
 from contextlib import closing
 
 # Logging configuration
@@ -12,10 +18,292 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DATA_DIR = os.getenv('DATA_PATH', os.path.join(PROJECT_ROOT, 'data'))
 DATABASE_PATH = os.path.join(DATA_DIR, 'kvk_data.db')
 
+# Query instrumentation: per-statement / per-function timings, slow statements are logged with their plan
+QUERY_STATS_ENABLED = os.getenv('QUERY_STATS', '1') != '0'
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+# Histogram bucket upper bounds in milliseconds (last bucket is everything above)
+QUERY_HISTOGRAM_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_query_stats_lock = threading.Lock()
+_statement_stats = {}
+_function_stats = {}
+_query_listeners = []
+_PLACEHOLDER_RUN = re.compile(r"\?(\s*,\s*\?){2,}")
+
+
+def _new_stat():
+    return {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'buckets': [0] * (len(QUERY_HISTOGRAM_BUCKETS) + 1)}
+
+def _add_sample(stats: dict, key: str, elapsed_ms: float, rows: int):
+    stat = stats.get(key)
+    if stat is None:
+        stat = stats[key] = _new_stat()
+    stat['count'] += 1
+    stat['total_ms'] += elapsed_ms
+    stat['rows'] += rows
+    if elapsed_ms > stat['max_ms']:
+        stat['max_ms'] = elapsed_ms
+    for i, bound in enumerate(QUERY_HISTOGRAM_BUCKETS):
+        if elapsed_ms <= bound:
+            stat['buckets'][i] += 1
+            break
+    else:
+        stat['buckets'][-1] += 1
+
+def _normalize_sql(sql: str) -> str:
+    """Collapses whitespace and variable-length IN lists so one statement shape maps to one key."""
+    return _PLACEHOLDER_RUN.sub("?, ...", " ".join(sql.split()))
+
+def _calling_db_function() -> str:
+    """Returns 'module.function' of the outermost database-layer frame on the stack (the public entry point)."""
+    frame = sys._getframe(1)
+    found = None
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith('database.'):
+            # Skip the instrumentation wrappers themselves
+            if not (module == __name__ and 'self' in frame.f_locals and isinstance(frame.f_locals['self'], (sqlite3.Cursor, sqlite3.Connection))):
+                found = f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+        elif found:
+            break
+        frame = frame.f_back
+    return found or 'other'
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor that times each statement from execute() until its rows are consumed
+    (SQLite does most of the work while stepping, not in execute itself).
+    """
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._pending = None
+        connection._cursors.add(self)
+
+    def _begin(self, sql, params):
+        self._finish()
+        self._pending = [sql, params, _calling_db_function(), 0.0, 0]
+
+    def _track(self, start: float, rows: int):
+        if self._pending is not None:
+            self._pending[3] += (time.perf_counter() - start) * 1000
+            self._pending[4] += rows
+
+    def _finish(self, blocking: bool = True):
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        sql, params, function, elapsed_ms, rows = pending
+        if rows == 0 and self.rowcount > 0:
+            rows = self.rowcount  # INSERT / UPDATE / DELETE
+        key = _normalize_sql(sql)
+        if not _query_stats_lock.acquire(blocking=blocking):
+            return
+        try:
+            _add_sample(_statement_stats, key, elapsed_ms, rows)
+            _add_sample(_function_stats, function, elapsed_ms, rows)
+        finally:
+            _query_stats_lock.release()
+        for listener in _query_listeners:
+            try:
+                listener(function, elapsed_ms)
+            except Exception:
+                pass
+        if elapsed_ms >= SLOW_QUERY_MS:
+            self._log_slow(sql, params, function, elapsed_ms, rows)
+
+    def _log_slow(self, sql, params, function, elapsed_ms, rows):
+        plan = ""
+        try:
+            plan_rows = sqlite3.Connection.execute(self.connection, f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            plan = "\n".join(f"    {row[3]}" for row in plan_rows)
+        except Exception:
+            pass
+        logger.warning(f"Slow query ({elapsed_ms:.1f} ms, {rows} rows) in {function}: {_normalize_sql(sql)[:500]}" + (f"\n{plan}" if plan else ""))
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._track(start, 0)
+            if self.description is None:
+                self._finish()  # no result set (INSERT / UPDATE / DDL), nothing left to time
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        self._begin(sql, seq_of_parameters[0] if seq_of_parameters else ())
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._track(start, 0)
+            self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._track(start, 1 if row is not None else 0)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._track(start, len(rows))
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._track(start, len(rows))
+        self._finish()
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._finish()
+            raise
+        self._track(start, 1)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # e.g. conn.execute(...).fetchone() drops the cursor before it is exhausted.
+        # The GC can run this while the same thread holds _query_stats_lock, so never wait
+        # for it here; the sample is skipped instead.
+        if self._pending is not None:
+            self._finish(blocking=False)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors feed the query statistics (see get_query_stats)."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursors = weakref.WeakSet()
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        # Statements whose rows were never fully read are recorded now
+        for cursor in list(self._cursors):
+            cursor._finish()
+        super().close()
+
+
 def get_connection():
-    """Returns a new sqlite3 connection."""
+    """Returns a new sqlite3 connection (instrumented unless QUERY_STATS=0)."""
+    if QUERY_STATS_ENABLED:
+        return sqlite3.connect(DATABASE_PATH, factory=InstrumentedConnection)
     return sqlite3.connect(DATABASE_PATH)
 
+def _percentile_ms(stat: dict, fraction: float) -> float:
+    """Estimates a percentile from the histogram (upper bound of the bucket it falls in)."""
+    target = stat['count'] * fraction
+    seen = 0
+    for i, n in enumerate(stat['buckets']):
+        seen += n
+        if n and seen >= target:
+            return float(QUERY_HISTOGRAM_BUCKETS[i]) if i < len(QUERY_HISTOGRAM_BUCKETS) else stat['max_ms']
+    return stat['max_ms']
+
+def get_query_stats(limit: int = 20) -> dict:
+    """
+    Returns the slowest entries of the query statistics, by total time.
+    {'functions': [...], 'statements': [...]}; each entry has name, count, total_ms, avg_ms, p95_ms, max_ms, rows, buckets.
+    """
+    def summarize(stats):
+        entries = []
+        for name, stat in stats.items():
+            entries.append({
+                'name': name,
+                'count': stat['count'],
+                'total_ms': stat['total_ms'],
+                'avg_ms': stat['total_ms'] / stat['count'] if stat['count'] else 0.0,
+                'p95_ms': _percentile_ms(stat, 0.95),
+                'max_ms': stat['max_ms'],
+                'rows': stat['rows'],
+                'buckets': list(stat['buckets'])
+            })
+        entries.sort(key=lambda e: e['total_ms'], reverse=True)
+        return entries[:limit]
+
+    with _query_stats_lock:
+        return {'functions': summarize(_function_stats), 'statements': summarize(_statement_stats)}
+
+def add_query_listener(listener):
+    """Registers listener(function_name, elapsed_ms), called after every instrumented statement."""
+    if listener not in _query_listeners:
+        _query_listeners.append(listener)
+
+def reset_query_stats():
+    """Clears all collected query statistics."""
+    with _query_stats_lock:
+        _statement_stats.clear()
+        _function_stats.clear()
+
+def open_upload(source):
+    """
+    Normalizes an upload source for readers like pandas.
+    Accepts a file path, raw bytes or a binary file-like object (e.g. a spooled temp file).
+    Paths are returned unchanged, bytes are wrapped in BytesIO and buffers are rewound.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if isinstance(source, (str, os.PathLike)):
+        return source
+    source.seek(0)
+    return source
+
+# Resolves a player's account type: manual override > linked account > 'main'
+_ACCOUNT_TYPE_SQL = """
+    COALESCE(
+        (SELECT account_type FROM player_types WHERE player_id = {pid}),
+        (SELECT account_type FROM linked_accounts WHERE player_id = {pid} LIMIT 1),
+        'main'
+    )
+"""
+
+def _upsert_players(cursor, rows):
+    """
+    Records players seen by an import in the players directory.
+    rows: iterable of (player_id, player_name, power); power may be None (e.g. fort sheets).
+    Every distinct name is also kept in player_name_history for search.
+    """
+    rows = list(rows)
+    cursor.executemany(f'''
+        INSERT INTO players (player_id, latest_name, latest_power, account_type)
+        VALUES (?1, ?2, ?3, {_ACCOUNT_TYPE_SQL.format(pid="?1")})
+        ON CONFLICT(player_id) DO UPDATE SET
+            latest_name = excluded.latest_name,
+            latest_power = COALESCE(excluded.latest_power, latest_power),
+            last_seen = CURRENT_TIMESTAMP
+    ''', rows)
+    cursor.executemany('''
+        INSERT OR IGNORE INTO player_name_history (player_id, name) VALUES (?, ?)
+    ''', [(pid, name) for pid, name, _ in rows])
+
+def _sync_player_account_type(cursor, player_id: int):
+    """Refreshes the cached account_type of a player in the directory."""
+    cursor.execute(f"UPDATE players SET account_type = {_ACCOUNT_TYPE_SQL.format(pid='?1')} WHERE player_id = ?1", (player_id,))
+
 def backup_database():
     """
     Creates a backup of the database file.
@@ -41,226 +329,418 @@ def backup_database():
         logger.error(f"Error creating database backup: {e}")
         return None
 
-def restore_database(uploaded_path: str):
+def restore_database(source):
     """
-    Restores the database from an uploaded backup file.
-    1. Creates a safety backup of the current DB
-    2. Replaces the active DB with the uploaded file
+    Restores the database from an uploaded backup.
+    `source` may be a file path, raw bytes or a binary file-like object.
+    1. Writes the upload to a staging file next to the active DB and validates it
+    2. Creates a safety backup of the current DB
+    3. Atomically replaces the active DB with the staging file
     
     Returns:
         (success: bool, message: str, safety_backup_path: str or None)
     """
     import shutil
     
+    staging_path = DATABASE_PATH + '.restore'
     try:
+        upload = open_upload(source)
+        if isinstance(upload, (str, os.PathLike)):
+            shutil.copy2(upload, staging_path)
+        else:
+            with open(staging_path, 'wb') as f:
+                shutil.copyfileobj(upload, f)
+
         # Validate that uploaded file is a valid SQLite database
         try:
-            test_conn = sqlite3.connect(uploaded_path)
-            test_conn.execute("SELECT name FROM sqlite_master WHERE type='table' LIMIT 1")
-            test_conn.close()
+            with closing(sqlite3.connect(staging_path)) as test_conn:
+                test_conn.execute("SELECT name FROM sqlite_master WHERE type='table' LIMIT 1")
         except sqlite3.DatabaseError:
+            os.remove(staging_path)
             return False, "The uploaded file is not a valid SQLite database.", None
         
         # Create a safety backup before replacing
         safety_backup_path = backup_database()
         if not safety_backup_path:
+            os.remove(staging_path)
             return False, "Failed to create safety backup before restore. Aborting.", None
         
         # Replace the database file
-        shutil.copy2(uploaded_path, DATABASE_PATH)
+        os.replace(staging_path, DATABASE_PATH)
+        from .active_season import invalidate_active_season
+        invalidate_active_season()
         
-        logger.info(f"Database restored from {uploaded_path}. Safety backup at {safety_backup_path}")
+        logger.info(f"Database restored from upload. Safety backup at {safety_backup_path}")
         return True, "Database restored successfully!", safety_backup_path
         
     except Exception as e:
         logger.error(f"Error restoring database: {e}")
+        if os.path.exists(staging_path):
+            try:
+                os.remove(staging_path)
+            except OSError:
+                pass
         return False, f"Error during restore: {e}", None
 
-def create_tables():
-    """
-    Creates database tables if they do not exist.
-    """
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+def _migrate_base_tables(cursor):
+    """v1: every table plus the ad-hoc migrations and backfills that used to run on each startup."""
+    # Table for player statistics (Period results)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS kvk_stats (
+            player_id INTEGER,
+            player_name TEXT NOT NULL,
+            power INTEGER,
+            kill_points INTEGER,
+            deaths INTEGER,
+            t1_kills INTEGER,
+            t2_kills INTEGER,
+            t3_kills INTEGER,
+            t4_kills INTEGER,
+            t5_kills INTEGER,
+            kvk_name TEXT NOT NULL,
+            period_key TEXT NOT NULL,
+            PRIMARY KEY (player_id, kvk_name, period_key)
+        )
+    ''')
+
+    # Table for raw snapshots (Start/End)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS kvk_snapshots (
+            player_id INTEGER,
+            player_name TEXT NOT NULL,
+            power INTEGER,
+            kill_points INTEGER,
+            deaths INTEGER,
+            t1_kills INTEGER,
+            t2_kills INTEGER,
+            t3_kills INTEGER,
+            t4_kills INTEGER,
+            t5_kills INTEGER,
+            kvk_name TEXT NOT NULL,
+            period_key TEXT NOT NULL,
+            snapshot_type TEXT NOT NULL, -- 'start' or 'end'
+            PRIMARY KEY (player_id, kvk_name, period_key, snapshot_type)
+        )
+    ''')
 
+    # Table for requirements
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS kvk_requirements (
+            kvk_name TEXT NOT NULL,
+            min_power INTEGER,
+            max_power INTEGER,
+            required_kills INTEGER,
+            required_deaths INTEGER,
+            PRIMARY KEY (kvk_name, min_power)
+        )
+    ''')
+
+    # Migration: Rename column required_kill_points -> required_kills if exists
     try:
-        with closing(get_connection()) as conn:
-            cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(kvk_requirements)")
+        columns = [info[1] for info in cursor.fetchall()]
+        if 'required_kill_points' in columns and 'required_kills' not in columns:
+            cursor.execute("ALTER TABLE kvk_requirements ADD COLUMN required_kills INTEGER DEFAULT 0")
+    except Exception:
+        pass
 
-            # Table for player statistics (Period results)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS kvk_stats (
-                    player_id INTEGER,
-                    player_name TEXT NOT NULL,
-                    power INTEGER,
-                    kill_points INTEGER,
-                    deaths INTEGER,
-                    t1_kills INTEGER,
-                    t2_kills INTEGER,
-                    t3_kills INTEGER,
-                    t4_kills INTEGER,
-                    t5_kills INTEGER,
-                    kvk_name TEXT NOT NULL,
-                    period_key TEXT NOT NULL,
-                    PRIMARY KEY (player_id, kvk_name, period_key)
-                )
-            ''')
+    # Table for linking Discord IDs to game IDs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS linked_accounts (
+            discord_id INTEGER,
+            player_id INTEGER,
+            is_main_account INTEGER DEFAULT 0,
+            account_type TEXT DEFAULT 'main',
+            PRIMARY KEY (discord_id, player_id)
+        )
+    ''')
 
-            # Table for raw snapshots (Start/End)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS kvk_snapshots (
-                    player_id INTEGER,
-                    player_name TEXT NOT NULL,
-                    power INTEGER,
-                    kill_points INTEGER,
-                    deaths INTEGER,
-                    t1_kills INTEGER,
-                    t2_kills INTEGER,
-                    t3_kills INTEGER,
-                    t4_kills INTEGER,
-                    t5_kills INTEGER,
-                    kvk_name TEXT NOT NULL,
-                    period_key TEXT NOT NULL,
-                    snapshot_type TEXT NOT NULL, -- 'start' or 'end'
-                    PRIMARY KEY (player_id, kvk_name, period_key, snapshot_type)
-                )
-            ''')
+    # Migration: Add account_type if missing
+    try:
+        cursor.execute("ALTER TABLE linked_accounts ADD COLUMN account_type TEXT DEFAULT 'main'")
+    except sqlite3.OperationalError:
+        pass
 
-            # Table for requirements
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS kvk_requirements (
-                    kvk_name TEXT NOT NULL,
-                    min_power INTEGER,
-                    max_power INTEGER,
-                    required_kills INTEGER,
-                    required_deaths INTEGER,
-                    PRIMARY KEY (kvk_name, min_power)
-                )
-            ''')
-            
-            # Migration: Rename column required_kill_points -> required_kills if exists
-            try:
-                cursor.execute("PRAGMA table_info(kvk_requirements)")
-                columns = [info[1] for info in cursor.fetchall()]
-                if 'required_kill_points' in columns and 'required_kills' not in columns:
-                    cursor.execute("ALTER TABLE kvk_requirements ADD COLUMN required_kills INTEGER DEFAULT 0")
-            except Exception:
-                pass
+    # Table for storing KvK settings
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS kvk_settings (
+            setting_key TEXT PRIMARY KEY,
+            setting_value TEXT NOT NULL
+        )
+    ''')
 
-            # Table for linking Discord IDs to game IDs
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS linked_accounts (
-                    discord_id INTEGER,
-                    player_id INTEGER,
-                    is_main_account INTEGER DEFAULT 0,
-                    account_type TEXT DEFAULT 'main',
-                    PRIMARY KEY (discord_id, player_id)
-                )
-            ''')
-            
-            # Migration: Add account_type if missing
-            try:
-                cursor.execute("ALTER TABLE linked_accounts ADD COLUMN account_type TEXT DEFAULT 'main'")
-            except sqlite3.OperationalError:
-                pass
+    # Table for admin logs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS admin_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_id INTEGER,
+            admin_name TEXT,
+            action TEXT,
+            details TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
 
-            # Table for storing KvK settings
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS kvk_settings (
-                    setting_key TEXT PRIMARY KEY,
-                    setting_value TEXT NOT NULL
-                )
-            ''')
+    # Table for base kingdom player list
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS kingdom_players (
+            player_id INTEGER PRIMARY KEY,
+            player_name TEXT NOT NULL,
+            power INTEGER,
+            kvk_name TEXT NOT NULL
+        )
+    ''')
 
-            # Table for admin logs
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS admin_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    admin_id INTEGER,
-                    admin_name TEXT,
-                    action TEXT,
-                    details TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+    # Table for KvK Seasons
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS kvk_seasons (
+            value TEXT PRIMARY KEY,
+            label TEXT NOT NULL,
+            description TEXT,
+            start_date TEXT,
+            end_date TEXT,
+            is_active INTEGER DEFAULT 0,
+            is_archived INTEGER DEFAULT 0
+        )
+    ''')
 
-            # Table for base kingdom player list
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS kingdom_players (
-                    player_id INTEGER PRIMARY KEY,
-                    player_name TEXT NOT NULL,
-                    power INTEGER,
-                    kvk_name TEXT NOT NULL
-                )
-            ''')
+    # Table for fort statistics
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fort_stats (
+            player_id INTEGER,
+            player_name TEXT NOT NULL,
+            forts_joined INTEGER DEFAULT 0,
+            forts_launched INTEGER DEFAULT 0,
+            total_forts INTEGER DEFAULT 0,
+            penalties INTEGER DEFAULT 0,
+            kvk_name TEXT NOT NULL,
+            period_key TEXT NOT NULL,
+            PRIMARY KEY (player_id, kvk_name, period_key)
+        )
+    ''')
 
-            # Table for KvK Seasons
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS kvk_seasons (
-                    value TEXT PRIMARY KEY,
-                    label TEXT NOT NULL,
-                    description TEXT,
-                    start_date TEXT,
-                    end_date TEXT,
-                    is_active INTEGER DEFAULT 0,
-                    is_archived INTEGER DEFAULT 0
-                )
-            ''')
+    # Migration: Add per-period rank to fort_stats if missing
+    try:
+        cursor.execute("ALTER TABLE fort_stats ADD COLUMN rank INTEGER")
+    except sqlite3.OperationalError:
+        pass
 
-            # Table for fort statistics
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS fort_stats (
-                    player_id INTEGER,
-                    player_name TEXT NOT NULL,
-                    forts_joined INTEGER DEFAULT 0,
-                    forts_launched INTEGER DEFAULT 0,
-                    total_forts INTEGER DEFAULT 0,
-                    penalties INTEGER DEFAULT 0,
-                    kvk_name TEXT NOT NULL,
-                    period_key TEXT NOT NULL,
-                    PRIMARY KEY (player_id, kvk_name, period_key)
-                )
+    # Table for per-season fort totals (maintained by import_fort_stats / delete_fort_period)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fort_totals (
+            kvk_name TEXT NOT NULL,
+            player_id INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            forts_joined INTEGER DEFAULT 0,
+            forts_launched INTEGER DEFAULT 0,
+            total_forts INTEGER DEFAULT 0,
+            penalties INTEGER DEFAULT 0,
+            rank INTEGER,
+            PRIMARY KEY (kvk_name, player_id)
+        )
+    ''')
+
+    # Table for fort periods
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fort_periods (
+            kvk_name TEXT NOT NULL,
+            period_key TEXT NOT NULL,
+            period_label TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (kvk_name, period_key)
+        )
+    ''')
+
+    # Table for player types (for unlinked accounts or manual overrides)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_types (
+            player_id INTEGER PRIMARY KEY,
+            account_type TEXT NOT NULL DEFAULT 'main'
+        )
+    ''')
+
+    # Player directory: latest known name/power per player ID, upserted by every import
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS players (
+            player_id INTEGER PRIMARY KEY,
+            latest_name TEXT NOT NULL,
+            latest_power INTEGER,
+            first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+            account_type TEXT DEFAULT 'main'
+        )
+    ''')
+
+    # Backfill the directory from existing data (roster names win, as in the old lookups)
+    cursor.execute("SELECT 1 FROM players LIMIT 1")
+    if not cursor.fetchone():
+        for table, power_col in (('kingdom_players', 'power'), ('kvk_stats', 'power'),
+                                 ('kvk_snapshots', 'power'), ('fort_stats', 'NULL')):
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO players (player_id, latest_name, latest_power)
+                SELECT player_id, player_name, {power_col} FROM {table}
+                WHERE rowid IN (SELECT MAX(rowid) FROM {table} GROUP BY player_id)
             ''')
+        cursor.execute(f"UPDATE players SET account_type = {_ACCOUNT_TYPE_SQL.format(pid='players.player_id')}")
 
-            # Table for fort periods
+    # Every name a player has been imported under (source for name search)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_name_history (
+            id INTEGER PRIMARY KEY,
+            player_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            UNIQUE (player_id, name)
+        )
+    ''')
+    cursor.execute("SELECT 1 FROM player_name_history LIMIT 1")
+    if not cursor.fetchone():
+        for table in ('kingdom_players', 'kvk_stats', 'kvk_snapshots', 'fort_stats'):
+            cursor.execute(f"INSERT OR IGNORE INTO player_name_history (player_id, name) SELECT DISTINCT player_id, player_name FROM {table}")
+
+    # Trigram full-text index over player_name_history (needs SQLite 3.34+ with FTS5)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'player_names_fts'")
+    if not cursor.fetchone():
+        try:
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS fort_periods (
-                    kvk_name TEXT NOT NULL,
-                    period_key TEXT NOT NULL,
-                    period_label TEXT NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (kvk_name, period_key)
+                CREATE VIRTUAL TABLE player_names_fts USING fts5(
+                    name, content='player_name_history', content_rowid='id', tokenize='trigram'
                 )
             ''')
-
-            # Table for player types (for unlinked accounts or manual overrides)
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS player_types (
-                    player_id INTEGER PRIMARY KEY,
-                    account_type TEXT NOT NULL DEFAULT 'main'
-                )
+                CREATE TRIGGER IF NOT EXISTS player_name_history_ai AFTER INSERT ON player_name_history BEGIN
+                    INSERT INTO player_names_fts (rowid, name) VALUES (new.id, new.name);
+                END
             ''')
-
-            # Table for global settings
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS global_settings (
-                    setting_key TEXT PRIMARY KEY,
-                    setting_value TEXT NOT NULL
-                )
+                CREATE TRIGGER IF NOT EXISTS player_name_history_ad AFTER DELETE ON player_name_history BEGIN
+                    INSERT INTO player_names_fts (player_names_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                END
             ''')
+            cursor.execute("INSERT INTO player_names_fts (player_names_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 trigram index unavailable, player search will use LIKE: {e}")
 
-            # Create indexes
-            logger.info("Creating database indexes...")
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_kvk_stats_kvk_period ON kvk_stats(kvk_name, period_key)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_kvk_stats_player ON kvk_stats(kvk_name, player_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_kvk_snapshots_lookup ON kvk_snapshots(kvk_name, period_key, snapshot_type)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_kvk_snapshots_player ON kvk_snapshots(player_id, kvk_name)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_linked_discord ON linked_accounts(discord_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_linked_player ON linked_accounts(player_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_requirements_kvk ON kvk_requirements(kvk_name)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_fort_stats_kvk ON fort_stats(kvk_name, period_key)')
-            
-            conn.commit()
-            logger.info("Database tables and indexes verified.")
+    # Best snapshot per player (highest KP, then power; roster entry if never in a snapshot)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_best_snapshots (
+            player_id INTEGER PRIMARY KEY,
+            player_name TEXT NOT NULL,
+            power INTEGER DEFAULT 0,
+            kill_points INTEGER DEFAULT 0,
+            deaths INTEGER DEFAULT 0,
+            kvk_name TEXT NOT NULL,
+            period_key TEXT,
+            snapshot_type TEXT -- NULL for roster entries
+        )
+    ''')
+
+    # Table for global settings
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS global_settings (
+            setting_key TEXT PRIMARY KEY,
+            setting_value TEXT NOT NULL
+        )
+    ''')
+
+def _migrate_indexes(cursor):
+    """v2: lookup indexes."""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_kvk_stats_kvk_period ON kvk_stats(kvk_name, period_key)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_kvk_stats_player ON kvk_stats(kvk_name, player_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_kvk_snapshots_lookup ON kvk_snapshots(kvk_name, period_key, snapshot_type)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_kvk_snapshots_player ON kvk_snapshots(player_id, kvk_name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_linked_discord ON linked_accounts(discord_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_linked_player ON linked_accounts(player_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_requirements_kvk ON kvk_requirements(kvk_name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_fort_stats_kvk ON fort_stats(kvk_name, period_key)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_fort_stats_player ON fort_stats(kvk_name, player_id, period_key)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_fort_stats_rank ON fort_stats(kvk_name, period_key, rank)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_fort_totals_rank ON fort_totals(kvk_name, rank)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_best_snapshots_power ON player_best_snapshots(power DESC, player_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_best_snapshots_source ON player_best_snapshots(kvk_name, period_key, snapshot_type)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_admin_logs_time ON admin_logs(timestamp, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_admin_logs_admin ON admin_logs(admin_id, timestamp)')
+
+def _migrate_backfill_aggregates(cursor):
+    """v3: fort aggregates and best snapshots for data imported before those tables existed."""
+    # Backfill fort aggregates for data imported before they existed
+    cursor.execute("SELECT 1 FROM fort_stats WHERE rank IS NULL LIMIT 1")
+    if cursor.fetchone():
+        from .forts import _rebuild_fort_aggregates
+        logger.info("Rebuilding fort aggregates...")
+        _rebuild_fort_aggregates(cursor)
+
+    # Backfill the best-snapshot table on first run
+    cursor.execute("SELECT 1 FROM player_best_snapshots LIMIT 1")
+    if not cursor.fetchone():
+        from .players import _rebuild_best_snapshots
+        _rebuild_best_snapshots(cursor)
+
+def _migrate_kingdom_aggregates(cursor):
+    """v4: kingdom_period_aggregates (kingdom totals per snapshot batch and per results period)."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS kingdom_period_aggregates (
+            kvk_name TEXT NOT NULL,
+            period_key TEXT NOT NULL,
+            snapshot_type TEXT NOT NULL,
+            player_count INTEGER,
+            power INTEGER,
+            kill_points INTEGER,
+            deaths INTEGER,
+            t1_kills INTEGER,
+            t2_kills INTEGER,
+            t3_kills INTEGER,
+            t4_kills INTEGER,
+            t5_kills INTEGER,
+            PRIMARY KEY (kvk_name, period_key, snapshot_type)
+        )
+    ''')
+    from .kvk import _rebuild_kingdom_aggregates
+    logger.info("Building kingdom period aggregates...")
+    _rebuild_kingdom_aggregates(cursor)
+
+# Ordered (version, description, step). Steps must be idempotent: databases from before the
+# version was tracked start at 0 and replay all of them. Add new schema changes as a new entry.
+SCHEMA_MIGRATIONS = (
+    (1, "base tables", _migrate_base_tables),
+    (2, "indexes", _migrate_indexes),
+    (3, "fort aggregates and best snapshots backfill", _migrate_backfill_aggregates),
+    (4, "kingdom period aggregates", _migrate_kingdom_aggregates),
+)
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+def create_tables():
+    """
+    Brings the database schema up to SCHEMA_VERSION (tracked in PRAGMA user_version).
+    When the schema is current this is a single pragma read.
+    """
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+
+    try:
+        with closing(get_connection()) as conn:
+            cursor = conn.cursor()
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                if version > SCHEMA_VERSION:
+                    logger.warning(f"Database schema v{version} is newer than this bot (v{SCHEMA_VERSION})")
+                return
+
+            for target, description, migrate in SCHEMA_MIGRATIONS:
+                if target <= version:
+                    continue
+                # Each step commits together with its version bump; IMMEDIATE so a second process waits instead of racing
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    if cursor.execute("PRAGMA user_version").fetchone()[0] >= target:
+                        conn.rollback()
+                        continue
+                    logger.info(f"Migrating database schema to v{target} ({description})...")
+                    migrate(cursor)
+                    cursor.execute(f"PRAGMA user_version = {target}")
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            logger.info(f"Database schema migrated from v{version} to v{SCHEMA_VERSION}.")
     except sqlite3.Error as e:
         logger.error(f"Error creating tables: {e}")
@@ -1,10 +1,91 @@
 import sqlite3
 import logging
 from contextlib import closing
-from .base import get_connection
+from .base import get_connection, _upsert_players
 
 logger = logging.getLogger('db_manager.forts')
 
+def _rank_fort_period(cursor, kvk_name: str, period_key: str):
+    """Recomputes the stored rank of every player in one fort period."""
+    cursor.execute('''
+        UPDATE fort_stats SET rank = r.rnk
+        FROM (
+            SELECT player_id, RANK() OVER (ORDER BY total_forts DESC) as rnk
+            FROM fort_stats
+            WHERE kvk_name = ? AND period_key = ?
+        ) r
+        WHERE fort_stats.kvk_name = ? AND fort_stats.period_key = ?
+            AND fort_stats.player_id = r.player_id
+    ''', (kvk_name, period_key, kvk_name, period_key))
+
+def _rank_fort_totals(cursor, kvk_name: str):
+    """Recomputes the stored season rank of every player in fort_totals."""
+    cursor.execute('''
+        UPDATE fort_totals SET rank = r.rnk
+        FROM (
+            SELECT player_id, RANK() OVER (ORDER BY total_forts DESC) as rnk
+            FROM fort_totals
+            WHERE kvk_name = ?
+        ) r
+        WHERE fort_totals.kvk_name = ? AND fort_totals.player_id = r.player_id
+    ''', (kvk_name, kvk_name))
+
+def _subtract_fort_period(cursor, kvk_name: str, period_key: str):
+    """Backs a period's current rows out of fort_totals (before they are replaced or deleted)."""
+    cursor.execute('''
+        UPDATE fort_totals SET
+            forts_joined = fort_totals.forts_joined - fs.forts_joined,
+            forts_launched = fort_totals.forts_launched - fs.forts_launched,
+            total_forts = fort_totals.total_forts - fs.total_forts,
+            penalties = fort_totals.penalties - fs.penalties
+        FROM fort_stats fs
+        WHERE fort_totals.kvk_name = ? AND fs.kvk_name = fort_totals.kvk_name
+            AND fs.period_key = ? AND fs.player_id = fort_totals.player_id
+    ''', (kvk_name, period_key))
+
+def _rebuild_fort_aggregates(cursor):
+    """Recomputes fort_totals and all stored ranks from fort_stats."""
+    cursor.execute("DELETE FROM fort_totals")
+    cursor.execute('''
+        INSERT INTO fort_totals (kvk_name, player_id, player_name, forts_joined, forts_launched, total_forts, penalties)
+        SELECT 
+            kvk_name, player_id, player_name,
+            SUM(forts_joined), SUM(forts_launched), SUM(total_forts), SUM(penalties)
+        FROM fort_stats
+        GROUP BY kvk_name, player_id
+    ''')
+    cursor.execute('''
+        UPDATE fort_totals SET rank = r.rnk
+        FROM (
+            SELECT kvk_name, player_id, 
+                RANK() OVER (PARTITION BY kvk_name ORDER BY total_forts DESC) as rnk
+            FROM fort_totals
+        ) r
+        WHERE fort_totals.kvk_name = r.kvk_name AND fort_totals.player_id = r.player_id
+    ''')
+    cursor.execute('''
+        UPDATE fort_stats SET rank = r.rnk
+        FROM (
+            SELECT kvk_name, period_key, player_id,
+                RANK() OVER (PARTITION BY kvk_name, period_key ORDER BY total_forts DESC) as rnk
+            FROM fort_stats
+        ) r
+        WHERE fort_stats.kvk_name = r.kvk_name AND fort_stats.period_key = r.period_key
+            AND fort_stats.player_id = r.player_id
+    ''')
+
+def rebuild_fort_aggregates():
+    """Rebuilds fort_totals and fort ranks from scratch. Normally they are kept in step on import."""
+    try:
+        with closing(get_connection()) as conn:
+            cursor = conn.cursor()
+            _rebuild_fort_aggregates(cursor)
+            conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Error rebuilding fort aggregates: {e}")
+        return False
+
 def import_fort_stats(stats_list: list, period_label: str = "Total"):
     """
     Imports fort statistics for a specific period.
@@ -28,8 +109,11 @@ def import_fort_stats(stats_list: list, period_label: str = "Total"):
                 ON CONFLICT(kvk_name, period_key) DO UPDATE SET
                     created_at = CURRENT_TIMESTAMP
             ''', (kvk_name, period_key, period_label))
-            
-            # 2. Insert stats
+
+            # 2. Back out the rows this import replaces from the season totals
+            _subtract_fort_period(cursor, kvk_name, period_key)
+
+            # 3. Insert stats
             data = []
             for s in stats_list:
                 data.append((
@@ -43,7 +127,25 @@ def import_fort_stats(stats_list: list, period_label: str = "Total"):
                 (player_id, player_name, forts_joined, forts_launched, total_forts, penalties, kvk_name, period_key)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', data)
-            
+            _upsert_players(cursor, ((s['player_id'], s['player_name'], None) for s in stats_list))
+
+            # 4. Add the period back into the season totals and refresh ranks
+            cursor.execute('''
+                INSERT INTO fort_totals
+                (kvk_name, player_id, player_name, forts_joined, forts_launched, total_forts, penalties)
+                SELECT kvk_name, player_id, player_name, forts_joined, forts_launched, total_forts, penalties
+                FROM fort_stats
+                WHERE kvk_name = ? AND period_key = ?
+                ON CONFLICT(kvk_name, player_id) DO UPDATE SET
+                    player_name = excluded.player_name,
+                    forts_joined = forts_joined + excluded.forts_joined,
+                    forts_launched = forts_launched + excluded.forts_launched,
+                    total_forts = total_forts + excluded.total_forts,
+                    penalties = penalties + excluded.penalties
+            ''', (kvk_name, period_key))
+            _rank_fort_period(cursor, kvk_name, period_key)
+            _rank_fort_totals(cursor, kvk_name)
+
             conn.commit()
         return True
     except Exception as e:
@@ -82,9 +184,9 @@ def get_player_fort_stats_history(player_id: int, kvk_name: str):
 
 def get_fort_leaderboard(kvk_name: str, period_key: str = "total"):
     """
-    Returns fort leaderboard. 
+    Returns fort leaderboard ordered by rank. 
     Shows ALL players known in that KvK.
-    If period_key is "total", sums up all periods.
+    If period_key is "total", reads the season totals.
     """
     try:
         with closing(get_connection()) as conn:
@@ -93,43 +195,93 @@ def get_fort_leaderboard(kvk_name: str, period_key: str = "total"):
             
             if period_key == "total":
                 cursor.execute('''
-                    SELECT 
-                        player_id, player_name,
-                        SUM(forts_joined) as forts_joined,
-                        SUM(forts_launched) as forts_launched,
-                        SUM(total_forts) as total_forts,
-                        SUM(penalties) as penalties
-                    FROM fort_stats
+                    SELECT player_id, player_name, forts_joined, forts_launched, total_forts, penalties, rank
+                    FROM fort_totals
                     WHERE kvk_name = ?
-                    GROUP BY player_id
-                    ORDER BY total_forts DESC
+                    ORDER BY rank
                 ''', (kvk_name,))
+                return [dict(row) for row in cursor.fetchall()]
+
+            # Players with stats in this period, already ranked
+            cursor.execute('''
+                SELECT player_id, player_name, forts_joined, forts_launched, total_forts, penalties, rank
+                FROM fort_stats
+                WHERE kvk_name = ? AND period_key = ?
+                ORDER BY rank
+            ''', (kvk_name, period_key))
+            rows = [dict(row) for row in cursor.fetchall()]
+
+            # Other players known in this KvK get zeroed stats and share the bottom rank
+            zero_rank = sum(1 for r in rows if r['total_forts'] > 0) + 1
+            cursor.execute('''
+                SELECT ft.player_id, ft.player_name
+                FROM fort_totals ft
+                WHERE ft.kvk_name = ? AND NOT EXISTS (
+                    SELECT 1 FROM fort_stats fs
+                    WHERE fs.kvk_name = ft.kvk_name AND fs.player_id = ft.player_id AND fs.period_key = ?
+                )
+                ORDER BY ft.rank
+            ''', (kvk_name, period_key))
+            for row in cursor.fetchall():
+                rows.append({
+                    'player_id': row['player_id'], 'player_name': row['player_name'],
+                    'forts_joined': 0, 'forts_launched': 0, 'total_forts': 0, 'penalties': 0,
+                    'rank': zero_rank
+                })
+            return rows
+    except Exception as e:
+        logger.error(f"Error getting fort leaderboard: {e}")
+        return []
+
+def get_fort_stats_for_players(player_ids: list, kvk_name: str, period_key: str = "total"):
+    """
+    Point lookup of fort stats for one or a few players.
+    Returns {player_id: row} with the same columns as get_fort_leaderboard.
+    If period_key is "total", reads the season totals. For a specific period, players known
+    in the season but absent from that period get zeroed stats (as on the leaderboard).
+    """
+    if not player_ids: return {}
+    try:
+        with closing(get_connection()) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            placeholders = ','.join(['?'] * len(player_ids))
+            
+            if period_key == "total":
+                cursor.execute(f'''
+                    SELECT player_id, player_name, forts_joined, forts_launched, total_forts, penalties, rank
+                    FROM fort_totals
+                    WHERE kvk_name = ? AND player_id IN ({placeholders})
+                ''', (kvk_name, *player_ids))
             else:
-                # Get all players known in this KvK, then join with specific period stats
-                cursor.execute('''
+                cursor.execute(f'''
                     SELECT 
-                        p.player_id, 
-                        p.player_name,
+                        ft.player_id, 
+                        COALESCE(fs.player_name, ft.player_name) as player_name,
                         COALESCE(fs.forts_joined, 0) as forts_joined,
                         COALESCE(fs.forts_launched, 0) as forts_launched,
                         COALESCE(fs.total_forts, 0) as total_forts,
-                        COALESCE(fs.penalties, 0) as penalties
-                    FROM (
-                        SELECT DISTINCT player_id, player_name 
-                        FROM fort_stats 
-                        WHERE kvk_name = ?
-                    ) p
+                        COALESCE(fs.penalties, 0) as penalties,
+                        COALESCE(fs.rank, (
+                            SELECT COUNT(*) + 1 FROM fort_stats
+                            WHERE kvk_name = ? AND period_key = ? AND total_forts > 0
+                        )) as rank
+                    FROM fort_totals ft
                     LEFT JOIN fort_stats fs 
-                        ON p.player_id = fs.player_id 
-                        AND fs.kvk_name = ? 
+                        ON fs.kvk_name = ft.kvk_name 
+                        AND fs.player_id = ft.player_id 
                         AND fs.period_key = ?
-                    ORDER BY total_forts DESC
-                ''', (kvk_name, kvk_name, period_key))
+                    WHERE ft.kvk_name = ? AND ft.player_id IN ({placeholders})
+                ''', (kvk_name, period_key, period_key, kvk_name, *player_ids))
                 
-            return [dict(row) for row in cursor.fetchall()]
+            return {row['player_id']: dict(row) for row in cursor.fetchall()}
     except Exception as e:
-        logger.error(f"Error getting fort leaderboard: {e}")
-        return []
+        logger.error(f"Error getting fort stats for players: {e}")
+        return {}
+
+def get_player_fort_stats(player_id: int, kvk_name: str, period_key: str = "total"):
+    """Returns fort stats for a single player in a period (or season total), or None."""
+    return get_fort_stats_for_players([player_id], kvk_name, period_key).get(player_id)
 
 def get_fort_last_updated(kvk_name: str, period_key: str = "total"):
     """Returns the ISO timestamp of the last update for this period (or newest if total)."""
@@ -192,11 +344,12 @@ def get_fort_stats(player_id: int, kvk_name: str):
         return None
 
 def clear_all_fort_data():
-    """Deletes all records from fort_stats and fort_periods tables."""
+    """Deletes all records from fort_stats, fort_totals and fort_periods tables."""
     try:
         with closing(get_connection()) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM fort_stats")
+            cursor.execute("DELETE FROM fort_totals")
             cursor.execute("DELETE FROM fort_periods")
             conn.commit()
         logger.info("All fort data has been cleared from the database.")
@@ -211,12 +364,24 @@ def delete_fort_period(kvk_name: str, period_key: str):
     try:
         with closing(get_connection()) as conn:
             cursor = conn.cursor()
+            _subtract_fort_period(cursor, kvk_name, period_key)
+
             # Delete stats
             cursor.execute('''
-                DELETE FROM fort_stats 
+                DELETE FROM fort_stats
                 WHERE kvk_name = ? AND period_key = ?
             ''', (kvk_name, period_key))
-            
+
+            # Drop totals for players with no periods left in this season
+            cursor.execute('''
+                DELETE FROM fort_totals
+                WHERE kvk_name = ? AND NOT EXISTS (
+                    SELECT 1 FROM fort_stats fs
+                    WHERE fs.kvk_name = fort_totals.kvk_name AND fs.player_id = fort_totals.player_id
+                )
+            ''', (kvk_name,))
+            _rank_fort_totals(cursor, kvk_name)
+
             # Delete period definition
             cursor.execute('''
                 DELETE FROM fort_periods 
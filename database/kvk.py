@@ -1,19 +1,76 @@
 import sqlite3
 import logging
-import pandas as pd
 from contextlib import closing
-from .base import get_connection, logger as base_logger
+from .base import get_connection, open_upload, _upsert_players, logger as base_logger
+from .players import _upsert_best_snapshots, _refresh_best_snapshots
+from .active_season import get_active_season_model, invalidate_active_season
+from .snapshots import SnapshotColumns, SeasonColumns, SNAPSHOT_COLUMNS
 
 logger = logging.getLogger('db_manager.kvk')
 
-def import_snapshot(file_path: str, kvk_name: str, period_key: str, snapshot_type: str):
-    """Imports a snapshot (Start/End) from Excel into the kvk_snapshots table."""
+# Columns summed into kingdom_period_aggregates
+AGGREGATE_COLUMNS = ('power', 'kill_points', 'deaths', 't1_kills', 't2_kills', 't3_kills', 't4_kills', 't5_kills')
+
+def _refresh_snapshot_aggregate(cursor, kvk_name: str, period_key: str, snapshot_type: str):
+    """Recomputes the kingdom totals row of one snapshot batch (removed if the batch is empty)."""
+    cursor.execute('''
+        DELETE FROM kingdom_period_aggregates WHERE kvk_name = ? AND period_key = ? AND snapshot_type = ?
+    ''', (kvk_name, period_key, snapshot_type))
+    cursor.execute(f'''
+        INSERT INTO kingdom_period_aggregates (kvk_name, period_key, snapshot_type, player_count, {", ".join(AGGREGATE_COLUMNS)})
+        SELECT kvk_name, period_key, snapshot_type, COUNT(player_id), {", ".join(f"SUM({c})" for c in AGGREGATE_COLUMNS)}
+        FROM kvk_snapshots
+        WHERE kvk_name = ? AND period_key = ? AND snapshot_type = ?
+        GROUP BY kvk_name, period_key, snapshot_type
+    ''', (kvk_name, period_key, snapshot_type))
+
+def _refresh_results_aggregates(cursor, kvk_name: str):
+    """
+    Recomputes a season's kvk_stats totals: one 'results' row per period plus period 'all'
+    (per-player sums; power is each player's latest row, as in get_kingdom_stats_by_period).
+    """
+    cursor.execute("DELETE FROM kingdom_period_aggregates WHERE kvk_name = ? AND snapshot_type = 'results'", (kvk_name,))
+    cursor.execute(f'''
+        INSERT INTO kingdom_period_aggregates (kvk_name, period_key, snapshot_type, player_count, {", ".join(AGGREGATE_COLUMNS)})
+        SELECT kvk_name, period_key, 'results', COUNT(player_id), {", ".join(f"SUM({c})" for c in AGGREGATE_COLUMNS)}
+        FROM kvk_stats WHERE kvk_name = ?
+        GROUP BY period_key
+    ''', (kvk_name,))
+    totals = AGGREGATE_COLUMNS[1:]
+    cursor.execute(f'''
+        INSERT INTO kingdom_period_aggregates (kvk_name, period_key, snapshot_type, player_count, {", ".join(AGGREGATE_COLUMNS)})
+        SELECT s.kvk_name, 'all', 'results', COUNT(t.player_id), SUM(s.power), {", ".join(f"SUM(t.{c})" for c in totals)}
+        FROM (
+            SELECT player_id, MAX(rowid) AS last_rowid, {", ".join(f"SUM({c}) AS {c}" for c in totals)}
+            FROM kvk_stats WHERE kvk_name = ?
+            GROUP BY player_id
+        ) t
+        JOIN kvk_stats s ON s.rowid = t.last_rowid
+        GROUP BY s.kvk_name
+    ''', (kvk_name,))
+
+def _rebuild_kingdom_aggregates(cursor):
+    """Recomputes kingdom_period_aggregates from scratch."""
+    cursor.execute("DELETE FROM kingdom_period_aggregates")
+    cursor.execute("SELECT DISTINCT kvk_name, period_key, snapshot_type FROM kvk_snapshots")
+    for batch in cursor.fetchall():
+        _refresh_snapshot_aggregate(cursor, *batch)
+    cursor.execute("SELECT DISTINCT kvk_name FROM kvk_stats")
+    for (kvk_name,) in cursor.fetchall():
+        _refresh_results_aggregates(cursor, kvk_name)
+
+def import_snapshot(source, kvk_name: str, period_key: str, snapshot_type: str):
+    """
+    Imports a snapshot (Start/End) from Excel into the kvk_snapshots table.
+    source: file path, raw bytes or binary file-like object.
+    """
     try:
         # Normalize keys to lowercase to ensure consistent storage and retrieval
         period_key = period_key.strip().lower()
         snapshot_type = snapshot_type.strip().lower()
 
-        df = pd.read_excel(file_path)
+        import pandas as pd
+        df = pd.read_excel(open_upload(source))
         df.columns = [c.strip().lower() for c in df.columns]
         
         col_map = {
@@ -61,22 +118,35 @@ def import_snapshot(file_path: str, kvk_name: str, period_key: str, snapshot_typ
 
         with closing(get_connection()) as conn:
             cursor = conn.cursor()
+            # Players whose best snapshot is in the batch being replaced may drop below another snapshot
+            cursor.execute('''
+                SELECT player_id FROM player_best_snapshots
+                WHERE kvk_name = ? AND period_key = ? AND snapshot_type = ?
+            ''', (kvk_name, period_key, snapshot_type))
+            replaced_ids = [row[0] for row in cursor.fetchall()]
+
             cursor.executemany('''
                 INSERT OR REPLACE INTO kvk_snapshots 
                 (player_id, player_name, power, kill_points, deaths, t1_kills, t2_kills, t3_kills, t4_kills, t5_kills, kvk_name, period_key, snapshot_type)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', data_to_insert)
+            _upsert_players(cursor, (row[:3] for row in data_to_insert))
+            _refresh_best_snapshots(cursor, replaced_ids)
+            _upsert_best_snapshots(cursor, (row[:5] for row in data_to_insert), kvk_name, period_key, snapshot_type)
+            _refresh_snapshot_aggregate(cursor, kvk_name, period_key, snapshot_type)
             conn.commit()
+            invalidate_active_season()
         
         return True, f"Successfully imported {len(data_to_insert)} records."
     except Exception as e:
         logger.error(f"Error importing snapshot: {e}")
         return False, str(e)
 
-def import_requirements(file_path: str, kvk_name: str):
-    """Imports KvK requirements from Excel."""
+def import_requirements(source, kvk_name: str):
+    """Imports KvK requirements from Excel (file path, raw bytes or file-like object)."""
     try:
-        df = pd.read_excel(file_path)
+        import pandas as pd
+        df = pd.read_excel(open_upload(source))
         df.columns = [c.strip().lower() for c in df.columns]
         
         col_map = {
@@ -116,6 +186,7 @@ def import_requirements(file_path: str, kvk_name: str):
                 VALUES (?, ?, ?, ?, ?)
             ''', data_to_insert)
             conn.commit()
+            invalidate_active_season()
             
         return True, f"Imported {len(data_to_insert)} requirement brackets."
     except Exception as e:
@@ -148,6 +219,27 @@ def get_snapshot_data(kvk_name: str, period_key: str, snapshot_type: str):
         return {}
 
 
+def get_snapshot_columns(kvk_name: str, period_key: str, snapshot_type: str):
+    """
+    Retrieves a snapshot batch as a SnapshotColumns (numpy arrays per stat, sorted by player_id).
+    Cheaper than get_snapshot_data for whole-kingdom sums and start/end diffs.
+    Empty if the batch does not exist (or on error).
+    """
+    try:
+        period_key = period_key.strip().lower()
+        snapshot_type = snapshot_type.strip().lower()
+        with closing(get_connection()) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT player_id, player_name, {", ".join(SNAPSHOT_COLUMNS)} FROM kvk_snapshots
+                WHERE kvk_name = ? AND period_key = ? AND snapshot_type = ?
+                ORDER BY player_id
+            ''', (kvk_name, period_key, snapshot_type))
+            return SnapshotColumns.from_rows(cursor.fetchall())
+    except Exception as e:
+        logger.error(f"Error getting snapshot columns: {e}")
+        return SnapshotColumns.from_rows([])
+
 def delete_snapshot(kvk_name: str, period_key: str, snapshot_type: str):
     """Deletes a specific snapshot batch."""
     try:
@@ -157,12 +249,21 @@ def delete_snapshot(kvk_name: str, period_key: str, snapshot_type: str):
 
         with closing(get_connection()) as conn:
             cursor = conn.cursor()
+            cursor.execute('''
+                SELECT player_id FROM player_best_snapshots
+                WHERE kvk_name = ? AND period_key = ? AND snapshot_type = ?
+            ''', (kvk_name, period_key, snapshot_type))
+            affected_ids = [row[0] for row in cursor.fetchall()]
             cursor.execute('''
                 DELETE FROM kvk_snapshots 
                 WHERE kvk_name = ? AND period_key = ? AND snapshot_type = ?
             ''', (kvk_name, period_key, snapshot_type))
+            deleted = cursor.rowcount
+            _refresh_best_snapshots(cursor, affected_ids)
+            _refresh_snapshot_aggregate(cursor, kvk_name, period_key, snapshot_type)
             conn.commit()
-            return cursor.rowcount > 0
+            invalidate_active_season()
+            return deleted > 0
     except Exception as e:
         logger.error(f"Error deleting snapshot: {e}")
         return False
@@ -177,7 +278,11 @@ def save_period_results(results: list):
                 (player_id, player_name, power, kill_points, deaths, t1_kills, t2_kills, t3_kills, t4_kills, t5_kills, kvk_name, period_key)
                 VALUES (:player_id, :player_name, :power, :kill_points, :deaths, :t1_kills, :t2_kills, :t3_kills, :t4_kills, :t5_kills, :kvk_name, :period_key)
             ''', results)
+            _upsert_players(cursor, ((r['player_id'], r['player_name'], r['power']) for r in results))
+            for kvk_name in {r['kvk_name'] for r in results}:
+                _refresh_results_aggregates(cursor, kvk_name)
             conn.commit()
+            invalidate_active_season()
         return True
     except Exception as e:
         logger.error(f"Error saving period results: {e}")
@@ -185,6 +290,9 @@ def save_period_results(results: list):
 
 def get_requirements(kvk_name: str, power: int):
     """Returns requirements for the given KvK and player power."""
+    model = get_active_season_model(kvk_name)
+    if model is not None:
+        return model.requirements_for(power)
     try:
         with closing(get_connection()) as conn:
             conn.row_factory = sqlite3.Row
@@ -226,6 +334,7 @@ def save_requirements_batch(kvk_name: str, requirements: list):
                 VALUES (?, ?, ?, ?, ?)
             ''', data)
             conn.commit()
+            invalidate_active_season()
         return True
     except Exception as e:
         logger.error(f"Error saving requirements batch: {e}")
@@ -270,10 +379,13 @@ def archive_kvk_data(current_name: str, archive_name: str):
             cursor.execute("UPDATE kvk_stats SET kvk_name = ? WHERE kvk_name = ?", (archive_name, current_name))
             # Update snapshots
             cursor.execute("UPDATE kvk_snapshots SET kvk_name = ? WHERE kvk_name = ?", (archive_name, current_name))
+            cursor.execute("UPDATE player_best_snapshots SET kvk_name = ? WHERE kvk_name = ?", (archive_name, current_name))
+            cursor.execute("UPDATE kingdom_period_aggregates SET kvk_name = ? WHERE kvk_name = ?", (archive_name, current_name))
             # Update requirements
             cursor.execute("UPDATE kvk_requirements SET kvk_name = ? WHERE kvk_name = ?", (archive_name, current_name))
             # Update fort stats
             cursor.execute("UPDATE fort_stats SET kvk_name = ? WHERE kvk_name = ?", (archive_name, current_name))
+            cursor.execute("UPDATE fort_totals SET kvk_name = ? WHERE kvk_name = ?", (archive_name, current_name))
             cursor.execute("UPDATE fort_periods SET kvk_name = ? WHERE kvk_name = ?", (archive_name, current_name))
             
             # Update season definition - preserve the label, only update value (key)
@@ -284,6 +396,7 @@ def archive_kvk_data(current_name: str, archive_name: str):
             """, (archive_name, display_label, current_name))
             
             conn.commit()
+            invalidate_active_season()
         return True
     except Exception as e:
         logger.error(f"Error archiving KvK data: {e}")
@@ -302,8 +415,11 @@ def rename_kvk_season(old_name: str, new_name: str):
             # Update all tables
             cursor.execute("UPDATE kvk_stats SET kvk_name = ? WHERE kvk_name = ?", (new_name, old_name))
             cursor.execute("UPDATE kvk_snapshots SET kvk_name = ? WHERE kvk_name = ?", (new_name, old_name))
+            cursor.execute("UPDATE player_best_snapshots SET kvk_name = ? WHERE kvk_name = ?", (new_name, old_name))
+            cursor.execute("UPDATE kingdom_period_aggregates SET kvk_name = ? WHERE kvk_name = ?", (new_name, old_name))
             cursor.execute("UPDATE kvk_requirements SET kvk_name = ? WHERE kvk_name = ?", (new_name, old_name))
             cursor.execute("UPDATE fort_stats SET kvk_name = ? WHERE kvk_name = ?", (new_name, old_name))
+            cursor.execute("UPDATE fort_totals SET kvk_name = ? WHERE kvk_name = ?", (new_name, old_name))
             cursor.execute("UPDATE fort_periods SET kvk_name = ? WHERE kvk_name = ?", (new_name, old_name))
             cursor.execute("UPDATE kingdom_players SET kvk_name = ? WHERE kvk_name = ?", (new_name, old_name))
             
@@ -314,6 +430,7 @@ def rename_kvk_season(old_name: str, new_name: str):
             cursor.execute("UPDATE kvk_settings SET setting_value = ? WHERE setting_key = 'current_kvk' AND setting_value = ?", (new_name, old_name))
             
             conn.commit()
+            invalidate_active_season()
         return True, f"Successfully renamed '{old_name}' to '{new_name}'."
     except Exception as e:
         logger.error(f"Error renaming KvK season: {e}")
@@ -334,6 +451,7 @@ def get_all_seasons():
 # Cache for frequently called functions
 _cache = {}
 _cache_timestamps = {}
+_cache_stats = {'hits': 0, 'misses': 0}
 CACHE_TTL = 60  # seconds
 
 def _get_cached(key, fetch_func, ttl=CACHE_TTL):
@@ -343,13 +461,19 @@ def _get_cached(key, fetch_func, ttl=CACHE_TTL):
     
     if key in _cache:
         if current_time - _cache_timestamps.get(key, 0) < ttl:
+            _cache_stats['hits'] += 1
             return _cache[key]
     
+    _cache_stats['misses'] += 1
     result = fetch_func()
     _cache[key] = result
     _cache_timestamps[key] = current_time
     return result
 
+def get_cache_stats():
+    """Returns hit / miss counts of the season cache since startup."""
+    return dict(_cache_stats)
+
 def clear_season_cache():
     """Clears the season cache. Call after modifying seasons."""
     _cache.pop('played_seasons', None)
@@ -377,12 +501,18 @@ def delete_kvk_season(kvk_name: str):
         with closing(get_connection()) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM kvk_stats WHERE kvk_name = ?", (kvk_name,))
+            cursor.execute("SELECT player_id FROM player_best_snapshots WHERE kvk_name = ?", (kvk_name,))
+            affected_ids = [row[0] for row in cursor.fetchall()]
             cursor.execute("DELETE FROM kvk_snapshots WHERE kvk_name = ?", (kvk_name,))
+            _refresh_best_snapshots(cursor, affected_ids)
+            cursor.execute("DELETE FROM kingdom_period_aggregates WHERE kvk_name = ?", (kvk_name,))
             cursor.execute("DELETE FROM kvk_requirements WHERE kvk_name = ?", (kvk_name,))
             cursor.execute("DELETE FROM kvk_seasons WHERE value = ?", (kvk_name,))
             cursor.execute("DELETE FROM fort_stats WHERE kvk_name = ?", (kvk_name,))
+            cursor.execute("DELETE FROM fort_totals WHERE kvk_name = ?", (kvk_name,))
             cursor.execute("DELETE FROM fort_periods WHERE kvk_name = ?", (kvk_name,))
             conn.commit()
+            invalidate_active_season()
         return True, f"Season {kvk_name} and all associated data deleted."
     except Exception as e:
         logger.error(f"Error deleting KvK season: {e}")
@@ -459,6 +589,7 @@ def create_kvk_season(name: str, start_date: str = None, end_date: str = None, m
                     logger.info(f"Auto-copied {len(global_reqs)} global requirements to new season {value}")
             
             conn.commit()
+            invalidate_active_season()
         clear_season_cache()  # Clear cache after creating
         
         # Build success message
@@ -484,6 +615,7 @@ def set_current_kvk_name(kvk_name: str):
             cursor.execute("UPDATE kvk_seasons SET is_active = 0") # Reset all
             cursor.execute("UPDATE kvk_seasons SET is_active = 1 WHERE value = ?", (kvk_name,))
             conn.commit()
+            invalidate_active_season()
         clear_season_cache()  # Clear cache after changing active season
         return True
     except Exception as e:
@@ -492,6 +624,10 @@ def set_current_kvk_name(kvk_name: str):
 
 def get_player_stats_by_period(player_id: int, kvk_name: str, period_key: str = "all"):
     """Retrieves player statistics for a specific period or all periods."""
+    if period_key == "all":
+        model = get_active_season_model(kvk_name)
+        if model is not None:
+            return model.player_totals(player_id)
     try:
         with closing(get_connection()) as conn:
             conn.row_factory = sqlite3.Row
@@ -536,43 +672,22 @@ def get_player_stats_by_period(player_id: int, kvk_name: str, period_key: str =
         return None
 
 def get_kingdom_stats_by_period(kvk_name: str, period_key: str = "all"):
-    """Retrieves kingdom statistics for a specific period or all periods."""
+    """Retrieves kingdom statistics for a specific period or all periods (from kingdom_period_aggregates)."""
+    if period_key == "all":
+        model = get_active_season_model(kvk_name)
+        if model is not None:
+            return model.kingdom_totals()
     try:
         with closing(get_connection()) as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            
-            if period_key == "all":
-                cursor.execute('''
-                    SELECT 
-                        COUNT(DISTINCT player_id) as player_count,
-                        SUM(power) as kingdom_power,
-                        SUM(kill_points) as kingdom_kill_points,
-                        SUM(deaths) as kingdom_deaths,
-                        SUM(t4_kills) as kingdom_t4_kills,
-                        SUM(t5_kills) as kingdom_t5_kills
-                    FROM (
-                        SELECT player_id, (SELECT power FROM kvk_stats ks2 WHERE ks2.player_id = kvk_stats.player_id AND ks2.kvk_name = kvk_stats.kvk_name ORDER BY rowid DESC LIMIT 1) as power, SUM(kill_points) as kill_points, 
-                               SUM(deaths) as deaths, SUM(t4_kills) as t4_kills, SUM(t5_kills) as t5_kills
-                        FROM kvk_stats WHERE kvk_name = ?
-                        GROUP BY player_id
-                    )
-                ''', (kvk_name,))
-            else:
-                cursor.execute('''
-                    SELECT 
-                        COUNT(player_id) as player_count,
-                        SUM(power) as kingdom_power,
-                        SUM(kill_points) as kingdom_kill_points,
-                        SUM(deaths) as kingdom_deaths,
-                        SUM(t4_kills) as kingdom_t4_kills,
-                        SUM(t5_kills) as kingdom_t5_kills
-                    FROM kvk_stats
-                    WHERE kvk_name = ? AND period_key = ?
-                ''', (kvk_name, period_key))
-            
-            row = cursor.fetchone()
-            return dict(row) if row else None
+            cursor.execute('''
+                SELECT player_count, power, kill_points, deaths, t4_kills, t5_kills
+                FROM kingdom_period_aggregates
+                WHERE kvk_name = ? AND period_key = ? AND snapshot_type = 'results'
+            ''', (kvk_name, period_key))
+            row = cursor.fetchone() or (0, None, None, None, None, None)
+            return dict(zip(('player_count', 'kingdom_power', 'kingdom_kill_points', 'kingdom_deaths',
+                             'kingdom_t4_kills', 'kingdom_t5_kills'), row))
     except Exception as e:
         logger.error(f"Error getting kingdom stats by period: {e}")
         return None
@@ -583,7 +698,11 @@ def get_all_periods(kvk_name: str):
         with closing(get_connection()) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT period_key FROM kvk_snapshots WHERE kvk_name = ? ORDER BY period_key", (kvk_name,))
+            cursor.execute('''
+                SELECT DISTINCT period_key FROM kingdom_period_aggregates
+                WHERE kvk_name = ? AND snapshot_type != 'results'
+                ORDER BY period_key
+            ''', (kvk_name,))
             return [dict(row) for row in cursor.fetchall()]
     except Exception as e:
         logger.error(f"Error getting all periods: {e}")
@@ -591,6 +710,9 @@ def get_all_periods(kvk_name: str):
 
 def get_all_kvk_stats(kvk_name: str):
     """Retrieves stats for all players in a specific KvK."""
+    model = get_active_season_model(kvk_name)
+    if model is not None:
+        return model.all_totals()
     try:
         with closing(get_connection()) as conn:
             conn.row_factory = sqlite3.Row
@@ -615,6 +737,9 @@ def get_all_kvk_stats(kvk_name: str):
 
 def get_player_start_snapshot(player_id: int, kvk_name: str):
     """Retrieves the 'start' snapshot for a player in a specific KvK."""
+    model = get_active_season_model(kvk_name)
+    if model is not None:
+        return model.start_snapshot(player_id)
     try:
         with closing(get_connection()) as conn:
             conn.row_factory = sqlite3.Row
@@ -634,6 +759,9 @@ def get_player_start_snapshot(player_id: int, kvk_name: str):
 def get_total_stats_for_players(player_ids: list, kvk_name: str):
     """Retrieves total player statistics for multiple players in a single query."""
     if not player_ids: return {}
+    model = get_active_season_model(kvk_name)
+    if model is not None:
+        return model.totals_for_players(player_ids)
     try:
         with closing(get_connection()) as conn:
             conn.row_factory = sqlite3.Row
@@ -661,27 +789,57 @@ def get_total_stats_for_players(player_ids: list, kvk_name: str):
 
 def get_kingdom_start_snapshot(kvk_name: str):
     """Gets aggregated kingdom-wide start snapshot (first period's start)."""
+    model = get_active_season_model(kvk_name)
+    if model is not None:
+        return model.kingdom_start_snapshot()
     try:
         with closing(get_connection()) as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             # Find the first period key
-            cursor.execute("SELECT MIN(period_key) FROM kvk_snapshots WHERE kvk_name = ?", (kvk_name,))
+            cursor.execute("SELECT MIN(period_key) FROM kingdom_period_aggregates WHERE kvk_name = ? AND snapshot_type != 'results'", (kvk_name,))
             first_period = cursor.fetchone()[0]
             if not first_period: return None
-            
+
+            start = get_kingdom_aggregate(kvk_name, first_period, 'start') or {}
+            return {'kingdom_power': start.get('power'), 'kingdom_kill_points': start.get('kill_points'),
+                    'kingdom_deaths': start.get('deaths')}
+    except Exception as e:
+        logger.error(f"Error getting kingdom start snapshot: {e}")
+        return None
+
+def get_seasons_with_results() -> set:
+    """Names of the seasons that have calculated results (a non-empty season row in kingdom_period_aggregates)."""
+    try:
+        with closing(get_connection()) as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                SELECT 
-                    SUM(power) as kingdom_power,
-                    SUM(kill_points) as kingdom_kill_points,
-                    SUM(deaths) as kingdom_deaths
-                FROM kvk_snapshots 
-                WHERE kvk_name = ? AND period_key = ? AND snapshot_type = 'start'
-            ''', (kvk_name, first_period))
+                SELECT kvk_name FROM kingdom_period_aggregates
+                WHERE period_key = 'all' AND snapshot_type = 'results' AND player_count > 0
+            ''')
+            return {row[0] for row in cursor.fetchall()}
+    except Exception as e:
+        logger.error(f"Error getting seasons with results: {e}")
+        return set()
+
+def get_kingdom_aggregate(kvk_name: str, period_key: str, snapshot_type: str):
+    """
+    Precomputed kingdom totals of one batch: snapshot_type 'start' / 'end' (kvk_snapshots) or
+    'results' (kvk_stats; period_key 'all' for the season). Returns a dict with player_count
+    and the summed power, kill_points, deaths, t1_kills..t5_kills, or None if there is no data.
+    """
+    try:
+        period_key = period_key.strip().lower() if snapshot_type != 'results' else period_key
+        with closing(get_connection()) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT player_count, {", ".join(AGGREGATE_COLUMNS)} FROM kingdom_period_aggregates
+                WHERE kvk_name = ? AND period_key = ? AND snapshot_type = ?
+            ''', (kvk_name, period_key, snapshot_type.strip().lower()))
             row = cursor.fetchone()
             return dict(row) if row else None
     except Exception as e:
-        logger.error(f"Error getting kingdom start snapshot: {e}")
+        logger.error(f"Error getting kingdom aggregate: {e}")
         return None
 
 def get_snapshot_player_data(kvk_name: str, period_key: str, snapshot_type: str, player_id: int):
@@ -702,6 +860,9 @@ def get_snapshot_player_data(kvk_name: str, period_key: str, snapshot_type: str,
 
 def get_player_rank(player_id: int, kvk_name: str):
     """Gets player's DKP rank within the kingdom."""
+    model = get_active_season_model(kvk_name)
+    if model is not None:
+        return model.player_rank(player_id)
     try:
         with closing(get_connection()) as conn:
             cursor = conn.cursor()
@@ -779,39 +940,17 @@ def get_total_player_stats(player_id: int, kvk_name: str):
         return None
 
 def get_kingdom_stats(kvk_name: str):
-    """Retrieves aggregated statistics for the entire kingdom for a specific KvK."""
+    """Retrieves aggregated statistics for the entire kingdom for a specific KvK (season 'results' row of kingdom_period_aggregates)."""
     try:
         with closing(get_connection()) as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT 
-                    SUM(total_power) as kingdom_power,
-                    SUM(total_kill_points) as kingdom_kill_points,
-                    SUM(total_deaths) as kingdom_deaths,
-                    SUM(total_t1_kills) as kingdom_t1_kills,
-                    SUM(total_t2_kills) as kingdom_t2_kills,
-                    SUM(total_t3_kills) as kingdom_t3_kills,
-                    SUM(total_t4_kills) as kingdom_t4_kills,
-                    SUM(total_t5_kills) as kingdom_t5_kills,
-                    COUNT(*) as player_count
-                FROM (
-                    SELECT 
-                        (SELECT power FROM kvk_stats ks2 WHERE ks2.player_id = kvk_stats.player_id AND ks2.kvk_name = kvk_stats.kvk_name ORDER BY rowid DESC LIMIT 1) as total_power,
-                        SUM(kill_points) as total_kill_points,
-                        SUM(deaths) as total_deaths,
-                        SUM(t1_kills) as total_t1_kills,
-                        SUM(t2_kills) as total_t2_kills,
-                        SUM(t3_kills) as total_t3_kills,
-                        SUM(t4_kills) as total_t4_kills,
-                        SUM(t5_kills) as total_t5_kills
-                    FROM kvk_stats
-                    WHERE kvk_name = ?
-                    GROUP BY player_id
-                )
+            cursor.execute(f'''
+                SELECT {", ".join(AGGREGATE_COLUMNS)}, player_count FROM kingdom_period_aggregates
+                WHERE kvk_name = ? AND period_key = 'all' AND snapshot_type = 'results'
             ''', (kvk_name,))
-            row = cursor.fetchone()
-            return dict(row) if row else None
+            row = cursor.fetchone() or (None,) * len(AGGREGATE_COLUMNS) + (0,)
+            keys = [f"kingdom_{c}" for c in AGGREGATE_COLUMNS] + ['player_count']
+            return dict(zip(keys, row))
     except Exception as e:
         logger.error(f"Error retrieving kingdom stats: {e}")
         return None
@@ -855,3 +994,33 @@ def get_player_cross_kvk_stats(player_id: int, kvk_names: list) -> list:
     except Exception as e:
         logger.error(f"Error getting cross-KvK stats: {e}")
         return []
+
+def get_kingdom_cross_kvk_stats(kvk_names: list) -> SeasonColumns:
+    """
+    Season totals of every player across `kvk_names` (oldest first) in one grouped query,
+    as a SeasonColumns (players x seasons matrices with season_totals(), deltas() and growth()).
+    Power is each player's latest row in the season, as in get_kingdom_stats_by_period.
+    Returns an empty SeasonColumns on error.
+    """
+    kvk_names = list(kvk_names or [])
+    rows = []
+    if kvk_names:
+        try:
+            with closing(get_connection()) as conn:
+                cursor = conn.cursor()
+                placeholders = ','.join('?' * len(kvk_names))
+                totals = SNAPSHOT_COLUMNS[1:]
+                cursor.execute(f'''
+                    SELECT t.kvk_name, t.player_id, s.player_name, s.power, {", ".join(f"t.{c}" for c in totals)}
+                    FROM (
+                        SELECT kvk_name, player_id, MAX(rowid) AS last_rowid, {", ".join(f"SUM({c}) AS {c}" for c in totals)}
+                        FROM kvk_stats WHERE kvk_name IN ({placeholders})
+                        GROUP BY kvk_name, player_id
+                    ) t
+                    JOIN kvk_stats s ON s.rowid = t.last_rowid
+                ''', kvk_names)
+                rows = cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error getting kingdom cross-KvK stats: {e}")
+            rows = []
+    return SeasonColumns.from_rows(kvk_names, rows)
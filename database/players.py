@@ -1,15 +1,79 @@
 import sqlite3
 import logging
-import pandas as pd
 from contextlib import closing
-from .base import get_connection
+from .base import get_connection, open_upload, _upsert_players, _sync_player_account_type
+from .forts import _rank_fort_period, _rank_fort_totals
+from .active_season import get_active_season_model, invalidate_active_season
 
 logger = logging.getLogger('db_manager.players')
 
-def import_kingdom_players(file_path: str, kvk_name: str):
-    """Imports the base list of kingdom players from Excel."""
+def _upsert_best_snapshots(cursor, rows, kvk_name: str, period_key: str, snapshot_type: str):
+    """
+    Folds freshly imported snapshot rows into player_best_snapshots.
+    rows: iterable of (player_id, player_name, power, kill_points, deaths).
+    A row wins over a roster fallback or a snapshot with lower (kill_points, power).
+    """
+    cursor.executemany('''
+        INSERT INTO player_best_snapshots
+        (player_id, player_name, power, kill_points, deaths, kvk_name, period_key, snapshot_type)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(player_id) DO UPDATE SET
+            player_name = excluded.player_name,
+            power = excluded.power,
+            kill_points = excluded.kill_points,
+            deaths = excluded.deaths,
+            kvk_name = excluded.kvk_name,
+            period_key = excluded.period_key,
+            snapshot_type = excluded.snapshot_type
+        WHERE snapshot_type IS NULL
+            OR excluded.kill_points > kill_points
+            OR (excluded.kill_points = kill_points AND excluded.power >= power)
+    ''', [(*row, kvk_name, period_key, snapshot_type) for row in rows])
+
+def _refresh_best_snapshots(cursor, player_ids):
+    """Recomputes player_best_snapshots for the given players from kvk_snapshots / kingdom_players."""
+    params = [(pid,) for pid in set(player_ids)]
+    cursor.executemany("DELETE FROM player_best_snapshots WHERE player_id = ?", params)
+    cursor.executemany('''
+        INSERT INTO player_best_snapshots
+        (player_id, player_name, power, kill_points, deaths, kvk_name, period_key, snapshot_type)
+        SELECT player_id, player_name, power, kill_points, deaths, kvk_name, period_key, snapshot_type
+        FROM kvk_snapshots
+        WHERE player_id = ?
+        ORDER BY kill_points DESC, power DESC
+        LIMIT 1
+    ''', params)
+    # Roster-only players (never seen in a snapshot)
+    cursor.executemany('''
+        INSERT OR IGNORE INTO player_best_snapshots (player_id, player_name, power, kill_points, deaths, kvk_name)
+        SELECT player_id, player_name, COALESCE(power, 0), 0, 0, 'Roster'
+        FROM kingdom_players
+        WHERE player_id = ?
+    ''', params)
+
+def _rebuild_best_snapshots(cursor):
+    """Rebuilds player_best_snapshots from scratch."""
+    cursor.execute("DELETE FROM player_best_snapshots")
+    cursor.execute('''
+        INSERT INTO player_best_snapshots
+        (player_id, player_name, power, kill_points, deaths, kvk_name, period_key, snapshot_type)
+        SELECT player_id, player_name, power, kill_points, deaths, kvk_name, period_key, snapshot_type
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY player_id ORDER BY kill_points DESC, power DESC) as rn
+            FROM kvk_snapshots
+        ) WHERE rn = 1
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO player_best_snapshots (player_id, player_name, power, kill_points, deaths, kvk_name)
+        SELECT player_id, player_name, COALESCE(power, 0), 0, 0, 'Roster'
+        FROM kingdom_players
+    ''')
+
+def import_kingdom_players(source, kvk_name: str):
+    """Imports the base list of kingdom players from Excel (file path, raw bytes or file-like object)."""
     try:
-        df = pd.read_excel(file_path)
+        import pandas as pd
+        df = pd.read_excel(open_upload(source))
         df.columns = [c.strip().lower() for c in df.columns]
         
         col_map = {
@@ -41,12 +105,17 @@ def import_kingdom_players(file_path: str, kvk_name: str):
 
         with closing(get_connection()) as conn:
             cursor = conn.cursor()
+            cursor.execute("SELECT player_id FROM kingdom_players WHERE kvk_name = ?", (kvk_name,))
+            roster_ids = [row[0] for row in cursor.fetchall()]
             cursor.execute("DELETE FROM kingdom_players WHERE kvk_name = ?", (kvk_name,))
             cursor.executemany('''
                 INSERT OR REPLACE INTO kingdom_players (player_id, player_name, power, kvk_name)
                 VALUES (?, ?, ?, ?)
             ''', data_to_insert)
+            _upsert_players(cursor, (row[:3] for row in data_to_insert))
+            _refresh_best_snapshots(cursor, roster_ids + [row[0] for row in data_to_insert])
             conn.commit()
+            invalidate_active_season()
             
         return True, f"Imported {len(data_to_insert)} players."
     except Exception as e:
@@ -55,6 +124,9 @@ def import_kingdom_players(file_path: str, kvk_name: str):
 
 def get_kingdom_player(player_id: int, kvk_name: str):
     """Gets a player from the kingdom players list."""
+    model = get_active_season_model(kvk_name)
+    if model is not None:
+        return model.kingdom_player(player_id)
     try:
         with closing(get_connection()) as conn:
             conn.row_factory = sqlite3.Row
@@ -66,6 +138,88 @@ def get_kingdom_player(player_id: int, kvk_name: str):
         logger.error(f"Error getting kingdom player: {e}")
         return None
 
+def get_player(player_id: int):
+    """Returns the player directory entry (latest_name, latest_power, first/last seen, account_type) or None."""
+    try:
+        with closing(get_connection()) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM players WHERE player_id = ?", (player_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    except Exception as e:
+        logger.error(f"Error getting player: {e}")
+        return None
+
+def search_players(query: str, limit: int = 25):
+    """
+    Finds players by partial name (any current or past name) or by ID prefix.
+    Uses the trigram FTS index for queries of 3+ characters, LIKE otherwise.
+    Returns rows with player_id, latest_name, latest_power and matched_name, best matches first.
+    """
+    query = (query or "").strip()
+    if not query:
+        return []
+    try:
+        with closing(get_connection()) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            like = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            results = {}
+
+            if query.isdigit():
+                cursor.execute('''
+                    SELECT player_id, latest_name, latest_power, latest_name as matched_name
+                    FROM players
+                    WHERE CAST(player_id AS TEXT) LIKE ? || '%'
+                    ORDER BY latest_power DESC
+                    LIMIT ?
+                ''', (query, limit))
+                results.update((row['player_id'], dict(row)) for row in cursor.fetchall())
+
+            if len(query) >= 3:
+                try:
+                    cursor.execute('''
+                        SELECT p.player_id, p.latest_name, p.latest_power, MIN(h.name) as matched_name
+                        FROM (
+                            SELECT rowid FROM player_names_fts
+                            WHERE player_names_fts MATCH ?
+                            ORDER BY rank
+                            LIMIT 200
+                        ) f
+                        JOIN player_name_history h ON h.id = f.rowid
+                        JOIN players p ON p.player_id = h.player_id
+                        GROUP BY p.player_id
+                        ORDER BY (p.latest_name LIKE ? || '%' ESCAPE '\\') DESC, p.latest_power DESC
+                        LIMIT ?
+                    ''', ('"' + query.replace('"', '""') + '"', like, limit))
+                except sqlite3.OperationalError:
+                    # FTS5/trigram not available in this SQLite build
+                    cursor.execute('''
+                        SELECT p.player_id, p.latest_name, p.latest_power, MIN(h.name) as matched_name
+                        FROM player_name_history h
+                        JOIN players p ON p.player_id = h.player_id
+                        WHERE h.name LIKE '%' || ? || '%' ESCAPE '\\'
+                        GROUP BY p.player_id
+                        ORDER BY (p.latest_name LIKE ? || '%' ESCAPE '\\') DESC, p.latest_power DESC
+                        LIMIT ?
+                    ''', (like, like, limit))
+            else:
+                cursor.execute('''
+                    SELECT player_id, latest_name, latest_power, latest_name as matched_name
+                    FROM players
+                    WHERE latest_name LIKE ? || '%' ESCAPE '\\'
+                    ORDER BY latest_power DESC
+                    LIMIT ?
+                ''', (like, limit))
+
+            for row in cursor.fetchall():
+                results.setdefault(row['player_id'], dict(row))
+            return list(results.values())[:limit]
+    except Exception as e:
+        logger.error(f"Error searching players: {e}")
+        return []
+
 def get_all_kingdom_players(kvk_name: str):
     """Gets all players in the kingdom for this KvK."""
     try:
@@ -83,11 +237,33 @@ def delete_player(player_id: int):
     try:
         with closing(get_connection()) as conn:
             cursor = conn.cursor()
+            # Kingdom totals of the batches/seasons this player appeared in
+            cursor.execute("SELECT DISTINCT kvk_name, period_key, snapshot_type FROM kvk_snapshots WHERE player_id = ?", (player_id,))
+            snapshot_batches = cursor.fetchall()
+            cursor.execute("SELECT DISTINCT kvk_name FROM kvk_stats WHERE player_id = ?", (player_id,))
+            result_seasons = [row[0] for row in cursor.fetchall()]
             cursor.execute("DELETE FROM kvk_stats WHERE player_id = ?", (player_id,))
             cursor.execute("DELETE FROM kvk_snapshots WHERE player_id = ?", (player_id,))
             cursor.execute("DELETE FROM linked_accounts WHERE player_id = ?", (player_id,))
+            # Re-rank the fort seasons/periods this player appeared in
+            cursor.execute("SELECT DISTINCT kvk_name, period_key FROM fort_stats WHERE player_id = ?", (player_id,))
+            fort_periods = cursor.fetchall()
             cursor.execute("DELETE FROM fort_stats WHERE player_id = ?", (player_id,))
+            cursor.execute("DELETE FROM fort_totals WHERE player_id = ?", (player_id,))
+            cursor.execute("DELETE FROM players WHERE player_id = ?", (player_id,))
+            cursor.execute("DELETE FROM player_name_history WHERE player_id = ?", (player_id,))
+            _refresh_best_snapshots(cursor, [player_id])
+            for kvk_name, period_key in fort_periods:
+                _rank_fort_period(cursor, kvk_name, period_key)
+            for kvk_name in {kvk for kvk, _ in fort_periods}:
+                _rank_fort_totals(cursor, kvk_name)
+            from .kvk import _refresh_snapshot_aggregate, _refresh_results_aggregates
+            for batch in snapshot_batches:
+                _refresh_snapshot_aggregate(cursor, *batch)
+            for kvk_name in result_seasons:
+                _refresh_results_aggregates(cursor, kvk_name)
             conn.commit()
+            invalidate_active_season()
         return True
     except Exception as e:
         logger.error(f"Error deleting player: {e}")
@@ -102,6 +278,7 @@ def link_account(discord_id: int, player_id: int, account_type: str = 'main'):
                 INSERT OR REPLACE INTO linked_accounts (discord_id, player_id, account_type)
                 VALUES (?, ?, ?)
             ''', (discord_id, player_id, account_type))
+            _sync_player_account_type(cursor, player_id)
             conn.commit()
         return True
     except Exception as e:
@@ -114,13 +291,10 @@ def get_linked_accounts(discord_id: int):
         with closing(get_connection()) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            # Try to join with kingdom_players, kvk_stats, or fort_stats to get a name
             cursor.execute('''
-                SELECT la.*, COALESCE(kp.player_name, ks.player_name, fs.player_name, 'Unknown') as player_name
+                SELECT la.*, COALESCE(p.latest_name, 'Unknown') as player_name
                 FROM linked_accounts la
-                LEFT JOIN kingdom_players kp ON la.player_id = kp.player_id
-                LEFT JOIN (SELECT player_id, player_name FROM kvk_stats GROUP BY player_id) ks ON la.player_id = ks.player_id
-                LEFT JOIN (SELECT player_id, player_name FROM fort_stats GROUP BY player_id) fs ON la.player_id = fs.player_id
+                LEFT JOIN players p ON la.player_id = p.player_id
                 WHERE la.discord_id = ?
             ''', (discord_id,))
             return [dict(row) for row in cursor.fetchall()]
@@ -135,11 +309,9 @@ def get_all_linked_accounts_full():
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT la.*, COALESCE(kp.player_name, ks.player_name, fs.player_name, 'Unknown') as player_name
+                SELECT la.*, COALESCE(p.latest_name, 'Unknown') as player_name
                 FROM linked_accounts la
-                LEFT JOIN kingdom_players kp ON la.player_id = kp.player_id
-                LEFT JOIN (SELECT player_id, player_name FROM kvk_stats GROUP BY player_id) ks ON la.player_id = ks.player_id
-                LEFT JOIN (SELECT player_id, player_name FROM fort_stats GROUP BY player_id) fs ON la.player_id = fs.player_id
+                LEFT JOIN players p ON la.player_id = p.player_id
             ''')
             return [dict(row) for row in cursor.fetchall()]
     except Exception as e:
@@ -152,6 +324,7 @@ def unlink_account(discord_id: int, player_id: int):
         with closing(get_connection()) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM linked_accounts WHERE discord_id = ? AND player_id = ?", (discord_id, player_id))
+            _sync_player_account_type(cursor, player_id)
             conn.commit()
             return cursor.rowcount > 0
     except Exception as e:
@@ -167,7 +340,10 @@ def add_new_player(player_id: int, name: str, power: int, kvk_name: str):
                 INSERT OR REPLACE INTO kingdom_players (player_id, player_name, power, kvk_name)
                 VALUES (?, ?, ?, ?)
             ''', (player_id, name, power, kvk_name))
+            _upsert_players(cursor, [(player_id, name, power)])
+            _refresh_best_snapshots(cursor, [player_id])
             conn.commit()
+            invalidate_active_season()
         return True
     except Exception as e:
         logger.error(f"Error adding new player: {e}")
@@ -175,78 +351,79 @@ def add_new_player(player_id: int, name: str, power: int, kvk_name: str):
 
 def get_all_players_global():
     """
-    Returns a list of ALL players found in the database (snapshots or kingdom roster).
-    Returns the entry with the highest Kill Points (or Power if no KP) for each player ID.
+    Returns a list of ALL players found in the database (snapshots or kingdom roster), highest power first.
+    Each player is represented by the entry with the highest Kill Points (or Power if no KP).
     """
     try:
         with closing(get_connection()) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            
-            # We want one row per player_id.
-            # Strategy:
-            # 1. Get latest snapshot for each player (Highest KP -> Highest Power)
-            # 2. Get info from kingdom_players for anyone not in snapshots.
-            
             cursor.execute('''
-                WITH RankedSnaps AS (
-                    SELECT 
-                        player_id, player_name, power, kill_points, deaths,
-                        ROW_NUMBER() OVER (PARTITION BY player_id ORDER BY kill_points DESC, power DESC) as rn
-                    FROM kvk_snapshots
-                ),
-                DistinctRoaster AS (
-                    SELECT player_id, player_name, MAX(power) as power
-                    FROM kingdom_players
-                    GROUP BY player_id
-                )
-                
-                SELECT 
-                    COALESCE(rs.player_id, dr.player_id) as player_id,
-                    COALESCE(rs.player_name, dr.player_name) as player_name,
-                    COALESCE(rs.power, dr.power) as power,
-                    COALESCE(rs.kill_points, 0) as kill_points,
-                    COALESCE(rs.deaths, 0) as deaths
-                FROM DistinctRoaster dr
-                FULL OUTER JOIN RankedSnaps rs ON dr.player_id = rs.player_id AND rs.rn = 1
-                WHERE rs.rn = 1 OR rs.player_id IS NULL
+                SELECT player_id, player_name, power, kill_points, deaths, kvk_name
+                FROM player_best_snapshots
+                ORDER BY power DESC, player_id
             ''')
-            
-            # Note: SQLite < 3.39 doesn't support FULL OUTER JOIN.
-            # If that fails, we use UNION ALL strategy.
-            # Most discord.py environments have recent sqlite, but let's be safe if it errors?
-            # Actually, standard fallback is LEFT JOIN + UNION ALL (RIGHT JOIN equivalent or just getting the others).
-            
-            # Safer query for compatibility:
-            # Get all form Snaps + all from Roaster not in Snaps.
-            
-            query_safe = '''
-                SELECT 
-                    player_id, player_name, power, kill_points, deaths, kvk_name
-                FROM (
-                    SELECT 
-                        player_id, player_name, power, kill_points, deaths, kvk_name,
-                        ROW_NUMBER() OVER (PARTITION BY player_id ORDER BY kill_points DESC, power DESC) as rn
-                    FROM kvk_snapshots
-                ) WHERE rn = 1
-                
-                UNION ALL
-                
-                SELECT 
-                    player_id, player_name, MAX(power) as power, 
-                    0 as kill_points, 0 as deaths, 'Roster' as kvk_name
-                FROM kingdom_players
-                WHERE player_id NOT IN (SELECT DISTINCT player_id FROM kvk_snapshots)
-                GROUP BY player_id
-            '''
-            
-            cursor.execute(query_safe)
             return [dict(row) for row in cursor.fetchall()]
-            
     except Exception as e:
         logger.error(f"Error getting global player list: {e}")
         return []
 
+def get_players_page(account_type: str = None, after: tuple = None, before: tuple = None, limit: int = 8):
+    """
+    Keyset-paginated global player list ordered by power (highest first).
+    after / before: (power, player_id) of the last / first row of the current page.
+    account_type: 'main', 'farm', 'alt' or None for all players.
+    """
+    try:
+        with closing(get_connection()) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            conditions, params = [], []
+            if account_type:
+                conditions.append("COALESCE(p.account_type, 'main') = ?")
+                params.append(account_type)
+            if after:
+                conditions.append("b.power <= ? AND (b.power < ? OR b.player_id > ?)")
+                params.extend([after[0], after[0], after[1]])
+            elif before:
+                conditions.append("b.power >= ? AND (b.power > ? OR b.player_id < ?)")
+                params.extend([before[0], before[0], before[1]])
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            # Walk backwards from `before`, then flip the page back into display order
+            order = "b.power ASC, b.player_id DESC" if before and not after else "b.power DESC, b.player_id ASC"
+            cursor.execute(f'''
+                SELECT b.player_id, b.player_name, b.power, b.kill_points, b.deaths, b.kvk_name,
+                    COALESCE(p.account_type, 'main') as account_type
+                FROM player_best_snapshots b
+                LEFT JOIN players p ON p.player_id = b.player_id
+                {where}
+                ORDER BY {order}
+                LIMIT ?
+            ''', (*params, limit))
+            rows = [dict(row) for row in cursor.fetchall()]
+            return rows[::-1] if before and not after else rows
+    except Exception as e:
+        logger.error(f"Error getting players page: {e}")
+        return []
+
+def count_players_global(account_type: str = None):
+    """Returns the number of players in the global list (optionally of one account type)."""
+    try:
+        with closing(get_connection()) as conn:
+            cursor = conn.cursor()
+            if account_type:
+                cursor.execute('''
+                    SELECT COUNT(*) FROM player_best_snapshots b
+                    LEFT JOIN players p ON p.player_id = b.player_id
+                    WHERE COALESCE(p.account_type, 'main') = ?
+                ''', (account_type,))
+            else:
+                cursor.execute("SELECT COUNT(*) FROM player_best_snapshots")
+            return cursor.fetchone()[0]
+    except Exception as e:
+        logger.error(f"Error counting players: {e}")
+        return 0
+
 def set_player_type(player_id: int, account_type: str):
     """Sets or updates the account type for an unlinked player."""
     try:
@@ -256,6 +433,7 @@ def set_player_type(player_id: int, account_type: str):
                 INSERT OR REPLACE INTO player_types (player_id, account_type)
                 VALUES (?, ?)
             ''', (player_id, account_type.lower()))
+            _sync_player_account_type(cursor, player_id)
             conn.commit()
         return True
     except Exception as e:
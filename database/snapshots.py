@@ -0,0 +1,206 @@
+SNAPSHOT_COLUMNS = ('power', 'kill_points', 'deaths', 't1_kills', 't2_kills', 't3_kills', 't4_kills', 't5_kills')
+
+
+class SnapshotColumns:
+    """
+    One snapshot batch (or a diff of two) as numpy arrays, sorted by player_id:
+    `player_ids`, `player_names` (list) and one int64 array per stat column in `columns`.
+    """
+    def __init__(self, player_ids, player_names: list, columns: dict):
+        self.player_ids = player_ids
+        self.player_names = player_names
+        self.columns = columns
+        self._index = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows: (player_id, player_name, *SNAPSHOT_COLUMNS) tuples ordered by player_id."""
+        import numpy as np
+        count = len(rows)
+        player_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=count)
+        columns = {
+            name: np.fromiter((r[pos] or 0 for r in rows), dtype=np.int64, count=count)
+            for pos, name in enumerate(SNAPSHOT_COLUMNS, start=2)
+        }
+        return cls(player_ids, [r[1] for r in rows], columns)
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def __getitem__(self, column: str):
+        return self.columns[column]
+
+    @property
+    def index(self) -> dict:
+        """player_id -> row position (built on first use)."""
+        if self._index is None:
+            self._index = {pid: i for i, pid in enumerate(self.player_ids.tolist())}
+        return self._index
+
+    def __contains__(self, player_id: int):
+        return player_id in self.index
+
+    def get(self, player_id: int):
+        """One player's row as a dict, or None."""
+        i = self.index.get(player_id)
+        if i is None:
+            return None
+        row = {'player_id': player_id, 'player_name': self.player_names[i]}
+        row.update((name, int(values[i])) for name, values in self.columns.items())
+        return row
+
+    def sums(self, *columns) -> dict:
+        """Column totals as ints ({column: total}); all columns if none are given."""
+        return {name: int(self.columns[name].sum()) for name in (columns or self.columns)}
+
+    def diff(self, start: "SnapshotColumns", columns=SNAPSHOT_COLUMNS, floor: int = None) -> "SnapshotColumns":
+        """
+        self - start for the players present in both. Only `columns` are subtracted (clipped
+        at `floor` if given); other columns keep self's values. Names come from self.
+        """
+        import numpy as np
+        if not len(self) or not len(start):
+            empty = np.zeros(0, dtype=np.int64)
+            return SnapshotColumns(empty, [], {name: empty for name in self.columns})
+        pos = np.searchsorted(start.player_ids, self.player_ids)
+        pos_clipped = np.minimum(pos, len(start) - 1)
+        present = start.player_ids[pos_clipped] == self.player_ids
+        mine, theirs = np.flatnonzero(present), pos_clipped[present]
+
+        result = {}
+        for name, values in self.columns.items():
+            if name in columns:
+                delta = values[mine] - start.columns[name][theirs]
+                result[name] = np.maximum(delta, floor) if floor is not None else delta
+            else:
+                result[name] = values[mine]
+        names = self.player_names
+        return SnapshotColumns(self.player_ids[mine], [names[i] for i in mine.tolist()], result)
+
+    def to_records(self, **extra) -> list:
+        """Rows as dicts (plain ints), each updated with `extra`."""
+        names = list(self.columns)
+        values = [self.columns[name].tolist() for name in names]
+        return [
+            {'player_id': pid, 'player_name': player_name, **dict(zip(names, row)), **extra}
+            for pid, player_name, *row in zip(self.player_ids.tolist(), self.player_names, *values)
+        ]
+
+
+class SeasonColumns:
+    """
+    Per-player season totals across several seasons as numpy matrices: row i is player_ids[i],
+    column j is kvk_names[j] (oldest first). `present[i, j]` marks players with results in that
+    season; `columns` holds one int64 matrix per stat (0 where absent). Power is the player's
+    latest power in the season, the other stats are season sums.
+    """
+    def __init__(self, kvk_names: list, player_ids, player_names: list, present, columns: dict):
+        self.kvk_names = kvk_names
+        self.player_ids = player_ids
+        self.player_names = player_names
+        self.present = present
+        self.columns = columns
+
+    @classmethod
+    def from_rows(cls, kvk_names: list, rows):
+        """rows: (kvk_name, player_id, player_name, *SNAPSHOT_COLUMNS) tuples; other seasons are ignored."""
+        import numpy as np
+        season_pos = {name: j for j, name in enumerate(kvk_names)}
+        rows = [r for r in rows if r[0] in season_pos]
+        ids = sorted({r[1] for r in rows})
+        index = {pid: i for i, pid in enumerate(ids)}
+        i = np.fromiter((index[r[1]] for r in rows), dtype=np.int64, count=len(rows))
+        j = np.fromiter((season_pos[r[0]] for r in rows), dtype=np.int64, count=len(rows))
+
+        shape = (len(ids), len(kvk_names))
+        present = np.zeros(shape, dtype=bool)
+        present[i, j] = True
+        columns = {}
+        for pos, name in enumerate(SNAPSHOT_COLUMNS, start=3):
+            matrix = np.zeros(shape, dtype=np.int64)
+            matrix[i, j] = [r[pos] or 0 for r in rows]
+            columns[name] = matrix
+
+        # Name from the newest season the player appears in
+        names = [None] * len(ids)
+        newest = [-1] * len(ids)
+        for r, row_i, col_j in zip(rows, i.tolist(), j.tolist()):
+            if col_j > newest[row_i]:
+                newest[row_i], names[row_i] = col_j, r[2]
+        return cls(list(kvk_names), np.array(ids, dtype=np.int64), names, present, columns)
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def __getitem__(self, column: str):
+        return self.columns[column]
+
+    def season_totals(self) -> list:
+        """Kingdom totals per season (oldest first): kvk_name, player_count and one sum per column."""
+        counts = self.present.sum(axis=0).tolist()
+        sums = {name: values.sum(axis=0).tolist() for name, values in self.columns.items()}
+        return [
+            {'kvk_name': kvk_name, 'player_count': counts[j], **{name: sums[name][j] for name in sums}}
+            for j, kvk_name in enumerate(self.kvk_names)
+        ]
+
+    def returning(self):
+        """(players, seasons - 1) bool matrix: present in season j and the one before it."""
+        return self.present[:, 1:] & self.present[:, :-1]
+
+    def deltas(self, column: str):
+        """Season-over-season change per player, (players, seasons - 1); 0 unless returning."""
+        values = self.columns[column]
+        return (values[:, 1:] - values[:, :-1]) * self.returning()
+
+    def growth(self, column: str):
+        """Season-over-season change in percent, (players, seasons - 1); NaN unless returning with a non-zero base."""
+        import numpy as np
+        previous = self.columns[column][:, :-1].astype(float)
+        valid = self.returning() & (previous != 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = self.deltas(column) / previous * 100
+        return np.where(valid, pct, np.nan)
+
+    def top_changes(self, column: str, limit: int = 5) -> list:
+        """Returning players of the newest season with the largest `column` increase over the season before."""
+        import numpy as np
+        if len(self.kvk_names) < 2:
+            return []
+        returning = np.flatnonzero(self.returning()[:, -1])
+        delta = self.deltas(column)[returning, -1]
+        order = returning[np.argsort(-delta, kind='stable')[:limit]]
+        values, growth = self.columns[column], self.growth(column)[:, -1]
+        return [
+            {'player_id': int(self.player_ids[i]), 'player_name': self.player_names[i],
+             'previous': int(values[i, -2]), 'current': int(values[i, -1]),
+             'delta': int(values[i, -1] - values[i, -2]),
+             'growth': None if np.isnan(growth[i]) else float(growth[i])}
+            for i in order.tolist()
+        ]
+
+    def to_records(self, columns=('power', 'kill_points', 'deaths')) -> list:
+        """
+        One dict per player: player_id, player_name and, for each season, `<column>` totals
+        (None if absent) plus `<column>_delta` / `<column>_growth` against the season before
+        (None unless the player played both; growth also None on a zero base).
+        """
+        import numpy as np
+        values = {name: self.columns[name].tolist() for name in columns}
+        deltas = {name: self.deltas(name).tolist() for name in columns}
+        growth = {name: self.growth(name).tolist() for name in columns}
+        present, returning = self.present.tolist(), self.returning().tolist()
+        records = []
+        for i, (pid, player_name) in enumerate(zip(self.player_ids.tolist(), self.player_names)):
+            seasons = []
+            for j, kvk_name in enumerate(self.kvk_names):
+                season = {'kvk_name': kvk_name}
+                for name in columns:
+                    season[name] = values[name][i][j] if present[i][j] else None
+                    back = j > 0 and returning[i][j - 1]
+                    season[f"{name}_delta"] = deltas[name][i][j - 1] if back else None
+                    pct = growth[name][i][j - 1] if back else None
+                    season[f"{name}_growth"] = None if pct is None or np.isnan(pct) else pct
+                seasons.append(season)
+            records.append({'player_id': pid, 'player_name': player_name, 'seasons': seasons})
+        return records
@@ -1,7 +1,12 @@
+import time
+# Reference point for the startup report logged in on_ready
+STARTUP_T0 = time.perf_counter()
+
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 import os
+import sys
 import logging
 from dotenv import load_dotenv
 from database import database_manager as db_manager
@@ -13,17 +18,31 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
 logger = logging.getLogger('discord_bot')
 
+# Imported lazily on first upload / render; listed in the startup report if something loads them early
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'PIL')
+
 
 class MyBot(commands.Bot):
     def __init__(self, *, intents: discord.Intents):
-        super().__init__(command_prefix="!", intents=intents)
+        self.startup_phases = {}
+        self._startup_last = STARTUP_T0
+        self._startup_reported = False
+        self._startup_mark("imports")
+
+        # Every slash command runs inside a latency trace (see core/tracing.py)
+        from core.tracing import TracingCommandTree, record_phase
+        super().__init__(command_prefix="!", intents=intents, tree_cls=TracingCommandTree)
+        db_manager.add_query_listener(lambda function, elapsed_ms: record_phase("db", elapsed_ms))
         self.initial_extensions = ['modules.admin', 'modules.stats', 'modules.forts']  # List of modules to load
         
         # Initialize database tables on startup
-        from database import database_manager as db_manager
         db_manager.create_tables()
         logger.info("Database tables initialized/verified.")
 
+        # Shared outbound message queue (used by notifications and the log channel)
+        from core.dispatcher import OutboundDispatcher
+        self.outbound = OutboundDispatcher(self)
+
         # Initialize Notification Manager
         from core.notifications import NotificationManager
         self.notifications = NotificationManager(self)
@@ -32,7 +51,42 @@ class MyBot(commands.Bot):
         from core.logger import BotLogger
         self.logger = BotLogger(self)
 
+        # Initialize batched audit log writer (admin_logs)
+        from core.audit import AuditLogWriter
+        self.audit = AuditLogWriter()
+        self._startup_mark("init")
+
+    def _startup_mark(self, phase: str):
+        """Records how long the startup phase that just ended took (reported once in on_ready)."""
+        now = time.perf_counter()
+        self.startup_phases[phase] = now - self._startup_last
+        self._startup_last = now
+
     async def setup_hook(self):
+        self._startup_mark("login")
+        self.audit.start()
+        self.outbound.start()
+
+        # Logs which database / rendering call blocked the event loop when it stalls
+        from core.watchdog import LoopWatchdog, LOOP_WATCHDOG_ENABLED
+        self.watchdog = LoopWatchdog() if LOOP_WATCHDOG_ENABLED else None
+        if self.watchdog:
+            self.watchdog.start()
+
+        # Optional Prometheus / health endpoint (no listeners are installed without it)
+        from core import metrics
+        self.metrics_server = None
+        if metrics.METRICS_PORT:
+            try:
+                metrics.install(self)
+                self.metrics_server = metrics.MetricsServer(self)
+                await self.metrics_server.start()
+            except Exception as e:
+                logger.error(f"Failed to start metrics server. Error: {e}")
+                self.metrics_server = None
+
+        self._startup_mark("services")
+
         logger.info("Starting module loading...")
         for ext in self.initial_extensions:
             try:
@@ -40,13 +94,26 @@ class MyBot(commands.Bot):
                 logger.info(f"Module {ext} loaded successfully.")
             except Exception as e:
                 logger.error(f"Failed to load module {ext}. Error: {e}")
+        self._startup_mark("extensions")
 
-        # Sync slash commands globally
+        # Sync slash commands globally, only when the command tree changed since the last sync (!sync forces it)
         try:
-            synced = await self.tree.sync()
-            logger.info(f"Synced {len(synced)} slash commands globally.")
+            from core.command_sync import sync_if_changed
+            await sync_if_changed(self)
         except Exception as e:
             logger.error(f"Failed to sync slash commands. Error: {e}")
+        self._startup_mark("command_sync")
+
+    async def close(self):
+        # Flush pending audit entries and log digests before the loop goes away
+        await self.audit.close()
+        await self.logger.close()
+        await self.outbound.close()
+        if getattr(self, 'metrics_server', None):
+            await self.metrics_server.close()
+        if getattr(self, 'watchdog', None):
+            self.watchdog.stop()
+        await super().close()
 
     @tasks.loop(hours=24) # Daily
     async def compliance_check(self):
@@ -90,6 +157,14 @@ class MyBot(commands.Bot):
     async def on_ready(self):
         logger.info(f'Bot {self.user} successfully connected and ready to work!')
         logger.info(f'{self.user} has connected to Discord!')
+
+        if not self._startup_reported:
+            self._startup_reported = True
+            self._startup_mark("gateway")
+            phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.startup_phases.items())
+            heavy = [m for m in HEAVY_MODULES if m in sys.modules]
+            logger.info(f"Startup took {time.perf_counter() - STARTUP_T0:.2f}s ({phases}). "
+                        f"Heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
         
         # Start background tasks if not already running
         if not self.compliance_check.is_running():
@@ -157,7 +232,9 @@ async def sync(ctx, spec: str = None):
         synced = await ctx.bot.tree.sync(guild=ctx.guild)
         await ctx.send(f"Synced {len(synced)} commands to this guild (Instant).")
     else:
+        from core.command_sync import remember_synced_tree
         synced = await ctx.bot.tree.sync()
+        remember_synced_tree(ctx.bot.tree, ctx.bot.application_id)
         await ctx.send(f"Synced {len(synced)} commands globally. (May take up to 1 hour).")
 
 @bot.command()
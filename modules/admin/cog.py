@@ -5,8 +5,13 @@ import os
 import logging
 import io
 import csv
+import asyncio
+import tempfile
+from datetime import datetime, timedelta, timezone
 from database import database_manager as db_manager
-from core.helpers import get_season_autocomplete_choices
+from core.helpers import get_season_autocomplete_choices, get_player_autocomplete_choices, read_attachment
+from core.tracing import span, get_latency_report, clear_traces
+from core.profiler import command_profiler, summarize_profile
 from .views import (
     AdminPanelView, KvKSelectView, FinishKvKConfirmView, 
     ResetBotConfirmView, ClearFortsConfirmView, WizardKvKSelectView,
@@ -20,6 +25,9 @@ from .modals import RequirementsModal, GlobalRequirementsModal
 
 logger = logging.getLogger('discord_bot.admin')
 
+# Admin logs older than this many days are moved to the archive DB daily (0 disables)
+ADMIN_LOG_RETENTION_DAYS = int(os.getenv('ADMIN_LOG_RETENTION_DAYS', 180))
+
 class Admin(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
@@ -46,9 +54,12 @@ class Admin(commands.Cog):
         
         # Start background tasks
         self.backup_loop.start()
+        if ADMIN_LOG_RETENTION_DAYS > 0:
+            self.log_retention_loop.start()
 
     def cog_unload(self):
         self.backup_loop.cancel()
+        self.log_retention_loop.cancel()
 
     @tasks.loop(hours=24)
     async def backup_loop(self):
@@ -102,8 +113,11 @@ class Admin(commands.Cog):
         if hasattr(self.bot, 'logger'):
             await self.bot.logger.log_admin_action(interaction, action, details)
         
-        # Always log to database
-        db_manager.log_admin_action(interaction.user.id, interaction.user.name, action, details)
+        # Always log to database (batched by the audit writer when running under MyBot)
+        if hasattr(self.bot, 'audit'):
+            await self.bot.audit.log(interaction.user.id, interaction.user.name, action, details)
+        else:
+            db_manager.log_admin_action(interaction.user.id, interaction.user.name, action, details)
 
     @app_commands.command(name='admin_panel', description='Open the central administrative dashboard.')
     @app_commands.default_permissions(administrator=True)
@@ -143,27 +157,56 @@ class Admin(commands.Cog):
         else:
             await interaction.followup.send("❌ Failed to create backup file.")
 
-    @app_commands.command(name="export_logs", description="Export all admin logs as a CSV file.")
+    @app_commands.command(name="export_logs", description="Export admin logs as a CSV file (optionally by date range).")
+    @app_commands.describe(
+        start_date="First day to include (YYYY-MM-DD, UTC, optional)",
+        end_date="Last day to include (YYYY-MM-DD, UTC, optional)",
+        admin="Only include actions by this admin (optional)",
+        compress="Gzip the CSV (default: False)",
+        archived="Export from the retention archive instead of recent logs (default: False)"
+    )
     @app_commands.default_permissions(administrator=True)
-    async def export_logs(self, interaction: discord.Interaction):
+    async def export_logs(self, interaction: discord.Interaction, start_date: str = None, end_date: str = None,
+                          admin: discord.User = None, compress: bool = False, archived: bool = False):
         if not self.is_admin(interaction):
             await interaction.response.send_message("You do not have permissions.", ephemeral=False)
             return
-            
-        logs = db_manager.get_all_admin_logs()
-        if not logs:
-            await interaction.response.send_message("No logs found.", ephemeral=False)
-            return
-            
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['ID', 'Admin ID', 'Admin Name', 'Action', 'Details', 'Timestamp'])
-        for log in logs:
-            writer.writerow([log['id'], log['admin_id'], log['admin_name'], log['action'], log['details'], log['timestamp']])
-            
-        output.seek(0)
-        file = discord.File(io.BytesIO(output.getvalue().encode()), filename="admin_logs.csv")
-        await interaction.response.send_message(f"Found {len(logs)} logs.", file=file, ephemeral=False)
+
+        from core.helpers import validate_date
+        for value in (start_date, end_date):
+            is_valid, error = validate_date(value)
+            if not is_valid:
+                await interaction.response.send_message(f"❌ {error}", ephemeral=False)
+                return
+
+        # end_date is inclusive for the user, exclusive for the query
+        end = (datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d") if end_date else None
+        admin_id = admin.id if admin else None
+
+        await interaction.response.defer(ephemeral=False)
+        # Rows are streamed from the DB into a temp file instead of being built up in memory
+        with tempfile.TemporaryFile() as spool:
+            count = await asyncio.to_thread(
+                db_manager.write_admin_logs_csv, spool, start_date, end, admin_id, compress, archived
+            )
+            if count == 0:
+                await interaction.followup.send("No logs found.")
+                return
+
+            spool.seek(0)
+            filename = "admin_logs.csv.gz" if compress else "admin_logs.csv"
+            file = discord.File(spool, filename=filename)
+            await interaction.followup.send(f"Found {count} logs.", file=file)
+
+    @tasks.loop(hours=24)
+    async def log_retention_loop(self):
+        """Background task that moves admin logs older than ADMIN_LOG_RETENTION_DAYS to the archive DB."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=ADMIN_LOG_RETENTION_DAYS)).strftime("%Y-%m-%d %H:%M:%S")
+        await asyncio.to_thread(db_manager.archive_admin_logs, cutoff)
+
+    @log_retention_loop.before_loop
+    async def before_log_retention_loop(self):
+        await self.bot.wait_until_ready()
 
     @app_commands.command(name="create_kvk_season", description="🆕 Create a new KvK season with custom name and dates.")
     @app_commands.describe(
@@ -433,7 +476,7 @@ class Admin(commands.Cog):
         await interaction.response.send_message(embed=view.create_embed(), view=view)
 
     @app_commands.command(name="admin_link_account", description="Link a player ID to a Discord user.")
-    @app_commands.describe(user="The Discord user", player_id="The game ID")
+    @app_commands.describe(user="The Discord user", player_id="The game ID (type a name to search)")
     @app_commands.default_permissions(administrator=True)
     async def admin_link_account(self, interaction: discord.Interaction, user: discord.User, player_id: int):
         if not self.is_admin(interaction):
@@ -445,6 +488,10 @@ class Admin(commands.Cog):
         else:
             await interaction.response.send_message("❌ Failed to link.")
 
+    @admin_link_account.autocomplete('player_id')
+    async def admin_link_account_player_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[int]]:
+        return get_player_autocomplete_choices(db_manager.search_players(current), int)
+
     @app_commands.command(name="admin_unlink_account", description="Unlink a game account.")
     @app_commands.describe(player_id="The game ID")
     @app_commands.default_permissions(administrator=True)
@@ -590,7 +637,8 @@ class Admin(commands.Cog):
     @app_commands.command(name="dkp_leaderboard", description="🏆 Show DKP leaderboard.")
     @app_commands.describe(season="Optional: Select a specific season")
     async def dkp_leaderboard(self, interaction: discord.Interaction, season: str = None):
-        await interaction.response.defer(ephemeral=True)
+        async with span("defer"):
+            await interaction.response.defer(ephemeral=True)
         target = season or db_manager.get_current_kvk_name()
         all_stats = db_manager.get_all_kvk_stats(target)
         if not all_stats:
@@ -613,7 +661,8 @@ class Admin(commands.Cog):
             player_dkp.append({'player_id': s['player_id'], 'player_name': s['player_name'], 'power': s.get('total_power',0), 'req_power': start_p, 't4': t4, 't5': t5, 'deaths': d, 'dkp': dkp})
         player_dkp.sort(key=lambda x: x['dkp'], reverse=True)
         view = LeaderboardPaginationView(player_dkp, f"🏆 DKP Leaderboard (T4x{t4_w} T5x{t5_w} Dx{death_w})", target)
-        await interaction.followup.send(embed=view.create_embed(), view=view, ephemeral=True)
+        async with span("send"):
+            await interaction.followup.send(embed=view.create_embed(), view=view, ephemeral=True)
 
     @dkp_leaderboard.autocomplete('season')
     async def season_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
@@ -646,11 +695,8 @@ class Admin(commands.Cog):
             await ctx.send("❌ Current KvK is not set and no season name was provided.")
             return
 
-        file_path = f"temp_uploads/{attachment.filename}"
-        if not os.path.exists("temp_uploads"): os.makedirs("temp_uploads")
-        await attachment.save(file_path)
-        success, msg = db_manager.import_requirements(file_path, target_kvk)
-        os.remove(file_path)
+        upload = await read_attachment(attachment)
+        success, msg = db_manager.import_requirements(upload, target_kvk)
         await ctx.send(f"{'✅' if success else '❌'} (Season: `{target_kvk}`) {msg}")
 
     @commands.command(name="sync_requirements")
@@ -690,11 +736,8 @@ class Admin(commands.Cog):
             await ctx.send("❌ Please attach an Excel file with requirements.")
             return
         attachment = ctx.message.attachments[0]
-        file_path = f"temp_uploads/{attachment.filename}"
-        if not os.path.exists("temp_uploads"): os.makedirs("temp_uploads")
-        await attachment.save(file_path)
-        success, msg = db_manager.set_global_requirements_from_file(file_path)
-        os.remove(file_path)
+        upload = await read_attachment(attachment)
+        success, msg = db_manager.set_global_requirements_from_file(upload)
         await ctx.send(f"{'✅' if success else '❌'} {msg}")
 
     @commands.command(name="upload_players")
@@ -710,11 +753,8 @@ class Admin(commands.Cog):
             await ctx.send("❌ Current KvK is not set and no season name was provided.")
             return
 
-        file_path = f"temp_uploads/{attachment.filename}"
-        if not os.path.exists("temp_uploads"): os.makedirs("temp_uploads")
-        await attachment.save(file_path)
-        success, result = db_manager.import_kingdom_players(file_path, target_kvk)
-        os.remove(file_path)
+        upload = await read_attachment(attachment)
+        success, result = db_manager.import_kingdom_players(upload, target_kvk)
         if success:
             await ctx.send(f"✅ Successfully imported {result} players to **{target_kvk}**.")
         else:
@@ -736,11 +776,8 @@ class Admin(commands.Cog):
             
         attachment = ctx.message.attachments[0]
         current_kvk = db_manager.get_current_kvk_name()
-        file_path = f"temp_uploads/{attachment.filename}"
-        if not os.path.exists("temp_uploads"): os.makedirs("temp_uploads")
-        await attachment.save(file_path)
-        success, msg = db_manager.import_snapshot(file_path, current_kvk, period_name, snapshot_type)
-        os.remove(file_path)
+        upload = await read_attachment(attachment)
+        success, msg = db_manager.import_snapshot(upload, current_kvk, period_name, snapshot_type)
         await ctx.send(f"{'✅' if success else '❌'} {msg}")
 
     @commands.command(name="export_db")
@@ -750,6 +787,132 @@ class Admin(commands.Cog):
             return
         await ctx.send(file=discord.File(db_manager.DATABASE_PATH, filename="kvk_data_backup.db"))
 
+    @app_commands.command(name="db_stats", description="Show database query timings (slowest functions and statements).")
+    @app_commands.describe(reset="Clear the collected statistics after showing them (default: False)")
+    @app_commands.default_permissions(administrator=True)
+    async def db_stats(self, interaction: discord.Interaction, reset: bool = False):
+        if not self.is_admin(interaction):
+            await interaction.response.send_message("❌ You do not have permissions.", ephemeral=False)
+            return
+
+        stats = db_manager.get_query_stats(limit=10)
+        if not stats['functions']:
+            await interaction.response.send_message("No queries recorded yet (or QUERY_STATS=0).", ephemeral=False)
+            return
+
+        embed = discord.Embed(title="🗄️ Database Query Stats", color=discord.Color.dark_teal())
+        embed.description = f"Sorted by total time. Statements slower than {db_manager.SLOW_QUERY_MS:.0f} ms are logged with their query plan."
+
+        lines = [
+            f"`{e['name'][:40]}` ×{e['count']} · avg {e['avg_ms']:.1f} · p95 ≤{e['p95_ms']:.0f} · max {e['max_ms']:.0f} ms · {e['rows']} rows"
+            for e in stats['functions']
+        ]
+        embed.add_field(name="Functions", value="\n".join(lines)[:1024], inline=False)
+
+        lines = [
+            f"`{e['name'][:90]}`\n  ×{e['count']} · avg {e['avg_ms']:.1f} · max {e['max_ms']:.0f} ms · {e['rows']} rows"
+            for e in stats['statements'][:5]
+        ]
+        embed.add_field(name="Statements", value="\n".join(lines)[:1024], inline=False)
+
+        if reset:
+            db_manager.reset_query_stats()
+            embed.set_footer(text="Statistics reset.")
+        await interaction.response.send_message(embed=embed, ephemeral=False)
+
+    @app_commands.command(name="latency_report", description="Show command latency percentiles per phase (recent invocations).")
+    @app_commands.describe(command="Only show this command (optional)", reset="Clear the recorded traces afterwards (default: False)")
+    @app_commands.default_permissions(administrator=True)
+    async def latency_report(self, interaction: discord.Interaction, command: str = None, reset: bool = False):
+        if not self.is_admin(interaction):
+            await interaction.response.send_message("❌ You do not have permissions.", ephemeral=False)
+            return
+
+        report = get_latency_report(command.lstrip('/') if command else None)
+        if not report:
+            await interaction.response.send_message("No command traces recorded yet.", ephemeral=False)
+            return
+
+        embed = discord.Embed(title="⏱️ Command Latency (p50 / p95 / p99, ms)", color=discord.Color.dark_teal())
+        for entry in report[:10]:
+            p50, p95, p99 = entry['total']
+            lines = [f"**total** {p50:.0f} / {p95:.0f} / {p99:.0f}"]
+            # Phases ordered by their tail contribution
+            for phase, (q50, q95, q99) in sorted(entry['phases'].items(), key=lambda kv: kv[1][1], reverse=True):
+                lines.append(f"{phase} {q50:.0f} / {q95:.0f} / {q99:.0f}")
+            errors = f", {entry['errors']} failed" if entry['errors'] else ""
+            embed.add_field(name=f"/{entry['command']} ({entry['count']} runs{errors})", value="\n".join(lines)[:1024], inline=True)
+
+        if reset:
+            clear_traces()
+            embed.set_footer(text="Traces cleared.")
+        await interaction.response.send_message(embed=embed, ephemeral=False)
+
+    @app_commands.command(name="profile_command", description="Profile the next runs of a slash command (cProfile).")
+    @app_commands.describe(
+        command="Slash command name to profile",
+        count="Number of runs to profile (default: 5)",
+        minutes="Profile every run for this many minutes instead (optional)",
+        stop="Stop profiling this command (default: False)"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def profile_command(self, interaction: discord.Interaction, command: str, count: int = 5, minutes: int = None, stop: bool = False):
+        if not self.is_admin(interaction):
+            await interaction.response.send_message("❌ You do not have permissions.", ephemeral=False)
+            return
+
+        command = command.lstrip('/')
+        if stop:
+            command_profiler.disarm(command)
+            await interaction.response.send_message(f"⏹️ Profiling of `/{command}` stopped.", ephemeral=False)
+            return
+
+        if self.bot.tree.get_command(command) is None:
+            await interaction.response.send_message(f"❌ Unknown command `/{command}`.", ephemeral=False)
+            return
+
+        command_profiler.arm(command, count=None if minutes else count, minutes=minutes)
+        scope = f"for {minutes} min" if minutes else f"for the next {count} runs"
+        await interaction.response.send_message(f"🔬 Profiling `/{command}` {scope}. Use `/profile_report` to see the results.", ephemeral=False)
+        await self.log_to_channel(interaction, "Profile Command", f"/{command} {scope}")
+
+    @app_commands.command(name="profile_report", description="Show the hottest functions of the latest command profile.")
+    @app_commands.describe(command="Only reports of this command (optional)", sort="Rank by self time or cumulative time")
+    @app_commands.choices(sort=[
+        app_commands.Choice(name="Self time", value="tottime"),
+        app_commands.Choice(name="Cumulative time", value="cumtime")
+    ])
+    @app_commands.default_permissions(administrator=True)
+    async def profile_report(self, interaction: discord.Interaction, command: str = None, sort: str = "tottime"):
+        if not self.is_admin(interaction):
+            await interaction.response.send_message("❌ You do not have permissions.", ephemeral=False)
+            return
+
+        reports = command_profiler.list_reports(command.lstrip('/') if command else None)
+        armed = command_profiler.status()
+        armed_text = ", ".join(
+            f"/{name} ({t['remaining']} left)" if t['remaining'] is not None else f"/{name} (until <t:{int(t['until'])}:t>)"
+            for name, t in armed.items()
+        ) or "none"
+        if not reports:
+            await interaction.response.send_message(f"No profiles saved yet. Armed: {armed_text}", ephemeral=False)
+            return
+
+        path = reports[0]
+        rows = await asyncio.to_thread(summarize_profile, path, 15, sort)
+        lines = [f"{r[sort] * 1000:8.1f} ms  {r['calls']:>6}×  {r['function'][:60]}" for r in rows]
+
+        embed = discord.Embed(title=f"🔬 Profile: {os.path.basename(path)}", color=discord.Color.dark_teal())
+        embed.description = f"Top functions by {'self' if sort == 'tottime' else 'cumulative'} time\n```{chr(10).join(lines)[:3900]}```"
+        embed.set_footer(text=f"{len(reports)} report(s) saved · armed: {armed_text}"[:2048])
+        await interaction.response.send_message(embed=embed, file=discord.File(path), ephemeral=False)
+
+    @profile_command.autocomplete('command')
+    @profile_report.autocomplete('command')
+    async def profile_command_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        names = sorted(c.name for c in self.bot.tree.get_commands() if isinstance(c, app_commands.Command))
+        return [app_commands.Choice(name=n, value=n) for n in names if current.lower() in n.lower()][:25]
+
     @app_commands.command(name="set_dkp_formula", description="Configure DKP formula weights.")
     @app_commands.describe(t4="Points per T4 kill", t5="Points per T5 kill", deaths="Points per death")
     @app_commands.default_permissions(administrator=True)
@@ -794,17 +957,13 @@ class Admin(commands.Cog):
         from database import database_manager as db_manager
         await interaction.response.defer()
         
-        # Use new global function to get ALL players with latest stats
-        players = db_manager.get_all_players_global()
+        # Pages are read from the best-snapshot table on demand
+        view = PlayerListPaginationView("🌍 Global Player List")
         
-        if not players:
+        if not view.total:
             await interaction.followup.send("No players found in database.")
             return
 
-        # Sort by power descending
-        players.sort(key=lambda x: x.get('power', 0), reverse=True)
-        
-        view = PlayerListPaginationView(players, "🌍 Global Player List")
         await interaction.followup.send(embed=view.create_embed(), view=view)
 
     @app_commands.command(name="delete_snapshot", description="⚠️ Delete a specific snapshot batch.")
@@ -886,22 +1045,19 @@ class Admin(commands.Cog):
             await ctx.send("❌ Please upload a `.db` file (SQLite database backup).")
             return
 
-        # Save to temp location
-        if not os.path.exists("temp_uploads"):
-            os.makedirs("temp_uploads")
-        file_path = f"temp_uploads/{attachment.filename}"
-        await attachment.save(file_path)
+        # Keep the upload in memory (or spooled) until the admin confirms
+        upload = await read_attachment(attachment)
 
         await ctx.send(
             f"⚠️ **DATABASE RESTORE** ⚠️\n\n"
             f"You are about to replace the **entire database** with `{attachment.filename}`.\n"
             f"A safety backup of the current database will be created automatically.\n\n"
             f"**This will overwrite ALL current data!**",
-            view=RestoreConfirmView(file_path, self)
+            view=RestoreConfirmView(upload, self)
         )
 
     @app_commands.command(name="check_player", description="Admin: View stats or forts for ANY player ID.")
-    @app_commands.describe(player_id="Game ID to check", type="stats or forts", season="Optional Season")
+    @app_commands.describe(player_id="Game ID to check (type a name to search)", type="stats or forts", season="Optional Season")
     @app_commands.default_permissions(administrator=True)
     async def check_player(self, interaction: discord.Interaction, player_id: str, type: str = "stats", season: str = None):
         if not self.is_admin(interaction):
@@ -911,8 +1067,12 @@ class Admin(commands.Cog):
         try: 
             pid = int(player_id)
         except ValueError:
-            await interaction.response.send_message("❌ Player ID must be a number.", ephemeral=False)
-            return
+            # Typed a name without picking a suggestion: accept it only if it is unambiguous
+            matches = db_manager.search_players(player_id, limit=2)
+            if len(matches) != 1:
+                await interaction.response.send_message("❌ Player ID must be a number (or pick a player from the suggestions).", ephemeral=False)
+                return
+            pid = matches[0]['player_id']
             
         await interaction.response.defer()
         
@@ -933,35 +1093,17 @@ class Admin(commands.Cog):
              return
 
         # Common name fetching logic for both views
-        player_name = f"ID: {pid}"
-        conn = db_manager.get_connection()
-        cursor = conn.cursor()
-        try:
-            # Try finding name in kingdom_players first, then try kvk_stats/snapshots if needed
-            cursor.execute("SELECT player_name FROM kingdom_players WHERE player_id = ?", (pid,))
-            row = cursor.fetchone()
-            if row:
-                player_name = row[0]
-            else:
-                # Fallback to checking any stats table
-                cursor.execute("SELECT player_name FROM kvk_stats WHERE player_id = ? LIMIT 1", (pid,))
-                row = cursor.fetchone()
-                if row: 
-                    player_name = row[0]
-            
-            # Create a virtual "accounts" list for the view
-            # This makes the view work as if this admin is the owner of this account
-            virtual_accounts = [{
-                'player_id': pid,
-                'player_name': player_name,
-                'account_type': 'Target' 
-            }]
-            
-        except Exception as e:
-            logger.error(f"Error fetching player name: {e}")
-            virtual_accounts = [{'player_id': pid, 'player_name': f"ID: {pid}", 'account_type': 'Target'}]
-        finally:
-            conn.close()
+        player = db_manager.get_player(pid)
+        if player:
+            player_name = player['latest_name']
+
+        # Create a virtual "accounts" list for the view
+        # This makes the view work as if this admin is the owner of this account
+        virtual_accounts = [{
+            'player_id': pid,
+            'player_name': player_name,
+            'account_type': 'Target'
+        }]
         
         if type.lower() == "stats":
             stats_cog = self.bot.get_cog("Stats")
@@ -1003,6 +1145,10 @@ class Admin(commands.Cog):
         seasons = db_manager.get_played_seasons()
         return [app_commands.Choice(name=s['label'], value=s['value']) for s in seasons if current.lower() in s['label'].lower()][:25]
 
+    @check_player.autocomplete('player_id')
+    async def check_player_id_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        return get_player_autocomplete_choices(db_manager.search_players(current))
+
     @check_player.autocomplete('type')
     async def check_player_type_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
         options = ["stats", "forts"]
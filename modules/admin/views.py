@@ -167,16 +167,24 @@ class ClearFortsConfirmView(discord.ui.View):
         self.stop()
 
 class RestoreConfirmView(discord.ui.View):
-    def __init__(self, file_path, admin_cog):
+    def __init__(self, upload, admin_cog):
         super().__init__(timeout=60)
-        self.file_path = file_path
+        self.upload = upload  # bytes or spooled temp file from read_attachment
         self.admin_cog = admin_cog
 
+    def _release_upload(self):
+        if hasattr(self.upload, 'close'):
+            self.upload.close()
+        self.upload = None
+
+    async def on_timeout(self):
+        self._release_upload()
+
     @discord.ui.button(label="YES, RESTORE DATABASE", style=discord.ButtonStyle.red, emoji="⚠️")
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
         
-        success, msg, safety_path = db_manager.restore_database(self.file_path)
+        success, msg, safety_path = db_manager.restore_database(self.upload)
         
         if success:
             # Send safety backup file
@@ -199,24 +207,13 @@ class RestoreConfirmView(discord.ui.View):
         else:
             await interaction.followup.send(f"❌ **Restore failed:** {msg}")
         
-        # Cleanup temp file
-        import os
-        try:
-            os.remove(self.file_path)
-        except Exception:
-            pass
-        
+        self._release_upload()
         self.stop()
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.grey)
     async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.edit_message(content="Restore cancelled.", view=None)
-        # Cleanup temp file
-        import os
-        try:
-            os.remove(self.file_path)
-        except Exception:
-            pass
+        self._release_upload()
         self.stop()
 
 class DeleteFortPeriodConfirmView(discord.ui.View):
@@ -576,34 +573,24 @@ class CompliancePaginationView(discord.ui.View):
         await interaction.response.edit_message(embed=self.create_embed(), view=self)
 
 class PlayerListPaginationView(discord.ui.View):
-    def __init__(self, data, title):
+    def __init__(self, title):
         super().__init__(timeout=300)
-        self.all_data = data
         self.title = title
         self.per_page = 8
         self.current_page = 0
         self.selected_type = "all"
-        
-        # Load player types once for efficiency
-        self.player_types = db_manager.get_all_player_types()
-        self._apply_filter()
+        self._load_page()
         self.update_components()
 
-    def _apply_filter(self):
-        if self.selected_type == "all":
-            self.data = self.all_data
-        else:
-            self.data = [
-                p for p in self.all_data
-                if self.player_types.get(p['player_id'], 'main') == self.selected_type
-            ]
-        self.total_pages = max(1, (len(self.data) - 1) // self.per_page + 1)
-        self.current_page = min(self.current_page, self.total_pages - 1)
+    def _load_page(self, after=None, before=None):
+        account_type = None if self.selected_type == "all" else self.selected_type
+        if not after and not before:
+            self.total = db_manager.count_players_global(account_type)
+            self.total_pages = max(1, (self.total - 1) // self.per_page + 1)
+        self.data = db_manager.get_players_page(account_type, after=after, before=before, limit=self.per_page)
 
     def create_embed(self):
         start = self.current_page * self.per_page
-        end = start + self.per_page
-        page_data = self.data[start:end]
         
         type_labels = {"all": "All", "main": "Main", "farm": "Farm", "alt": "Alt"}
         type_label = type_labels.get(self.selected_type, "All")
@@ -617,8 +604,8 @@ class PlayerListPaginationView(discord.ui.View):
         type_icons = {"main": "👤", "farm": "🌾", "alt": "🎭"}
         
         text = ""
-        for i, p in enumerate(page_data, start + 1):
-            acc_type = self.player_types.get(p['player_id'], 'main')
+        for i, p in enumerate(self.data, start + 1):
+            acc_type = p['account_type']
             type_icon = type_icons.get(acc_type, "👤")
             type_label_item = acc_type.capitalize()
             
@@ -631,7 +618,7 @@ class PlayerListPaginationView(discord.ui.View):
             text = "No players found for this filter."
             
         embed.add_field(name=f"Players (Page {self.current_page + 1}/{self.total_pages})", value=text, inline=False)
-        embed.set_footer(text=f"Total: {len(self.data)} players")
+        embed.set_footer(text=f"Total: {self.total} players")
         return embed
 
     def update_components(self):
@@ -657,18 +644,26 @@ class PlayerListPaginationView(discord.ui.View):
         async def callback(interaction: discord.Interaction):
             self.selected_type = type_key
             self.current_page = 0
-            self._apply_filter()
+            self._load_page()
             self.update_components()
             await interaction.response.edit_message(embed=self.create_embed(), view=self)
         return callback
 
     async def _prev_callback(self, interaction: discord.Interaction):
         self.current_page -= 1
+        first = self.data[0] if self.data else None
+        if first and self.current_page > 0:
+            self._load_page(before=(first['power'], first['player_id']))
+        else:
+            self.current_page = 0
+            self._load_page()
         self.update_components()
         await interaction.response.edit_message(embed=self.create_embed(), view=self)
 
     async def _next_callback(self, interaction: discord.Interaction):
         self.current_page += 1
+        last = self.data[-1]
+        self._load_page(after=(last['power'], last['player_id']))
         self.update_components()
         await interaction.response.edit_message(embed=self.create_embed(), view=self)
 
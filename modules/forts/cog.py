@@ -2,13 +2,13 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import logging
-import pandas as pd
 import io
 import os
 from datetime import datetime, timedelta
 import asyncio
 from database import database_manager as db_manager
 from core import graphics
+from core.tracing import span
 from .views import FortLeaderboardPaginationView
 
 logger = logging.getLogger('discord_bot.forts')
@@ -45,7 +45,8 @@ class Forts(commands.Cog):
     @app_commands.command(name='my_forts', description='Show your fort participation statistics.')
     @app_commands.describe(period="Select a specific period or 'Total'", season="Select a fort season (e.g. Forts_2024)")
     async def my_forts(self, interaction: discord.Interaction, period: str = "total", season: str = None):
-        await interaction.response.defer(ephemeral=False)
+        async with span("defer"):
+            await interaction.response.defer(ephemeral=False)
         
         # Get linked account
         accounts = db_manager.get_linked_accounts(interaction.user.id)
@@ -75,10 +76,11 @@ class Forts(commands.Cog):
         # Pass accounts list for switching buttons
         view = FortStatsView(player_id, player_name, target_season, period, self, accounts=accounts)
         
-        if file:
-            await interaction.followup.send(embed=embed, file=file, view=view)
-        else:
-            await interaction.followup.send(embed=embed, view=view)
+        async with span("send"):
+            if file:
+                await interaction.followup.send(embed=embed, file=file, view=view)
+            else:
+                await interaction.followup.send(embed=embed, view=view)
 
     async def get_combined_forts_embed_and_file(self, accounts, season, period):
         """Helper to generate aggregated fort stats embed for multiple accounts."""
@@ -89,28 +91,15 @@ class Forts(commands.Cog):
             'joined': 0, 'launched': 0, 'total': 0, 'penalties': 0
         }
         
-        found_data = False
+        # Single point lookup for all linked accounts
+        all_stats = db_manager.get_fort_stats_for_players(player_ids, season, period)
+        found_data = bool(all_stats)
         
-        # Fetch stats for each player
-        for pid in player_ids:
-            # Reusing existing logic? 
-            # get_my_forts_embed_and_file uses db_manager.get_fort_leaderboard to find stats.
-            # But we can use db_manager.get_fort_stats(pid, season) for total/period specific?
-            # Actually db_manager.get_fort_leaderboard returns list for the period.
-            
-            if period == "total":
-                leaderboard = db_manager.get_fort_leaderboard(season, "total")
-                stats = next((p for p in leaderboard if p['player_id'] == pid), None)
-            else:
-                leaderboard = db_manager.get_fort_leaderboard(season, period)
-                stats = next((p for p in leaderboard if p['player_id'] == pid), None)
-            
-            if stats:
-                found_data = True
-                aggregated['joined'] += stats['forts_joined']
-                aggregated['launched'] += stats['forts_launched']
-                aggregated['total'] += stats['total_forts']
-                aggregated['penalties'] += stats['penalties']
+        for stats in all_stats.values():
+            aggregated['joined'] += stats['forts_joined']
+            aggregated['launched'] += stats['forts_launched']
+            aggregated['total'] += stats['total_forts']
+            aggregated['penalties'] += stats['penalties']
 
         if not found_data:
              embed = discord.Embed(
@@ -154,15 +143,10 @@ class Forts(commands.Cog):
 
     async def get_my_forts_embed_and_file(self, player_id, player_name, season, period):
         """Helper to generate the embed and dynamics chart for a player."""
+        stats = db_manager.get_player_fort_stats(player_id, season, period)
         if period == "total":
-            # Sum up all periods
-            leaderboard = db_manager.get_fort_leaderboard(season, "total")
-            stats = next((p for p in leaderboard if p['player_id'] == player_id), None)
             period_label = "Total (All Periods)"
         else:
-            # Specific period
-            leaderboard = db_manager.get_fort_leaderboard(season, period)
-            stats = next((p for p in leaderboard if p['player_id'] == player_id), None)
             # Find label
             periods = db_manager.get_fort_periods(season)
             period_label = next((p['period_label'] for p in periods if p['period_key'] == period), period)
@@ -313,6 +297,7 @@ class Forts(commands.Cog):
     async def process_fort_file(self, attachment, current_kvk):
         """Helper to process a single fort stats file."""
         try:
+            import pandas as pd
             data = await attachment.read()
             if attachment.filename.endswith('.csv'):
                 df = pd.read_csv(io.BytesIO(data))
@@ -10,6 +10,7 @@ import os
 from database import database_manager as db_manager
 from core import graphics
 from core.helpers import get_season_autocomplete_choices
+from core.tracing import span
 from .views import *
 from .helpers import add_stats_fields, format_period_label
 
@@ -20,7 +21,6 @@ logger = logging.getLogger('discord_bot.stats')
 class Stats(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        db_manager.create_tables()
 
     @commands.command(name='stats')
     async def legacy_stats(self, ctx, player_id: str = None):
@@ -70,7 +70,8 @@ class Stats(commands.Cog):
     @app_commands.command(name='kingdom_stats', description='Show statistics for the whole kingdom.')
     @app_commands.describe(season="Optional: Select a specific season")
     async def kingdom_stats(self, interaction: discord.Interaction, season: str = None):
-        await interaction.response.defer()
+        async with span("defer"):
+            await interaction.response.defer()
         await self.kingdom_stats_logic(interaction, kvk_name=season)
 
     @kingdom_stats.autocomplete('season')
@@ -78,10 +79,18 @@ class Stats(commands.Cog):
         seasons = db_manager.get_played_seasons()
         return get_season_autocomplete_choices(seasons, current)
 
+    @app_commands.command(name='kingdom_history', description='Compare kingdom totals across the last played seasons.')
+    @app_commands.describe(seasons="Number of seasons to compare (2-10, default 5)")
+    async def kingdom_history(self, interaction: discord.Interaction, seasons: app_commands.Range[int, 2, 10] = 5):
+        async with span("defer"):
+            await interaction.response.defer()
+        await self.kingdom_history_logic(interaction, seasons)
+
     @app_commands.command(name='my_stats', description='Show statistics for your linked accounts.')
     @app_commands.describe(season="Optional: Select a specific season (current or archive)")
     async def my_stats(self, interaction: discord.Interaction, season: str = None):
-        await interaction.response.defer()
+        async with span("defer"):
+            await interaction.response.defer()
         await self.my_stats_logic(interaction, season_override=season)
     
     @my_stats.autocomplete('season')
@@ -126,16 +135,17 @@ class Stats(commands.Cog):
         
         view = UnifiedStatsView(accounts, target_kvk, "all", player_id, self)
         
-        if file:
-            if interaction.response.is_done():
-                await interaction.followup.send(embed=embed, file=file, view=view)
-            else:
-                await interaction.response.send_message(embed=embed, file=file, view=view)
-        else:
-            if interaction.response.is_done():
-                await interaction.followup.send(embed=embed, view=view)
+        async with span("send"):
+            if file:
+                if interaction.response.is_done():
+                    await interaction.followup.send(embed=embed, file=file, view=view)
+                else:
+                    await interaction.response.send_message(embed=embed, file=file, view=view)
             else:
-                await interaction.response.send_message(embed=embed, view=view)
+                if interaction.response.is_done():
+                    await interaction.followup.send(embed=embed, view=view)
+                else:
+                    await interaction.response.send_message(embed=embed, view=view)
         
         await self.log_to_channel(interaction, "Command Used", f"Command: /my_stats (Season: {target_kvk})")
 
@@ -181,17 +191,10 @@ class Stats(commands.Cog):
             start_snapshot = db_manager.get_kingdom_start_snapshot(kvk_name)
         else:
             # For specific period, get start snapshot of that period
-            start_data = db_manager.get_snapshot_data(kvk_name, period_key, 'start')
-            if start_data:
-                # Aggregate start snapshot
-                start_power = sum(p['power'] for p in start_data.values())
-                start_kp = sum(p['kill_points'] for p in start_data.values())
-                start_deaths = sum(p['deaths'] for p in start_data.values())
-                start_snapshot = {
-                    'kingdom_power': start_power,
-                    'kingdom_kill_points': start_kp,
-                    'kingdom_deaths': start_deaths
-                }
+            start_totals = db_manager.get_kingdom_aggregate(kvk_name, period_key, 'start')
+            if start_totals:
+                # Precomputed kingdom totals of the start snapshot
+                start_snapshot = {f"kingdom_{column}": start_totals[column] for column in ('power', 'kill_points', 'deaths')}
             else:
                 start_snapshot = None
         
@@ -263,12 +266,92 @@ class Stats(commands.Cog):
         if footer_text:
             embed.set_footer(text=footer_text)
 
-        if interaction.response.is_done():
-            await interaction.followup.send(embed=embed)
-        else:
-            await interaction.response.send_message(embed=embed)
+        async with span("send"):
+            if interaction.response.is_done():
+                await interaction.followup.send(embed=embed)
+            else:
+                await interaction.response.send_message(embed=embed)
         await self.log_to_channel(interaction, "Command Used", "Command: /kingdom_stats")
 
+    async def kingdom_history_logic(self, interaction: discord.Interaction, season_count: int = 5):
+        """Kingdom totals of the last `season_count` played seasons with results, with season-over-season changes."""
+        # Skip seasons without calculated results (e.g. the active one before its first period) before counting
+        with_results = db_manager.get_seasons_with_results()
+        played = [s for s in db_manager.get_played_seasons() if s['value'] in with_results][:season_count]
+        labels = {s['value']: s['label'] for s in played}
+        kvk_names = [s['value'] for s in reversed(played)]  # oldest first
+
+        # One grouped query for all players and seasons
+        history = db_manager.get_kingdom_cross_kvk_stats(kvk_names)
+        totals = history.season_totals()
+
+        if len(totals) < 2:
+            msg = "At least two seasons with calculated results are needed for a kingdom history."
+            if interaction.response.is_done():
+                await interaction.followup.send(msg, ephemeral=False)
+            else:
+                await interaction.response.send_message(msg, ephemeral=False)
+            return
+
+        embed = discord.Embed(
+            title="📜 Kingdom History",
+            description=f"Last **{len(totals)}** seasons, oldest first.",
+            color=discord.Color.gold()
+        )
+
+        def change(current, previous):
+            if previous is None:
+                return ""
+            diff = current - previous
+            pct = f", {diff / previous * 100:+.1f}%" if previous else ""
+            return f" ({diff:+,}{pct})"
+
+        previous = None
+        for season in totals:
+            embed.add_field(
+                name=labels.get(season['kvk_name'], season['kvk_name']),
+                value=(
+                    f"Players: {season['player_count']:,}{change(season['player_count'], previous and previous['player_count'])}\n"
+                    f"💪 Power: {season['power']:,}{change(season['power'], previous and previous['power'])}\n"
+                    f"⚔️ KP: {season['kill_points']:,}{change(season['kill_points'], previous and previous['kill_points'])}\n"
+                    f"💀 Deaths: {season['deaths']:,}{change(season['deaths'], previous and previous['deaths'])}"
+                ),
+                inline=False
+            )
+            previous = season
+
+        # Players who played both of the last two seasons
+        returning = int(history.returning()[:, -1].sum())
+        embed.add_field(
+            name="🔁 Returning Players",
+            value=f"{returning:,} of {totals[-1]['player_count']:,} played the season before",
+            inline=False
+        )
+        top = history.top_changes('kill_points', limit=5)
+        if top:
+            lines = []
+            for i, player in enumerate(top, start=1):
+                pct = f" ({player['growth']:+.1f}%)" if player['growth'] is not None else ""
+                lines.append(f"{i}. {player['player_name']}: {player['delta']:+,}{pct}")
+            embed.add_field(name="📈 Top KP Growth", value="\n".join(lines), inline=False)
+
+        file = None
+        chart_buf = graphics.create_kingdom_history_chart(
+            [{'label': labels.get(t['kvk_name'], t['kvk_name'])[:15], 'kill_points': t['kill_points'],
+              'deaths': t['deaths'], 'power': t['power']} for t in totals],
+            "Kingdom History"
+        )
+        if chart_buf:
+            file = discord.File(chart_buf, filename="kingdom_history.png")
+            embed.set_image(url="attachment://kingdom_history.png")
+
+        async with span("send"):
+            if file:
+                await interaction.followup.send(embed=embed, file=file)
+            else:
+                await interaction.followup.send(embed=embed)
+        await self.log_to_channel(interaction, "Command Used", "Command: /kingdom_history")
+
     async def get_player_stats_embed_and_file(self, player_id: int, kvk_name: str, period_key: str = "all"):
         """Helper to generate the player stats embed and dynamics chart."""
         stats_row = db_manager.get_player_stats_by_period(player_id, kvk_name, period_key)
@@ -507,13 +590,11 @@ class Stats(commands.Cog):
          if hasattr(self.bot, 'logger'):
              await self.bot.logger.log_admin_action(interaction, action, details)
          
-         # Also log to DB if needed, though log_admin_action in core might not do it?
-         # Wait, core logger only logs to channel. We still need DB logging.
-         # So we should keep calling db_manager.log_admin_action HERE or in core logger.
-         # The plan said: "log_admin_action: Handles admin specific logs (and writes to DB)."
-         # But core logger is generic. Let's keep DB logging separate or invoke it there.
-         # Actually, better to just call db_manager here to be safe and use bot.logger for channel.
-         db_manager.log_admin_action(interaction.user.id, interaction.user.name, action, details)
+         # Core logger only logs to channel; DB logging goes through the batched audit writer
+         if hasattr(self.bot, 'audit'):
+             await self.bot.audit.log(interaction.user.id, interaction.user.name, action, details)
+         else:
+             db_manager.log_admin_action(interaction.user.id, interaction.user.name, action, details)
 
 
 async def setup(bot: commands.Bot):
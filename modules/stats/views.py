@@ -4,15 +4,16 @@ Contains all Discord UI classes: Modals, Views, Buttons, Selects.
 """
 import discord
 from database import database_manager as db_manager
+from core.helpers import truncate_string
 
 
 class LinkAccountModal(discord.ui.Modal, title="Link Account"):
     player_id = discord.ui.TextInput(
-        label="Player ID",
-        placeholder="12345678",
+        label="Player ID or Name",
+        placeholder="12345678 or in-game name",
         required=True,
-        min_length=5,
-        max_length=15
+        min_length=3,
+        max_length=32
     )
 
     def __init__(self, account_type, stats_cog):
@@ -21,36 +22,72 @@ class LinkAccountModal(discord.ui.Modal, title="Link Account"):
         self.stats_cog = stats_cog
 
     async def on_submit(self, interaction: discord.Interaction):
-        try:
-            p_id = int(self.player_id.value)
-        except ValueError:
-            await interaction.response.send_message("❌ Player ID must be a number.", ephemeral=False)
+        value = self.player_id.value.strip()
+        if value.isdigit():
+            await link_player_account(interaction, int(value), self.account_type, self.stats_cog)
             return
 
-        discord_id = interaction.user.id
-        
-        # Check if user already has a main account linked
-        if self.account_type == 'main':
-            existing_accounts = db_manager.get_linked_accounts(discord_id)
-            has_main = any(acc['account_type'] == 'main' for acc in existing_accounts)
-            if has_main:
-                await interaction.response.send_message(
-                    "❌ You already have a main account linked. You can only link one main account.\n"
-                    "Use `/unlink_account` to remove your current main account first, or link this as Alt or Farm.",
-                    ephemeral=True
-                )
-                return
-        
-        success = db_manager.link_account(discord_id, p_id, self.account_type)
-
-        if success:
-            await interaction.response.send_message(
-                f"✅ Game ID `{p_id}` successfully linked as **{self.account_type.capitalize()}**.", ephemeral=True)
-            await self.stats_cog.log_to_channel(interaction, "Link Account", f"ID: {p_id}\nType: {self.account_type}")
+        # Modals cannot autocomplete, so resolve names here
+        matches = db_manager.search_players(value)
+        if not matches:
+            await interaction.response.send_message(f"❌ No player found matching `{value}`. Use your numeric Player ID.", ephemeral=True)
+        elif len(matches) == 1:
+            await link_player_account(interaction, matches[0]['player_id'], self.account_type, self.stats_cog)
         else:
             await interaction.response.send_message(
-                "❌ An error occurred while linking the account. Please try again.", ephemeral=True)
-            await self.stats_cog.log_to_channel(interaction, "Link Account Failed", f"ID: {p_id}\nType: {self.account_type}")
+                f"🔎 Several players match `{value}`. Pick yours:",
+                view=PlayerMatchView(matches, self.account_type, self.stats_cog), ephemeral=True)
+
+
+class PlayerMatchSelect(discord.ui.Select):
+    def __init__(self, matches, account_type, stats_cog):
+        options = [
+            discord.SelectOption(
+                label=truncate_string(m['latest_name'], 100),
+                value=str(m['player_id']),
+                description=truncate_string(f"ID: {m['player_id']}" + (f" · was {m['matched_name']}" if m['matched_name'] != m['latest_name'] else ""), 100)
+            ) for m in matches[:25]
+        ]
+        super().__init__(placeholder="Select your account...", options=options)
+        self.account_type = account_type
+        self.stats_cog = stats_cog
+
+    async def callback(self, interaction: discord.Interaction):
+        await link_player_account(interaction, int(self.values[0]), self.account_type, self.stats_cog)
+
+
+class PlayerMatchView(discord.ui.View):
+    def __init__(self, matches, account_type, stats_cog):
+        super().__init__(timeout=60)
+        self.add_item(PlayerMatchSelect(matches, account_type, stats_cog))
+
+
+async def link_player_account(interaction: discord.Interaction, p_id: int, account_type: str, stats_cog):
+    """Links p_id to the interacting user, enforcing a single main account."""
+    discord_id = interaction.user.id
+
+    # Check if user already has a main account linked
+    if account_type == 'main':
+        existing_accounts = db_manager.get_linked_accounts(discord_id)
+        has_main = any(acc['account_type'] == 'main' for acc in existing_accounts)
+        if has_main:
+            await interaction.response.send_message(
+                "❌ You already have a main account linked. You can only link one main account.\n"
+                "Use `/unlink_account` to remove your current main account first, or link this as Alt or Farm.",
+                ephemeral=True
+            )
+            return
+
+    success = db_manager.link_account(discord_id, p_id, account_type)
+
+    if success:
+        await interaction.response.send_message(
+            f"✅ Game ID `{p_id}` successfully linked as **{account_type.capitalize()}**.", ephemeral=True)
+        await stats_cog.log_to_channel(interaction, "Link Account", f"ID: {p_id}\nType: {account_type}")
+    else:
+        await interaction.response.send_message(
+            "❌ An error occurred while linking the account. Please try again.", ephemeral=True)
+        await stats_cog.log_to_channel(interaction, "Link Account Failed", f"ID: {p_id}\nType: {account_type}")
 
 
 class LinkAccountView(discord.ui.View):